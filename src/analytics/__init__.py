@@ -0,0 +1,28 @@
+"""Analytics modules for recorded play and strategy evaluation."""
+
+from .bankroll import BankrollMetrics, SimulatedRisk, analyze, simulate
+from .count_distribution import TrueCountHistogram, cached_histogram
+from .hand_store import HandStore
+from .replay import Divergence, ReplayAuditor, ReplayStats, audit_parallel, recommend_history
+from .session_store import DecisionRecord, HandRecord, SessionStore
+from .shoe_history import ShoeHistoryReader, ShoeHistoryWriter
+
+__all__ = [
+    "ShoeHistoryReader",
+    "ShoeHistoryWriter",
+    "ReplayAuditor",
+    "ReplayStats",
+    "Divergence",
+    "audit_parallel",
+    "recommend_history",
+    "SessionStore",
+    "HandRecord",
+    "DecisionRecord",
+    "BankrollMetrics",
+    "SimulatedRisk",
+    "analyze",
+    "simulate",
+    "TrueCountHistogram",
+    "cached_histogram",
+    "HandStore",
+]
@@ -0,0 +1,218 @@
+"""
+資金風險分析：破產機率、N0、SCORE 與每小時期望值
+
+輸入為下注級距（BetRamp）與各真實計數區間的頻率、期望值、變異數（CountBucket），
+同時提供解析公式與以 NumPy 向量化的資金路徑模擬。模擬一次處理數十萬條路徑，
+以固定長度的區塊推進，記憶體用量與手數無關。
+
+解析公式（布朗運動近似）：
+    每手期望值 μ = Σ f·b·e，每手變異數 σ² = Σ f·b²·v − μ²
+    破產機率（無限期）  exp(−2μB/σ²)
+    破產機率（n 手）    Φ((−B−μn)/(σ√n)) + exp(−2μB/σ²)·Φ((−B+μn)/(σ√n))
+    N0 = σ²/μ²，SCORE = 10⁶·(μ/σ)²（以 10,000 資金、最佳下注時每百手的期望值）
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.core.bet_spread import BetRamp, CountBucket
+
+
+class BankrollMetrics(NamedTuple):
+    """解析計算的資金指標（金額以單位計）"""
+
+    ev_per_round: float
+    sd_per_round: float
+    risk_of_ruin: float
+    trip_risk_of_ruin: float
+    n0: float
+    score: float
+    hourly_ev: float
+    hourly_sd: float
+
+
+class SimulatedRisk(NamedTuple):
+    """資金路徑模擬結果（金額以單位計）"""
+
+    paths: int
+    rounds: int
+    risk_of_ruin: float
+    mean_result: float
+    sd_result: float
+
+
+def _ramp_units(ramp: BetRamp, profile: List[CountBucket]) -> List[int]:
+    return [ramp.units_for(bucket.true_count) for bucket in profile]
+
+
+def round_moments(ramp: BetRamp, profile: List[CountBucket]) -> Tuple[float, float]:
+    """每手的期望值與標準差（單位）"""
+    units = _ramp_units(ramp, profile)
+    total = sum(bucket.frequency for bucket in profile)
+    ev = sum(b.frequency * unit * b.edge for b, unit in zip(profile, units)) / total
+    second = sum(b.frequency * unit * unit * b.variance for b, unit in zip(profile, units)) / total
+    return ev, math.sqrt(max(second - ev * ev, 0.0))
+
+
+def _normal_cdf(x: float) -> float:
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def trip_risk_of_ruin(ev: float, sd: float, bankroll: float, rounds: int) -> float:
+    """n 手內資金跌破 0 的機率（布朗運動首次通過時間）"""
+    if rounds <= 0:
+        return 0.0
+    if sd == 0:
+        return 1.0 if ev * rounds <= -bankroll else 0.0
+    spread = sd * math.sqrt(rounds)
+    drift = ev * rounds
+    first = _normal_cdf((-bankroll - drift) / spread)
+    exponent = -2.0 * ev * bankroll / (sd * sd)
+    if exponent > 700:
+        return 1.0
+    second = math.exp(exponent) * _normal_cdf((-bankroll + drift) / spread)
+    return min(1.0, first + second)
+
+
+def analyze(
+    ramp: BetRamp,
+    profile: List[CountBucket],
+    bankroll_units: float,
+    rounds_per_hour: float = 80.0,
+    trip_rounds: int = 10000,
+) -> BankrollMetrics:
+    """
+    解析計算資金指標
+
+    Args:
+        ramp: 下注級距
+        profile: 各真實計數區間的頻率、期望值與變異數
+        bankroll_units: 資金（單位）
+        rounds_per_hour: 每小時手數
+        trip_rounds: 計算有限期破產機率的手數
+    """
+    ev, sd = round_moments(ramp, profile)
+    variance = sd * sd
+    if ev <= 0:
+        ror = 1.0
+        n0 = math.inf
+    else:
+        ror = min(1.0, math.exp(-2.0 * ev * bankroll_units / variance)) if variance else 0.0
+        n0 = variance / (ev * ev)
+    score = 1e6 * ev * ev / variance if ev > 0 and variance else 0.0
+    return BankrollMetrics(
+        ev,
+        sd,
+        ror,
+        trip_risk_of_ruin(ev, sd, bankroll_units, trip_rounds),
+        n0,
+        score,
+        ev * rounds_per_hour,
+        sd * math.sqrt(rounds_per_hour),
+    )
+
+
+# 抽樣對照表大小：每個區間以成對的 (+, −) 格位表示，頻率解析度為 1/32768
+_TABLE_PAIRS = 1 << 15
+
+
+def _outcome_table(ramp: BetRamp, profile: List[CountBucket]) -> "np.ndarray[Any, Any]":
+    """
+    建立每手輸贏的抽樣對照表
+
+    每個區間依頻率分到成對的格位，一格為 b·(e + √v)、一格為 b·(e − √v)，
+    期望值與變異數與區間一致。抽樣時只需一次整數亂數與一次索引。
+    """
+    frequencies = np.array([bucket.frequency for bucket in profile], dtype=np.float64)
+    frequencies /= frequencies.sum()
+    # 最大餘數法分配格位數，確保總數剛好
+    exact = frequencies * _TABLE_PAIRS
+    pairs = np.floor(exact).astype(np.int64)
+    remainder = _TABLE_PAIRS - int(pairs.sum())
+    if remainder:
+        pairs[np.argsort(exact - pairs)[::-1][:remainder]] += 1
+
+    values: List[float] = []
+    for bucket, count, unit in zip(profile, pairs, _ramp_units(ramp, profile)):
+        spread = math.sqrt(bucket.variance)
+        values += [unit * (bucket.edge + spread), unit * (bucket.edge - spread)] * int(count)
+    return np.array(values, dtype=np.float32)
+
+
+def simulate(
+    ramp: BetRamp,
+    profile: List[CountBucket],
+    bankroll_units: float,
+    rounds: int,
+    paths: int = 100000,
+    seed: Optional[int] = None,
+    chunk_rounds: int = 64,
+) -> SimulatedRisk:
+    """
+    以向量化資金路徑模擬破產機率
+
+    每手的輸贏由區間頻率與兩點分布（期望值 ± 標準差）組成的對照表抽出，
+    每個區塊計算累積和並取最小值判斷是否破產；破產的路徑以輸光資金計。
+
+    Args:
+        ramp: 下注級距
+        profile: 各真實計數區間的頻率、期望值與變異數
+        bankroll_units: 起始資金（單位）
+        rounds: 每條路徑的手數
+        paths: 路徑數
+        seed: 亂數種子
+        chunk_rounds: 每個區塊的手數
+    """
+    rng = np.random.default_rng(seed)
+    table = _outcome_table(ramp, profile)
+
+    # 只追蹤尚未破產的路徑；破產的路徑結果固定為輸光資金
+    bankroll = np.full(paths, float(bankroll_units))
+    done = 0
+    while done < rounds and len(bankroll):
+        length = min(chunk_rounds, rounds - done)
+        # (手數, 路徑) 的排列讓累積和沿連續記憶體進行
+        steps = table[rng.integers(0, len(table), size=(length, len(bankroll)), dtype=np.uint16)]
+        np.cumsum(steps, axis=0, out=steps)
+        alive = bankroll + steps.min(axis=0) > 0.0
+        bankroll = (bankroll + steps[-1])[alive]
+        done += length
+
+    ruined = paths - len(bankroll)
+    final = np.concatenate([bankroll - bankroll_units, np.full(ruined, -float(bankroll_units))])
+    return SimulatedRisk(
+        paths,
+        rounds,
+        ruined / paths,
+        float(final.mean()),
+        float(final.std()),
+    )
+
+
+def ramp_from_thresholds(
+    thresholds: Dict[str, float],
+    max_units: int,
+    min_true_count: int = -10,
+    max_true_count: int = 10,
+) -> BetRamp:
+    """
+    依 wong_halves.yaml 的 betting_thresholds 建立簡單的下注級距
+
+    真實計數 < increase_bet 下注 1 單位，increase_bet 至 max_bet 之間線性增加，
+    >= max_bet 下注 max_units，方便調整門檻時即時評估風險。
+    """
+    increase = thresholds.get("increase_bet", 2.0)
+    maximum = thresholds.get("max_bet", 4.0)
+    units: List[int] = []
+    for tc in range(min_true_count, max_true_count + 1):
+        if tc < increase:
+            units.append(1)
+        elif tc >= maximum or maximum <= increase:
+            units.append(max_units)
+        else:
+            fraction = (tc - increase + 1) / (maximum - increase + 1)
+            units.append(max(1, int(round(1 + fraction * (max_units - 1)))))
+    edges = [0.0] * len(units)
+    return BetRamp(min_true_count, units, edges, 0.0, 0.0, 0.0, 0.0)
@@ -0,0 +1,335 @@
+"""
+真實計數分布（依發牌深度）的預先計算與磁碟快取
+
+兩種估計方式：
+    exact        以多變量超幾何分布的動態規劃，精確計算已發 n 張牌時流水計數的分布
+                 （牌依計數值分組，逐組累加抽出張數與計數和的組合數）
+    monte_carlo  以 NumPy 批次洗牌模擬，逐張累積流水計數
+
+結果為二維直方圖：列為發牌深度區間（已發牌數），欄為真實計數區間，
+每個元素為「發牌位置落在該深度區間且真實計數落在該計數區間」的機率
+（每個發牌位置權重相同）。直方圖以 (牌副數, 發牌深度, 計數系統) 為鍵
+快取為 .npz 檔，其他分析應讀取快取而不是重新模擬。
+"""
+
+import hashlib
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.strategy_generator import default_cache_dir
+from src.utils.atomic_write import atomic_write
+
+# 各牌面在一副牌中的張數
+_CARDS_PER_DECK = {
+    "2": 4,
+    "3": 4,
+    "4": 4,
+    "5": 4,
+    "6": 4,
+    "7": 4,
+    "8": 4,
+    "9": 4,
+    "10": 4,
+    "J": 4,
+    "Q": 4,
+    "K": 4,
+    "A": 4,
+}
+
+
+class TrueCountHistogram:
+    """發牌深度 × 真實計數的二維直方圖"""
+
+    def __init__(
+        self,
+        histogram: npt.NDArray[np.float64],
+        depth_edges: npt.NDArray[np.int64],
+        tc_edges: npt.NDArray[np.float64],
+        decks: int,
+        penetration: float,
+        system: str,
+        method: str,
+    ) -> None:
+        self.histogram = histogram
+        self.depth_edges = depth_edges  # 已發牌數，長度為列數 + 1
+        self.tc_edges = tc_edges  # 真實計數區間邊界，兩端區間包含尾端
+        self.decks = decks
+        self.penetration = penetration
+        self.system = system
+        self.method = method
+
+    def marginal(self) -> npt.NDArray[np.float64]:
+        """各真實計數區間的整體機率"""
+        result: npt.NDArray[np.float64] = self.histogram.sum(axis=0)
+        return result
+
+    def at_depth(self, cards_seen: int) -> npt.NDArray[np.float64]:
+        """指定已發牌數所在深度區間的條件分布"""
+        row = int(np.searchsorted(self.depth_edges, cards_seen, side="right")) - 1
+        row = min(max(row, 0), len(self.histogram) - 1)
+        mass = self.histogram[row]
+        total = float(mass.sum())
+        result: npt.NDArray[np.float64] = mass / total if total else mass
+        return result
+
+    def integer_buckets(self) -> Dict[int, float]:
+        """
+        合併為整數真實計數區間（tc <= 真實計數 < tc + 1）的頻率
+
+        可直接傳給 bet_spread.count_profile 的 frequencies 參數。
+        """
+        buckets: Dict[int, float] = {}
+        for lower, mass in zip(self.tc_edges[:-1], self.marginal()):
+            bucket = int(math.floor(lower))
+            buckets[bucket] = buckets.get(bucket, 0.0) + float(mass)
+        return buckets
+
+    def save(self, path: Union[str, Path]) -> None:
+        """寫入 .npz 檔（先寫暫存檔再改名）"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        metadata = json.dumps(
+            {
+                "decks": self.decks,
+                "penetration": self.penetration,
+                "system": self.system,
+                "method": self.method,
+            }
+        )
+        with atomic_write(target, "wb") as f:
+            np.savez_compressed(
+                f,
+                histogram=self.histogram,
+                depth_edges=self.depth_edges,
+                tc_edges=self.tc_edges,
+                metadata=np.array(metadata),
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TrueCountHistogram":
+        with np.load(path) as data:
+            metadata: Dict[str, Any] = json.loads(str(data["metadata"]))
+            return cls(
+                data["histogram"],
+                data["depth_edges"],
+                data["tc_edges"],
+                int(metadata["decks"]),
+                float(metadata["penetration"]),
+                str(metadata["system"]),
+                str(metadata["method"]),
+            )
+
+
+def _integer_scale(card_values: Dict[str, float]) -> int:
+    """讓所有牌值變成整數的最小倍數"""
+    for scale in (1, 2, 3, 4, 6, 8, 10, 12):
+        if all(abs(value * scale - round(value * scale)) < 1e-9 for value in card_values.values()):
+            return scale
+    raise ValueError("牌值無法換算為整數，不支援精確計算")
+
+
+def _edges(decks: int, penetration: float, depth_bin: int, tc_limit: float, tc_step: float) -> Any:
+    if not 0 < penetration < 1:
+        raise ValueError(f"發牌深度必須介於 0 與 1 之間：{penetration}")
+    total = decks * 52
+    cut = max(1, int(total * penetration))
+    depth_edges = np.arange(0, cut + depth_bin, depth_bin, dtype=np.int64)
+    depth_edges[-1] = min(depth_edges[-1], cut)
+    steps = int(round(2 * tc_limit / tc_step))
+    tc_edges = np.linspace(-tc_limit, tc_limit, steps + 1)
+    return total, cut, depth_edges, tc_edges
+
+
+def _accumulate(
+    histogram: npt.NDArray[np.float64],
+    depth_edges: npt.NDArray[np.int64],
+    tc_edges: npt.NDArray[np.float64],
+    seen: npt.NDArray[np.int64],
+    true_counts: npt.NDArray[np.float64],
+    weights: npt.NDArray[np.float64],
+) -> None:
+    """把 (已發牌數, 真實計數, 權重) 加入直方圖，超出範圍的計數併入兩端區間"""
+    rows = np.searchsorted(depth_edges, seen, side="right") - 1
+    rows = np.clip(rows, 0, len(depth_edges) - 2)
+    cols = np.searchsorted(tc_edges, true_counts, side="right") - 1
+    cols = np.clip(cols, 0, len(tc_edges) - 2)
+    np.add.at(histogram, (rows, cols), weights)
+
+
+def exact_histogram(
+    decks: int,
+    penetration: float,
+    card_values: Dict[str, float],
+    system: str = "",
+    depth_bin: int = 13,
+    tc_limit: float = 10.0,
+    tc_step: float = 0.5,
+) -> TrueCountHistogram:
+    """
+    以動態規劃精確計算真實計數分布
+
+    牌依計數值分組後，已發 n 張牌、流水計數和為 s 的組合數為各組 C(組張數, 抽出張數) 之積
+    的總和；除以 C(總張數, n) 即為機率。
+
+    Args:
+        decks: 牌副數
+        penetration: 發牌深度（切牌位置佔總張數的比例）
+        card_values: 計數系統牌值
+        system: 計數系統名稱（記錄用）
+        depth_bin: 深度區間寬度（張）
+        tc_limit: 真實計數範圍 [-tc_limit, tc_limit]
+        tc_step: 真實計數區間寬度
+    """
+    total, cut, depth_edges, tc_edges = _edges(decks, penetration, depth_bin, tc_limit, tc_step)
+    scale = _integer_scale(card_values)
+
+    groups: Dict[int, int] = {}
+    for card, per_deck in _CARDS_PER_DECK.items():
+        value = int(round(card_values[card] * scale))
+        groups[value] = groups.get(value, 0) + per_deck * decks
+
+    low = sum(min(value, 0) * count for value, count in groups.items())
+    high = sum(max(value, 0) * count for value, count in groups.items())
+    offset = -low
+    # ways[n, s + offset]：抽出 n 張、計數和為 s 的組合數
+    ways = np.zeros((cut + 1, high - low + 1), dtype=np.float64)
+    ways[0, offset] = 1.0
+    for value, count in groups.items():
+        updated = np.zeros_like(ways)
+        binomial = 1.0
+        for drawn in range(0, min(count, cut) + 1):
+            if drawn:
+                binomial = binomial * (count - drawn + 1) / drawn
+            shift = value * drawn
+            source = ways[: cut + 1 - drawn]
+            if shift >= 0:
+                updated[drawn:, shift:] += binomial * source[:, : source.shape[1] - shift]
+            else:
+                updated[drawn:, :shift] += binomial * source[:, -shift:]
+        ways = updated
+
+    histogram = np.zeros((len(depth_edges) - 1, len(tc_edges) - 1), dtype=np.float64)
+    running_counts = (np.arange(ways.shape[1]) - offset) / scale
+    for seen in range(cut):
+        probabilities = ways[seen] / math.comb(total, seen)
+        mask = probabilities > 0
+        decks_remaining = (total - seen) / 52.0
+        _accumulate(
+            histogram,
+            depth_edges,
+            tc_edges,
+            np.full(int(mask.sum()), seen, dtype=np.int64),
+            running_counts[mask] / decks_remaining,
+            probabilities[mask] / cut,
+        )
+    return TrueCountHistogram(histogram, depth_edges, tc_edges, decks, penetration, system, "exact")
+
+
+def simulated_histogram(
+    decks: int,
+    penetration: float,
+    card_values: Dict[str, float],
+    system: str = "",
+    shoes: int = 20000,
+    seed: Optional[int] = None,
+    batch: int = 2000,
+    depth_bin: int = 13,
+    tc_limit: float = 10.0,
+    tc_step: float = 0.5,
+) -> TrueCountHistogram:
+    """
+    以蒙地卡羅模擬估計真實計數分布
+
+    每批次建立 (批次, 總張數) 的牌值陣列，逐列洗牌後沿列累積流水計數。
+    """
+    total, cut, depth_edges, tc_edges = _edges(decks, penetration, depth_bin, tc_limit, tc_step)
+    rng = np.random.default_rng(seed)
+    shoe = np.repeat(
+        np.array([card_values[card] for card in _CARDS_PER_DECK], dtype=np.float64),
+        [per_deck * decks for per_deck in _CARDS_PER_DECK.values()],
+    )
+    # 第 i 個發牌位置之前已發 i 張牌
+    seen = np.arange(cut, dtype=np.int64)
+    decks_remaining = (total - seen) / 52.0
+    histogram = np.zeros((len(depth_edges) - 1, len(tc_edges) - 1), dtype=np.float64)
+
+    done = 0
+    while done < shoes:
+        size = min(batch, shoes - done)
+        values = rng.permuted(np.broadcast_to(shoe, (size, total)), axis=1)[:, : cut - 1]
+        running = np.zeros((size, cut), dtype=np.float64)
+        np.cumsum(values, axis=1, out=running[:, 1:])
+        true_counts = running / decks_remaining
+        _accumulate(
+            histogram,
+            depth_edges,
+            tc_edges,
+            np.broadcast_to(seen, (size, cut)).ravel(),
+            true_counts.ravel(),
+            np.full(size * cut, 1.0 / (shoes * cut)),
+        )
+        done += size
+    return TrueCountHistogram(
+        histogram, depth_edges, tc_edges, decks, penetration, system, "monte_carlo"
+    )
+
+
+def histogram_cache_key(
+    decks: int, penetration: float, card_values: Dict[str, float], system: str, method: str
+) -> str:
+    """快取鍵：牌副數、發牌深度、計數系統（名稱與牌值）與估計方式"""
+    payload = json.dumps(
+        {
+            "decks": decks,
+            "penetration": penetration,
+            "system": system,
+            "card_values": card_values,
+            "method": method,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def cached_histogram(
+    decks: int,
+    penetration: float,
+    card_values: Dict[str, float],
+    system: str = "Wong Halves",
+    method: str = "exact",
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> TrueCountHistogram:
+    """
+    取得真實計數直方圖，快取中沒有時計算並寫入
+
+    Args:
+        method: "exact" 或 "monte_carlo"
+    """
+    if method not in ("exact", "monte_carlo"):
+        raise ValueError(f"無效的估計方式：{method}")
+    directory = Path(cache_dir) if cache_dir is not None else default_cache_dir() / "histograms"
+    key = histogram_cache_key(decks, penetration, card_values, system, method)
+    path = directory / f"tc-{decks}d-{key}.npz"
+    if path.exists():
+        return TrueCountHistogram.load(path)
+
+    if method == "exact":
+        histogram = exact_histogram(decks, penetration, card_values, system)
+    else:
+        histogram = simulated_histogram(decks, penetration, card_values, system, seed=0)
+    histogram.save(path)
+    return histogram
+
+
+def depth_labels(histogram: TrueCountHistogram) -> List[str]:
+    """深度區間的顯示標籤（以剩餘牌副數表示）"""
+    total = histogram.decks * 52
+    return [
+        f"{(total - start) / 52:.2f}-{(total - end) / 52:.2f}"
+        for start, end in zip(histogram.depth_edges[:-1], histogram.depth_edges[1:])
+    ]
@@ -0,0 +1,413 @@
+"""
+手牌的欄式儲存（structure of arrays）
+
+大量手牌不建立一個個 Hand 物件，而是每個欄位一個 NumPy 陣列：
+
+    totals       uint8    點數（軟牌的 A 以 11 計）
+    soft         bool     是否為軟牌
+    hard_totals  uint8    A 以 1 計的點數
+    aces         uint8    A 的張數
+    card_counts  uint8    張數
+    split        bool     是否為分牌後的手牌
+    split_aces   bool     是否為分 A 的手牌
+    status       uint8    狀態代碼（見 STATUS_CODES）
+    bets         float64  下注倍數（加倍後為 2）
+    offsets      uint64   手牌在 card_buffer 中的起點
+    card_buffer  uint8    所有手牌的牌面代碼（見 shoe_history.CARD_CODES）
+
+新增、補牌、分牌、加倍、停牌與結算都以索引陣列批次處理。每手牌的牌張在 card_buffer 中連續存放；
+補牌時把整手牌搬到緩衝區尾端再接上新牌，因此每次操作的成本只與被處理的手牌張數成正比。
+舊的位置不再使用；緩衝區需要擴充而其中一半以上是這種空位時，會先以 compact 重新緊密排列，
+緩衝區大小因此維持在使用中牌張數的常數倍以內。GUI 等需要單一手牌時以 to_hand / from_hands
+與 Hand 互相轉換。
+"""
+
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.hand import Hand, HandStatus
+
+from .shoe_history import CARD_CODES, CODE_TO_CARD
+
+# 狀態代碼（HandStatus 的定義順序）
+STATUS_CODES = {status: code for code, status in enumerate(HandStatus)}
+CODE_TO_STATUS = list(HandStatus)
+
+_ACTIVE = STATUS_CODES[HandStatus.ACTIVE]
+_STANDING = STATUS_CODES[HandStatus.STANDING]
+_BUSTED = STATUS_CODES[HandStatus.BUSTED]
+_BLACKJACK = STATUS_CODES[HandStatus.BLACKJACK]
+_DOUBLED = STATUS_CODES[HandStatus.DOUBLED]
+
+# 牌面代碼 → 點數（A 以 1 計）
+_POINTS = np.zeros(len(CODE_TO_CARD), dtype=np.uint8)
+for _card, _code in CARD_CODES.items():
+    _POINTS[_code] = 1 if _card == "A" else int(_card) if _card.isdigit() else 10
+_ACE = CARD_CODES["A"]
+
+Indices = Union[Sequence[int], "npt.NDArray[np.integer[Any]]"]
+
+
+def _segments(
+    starts: "npt.NDArray[np.int64]", counts: "npt.NDArray[np.int64]"
+) -> "npt.NDArray[np.int64]":
+    """每段 [start, start + count) 的所有位置（依段落順序串接）"""
+    within = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions: "npt.NDArray[np.int64]" = np.repeat(starts, counts) + within
+    return positions
+
+
+class HandStore:
+    """以欄式陣列儲存大量手牌"""
+
+    # 每手牌一個元素的欄位（容量不足時一起加倍）
+    _COLUMNS = (
+        "_totals",
+        "_soft",
+        "_hard_totals",
+        "_aces",
+        "_card_counts",
+        "_split",
+        "_split_aces",
+        "_status",
+        "_bets",
+        "_offsets",
+    )
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Args:
+            capacity: 初始可容納的手牌數（不足時自動加倍）
+        """
+        capacity = max(capacity, 1)
+        self.size = 0
+        self._totals = np.zeros(capacity, dtype=np.uint8)
+        self._soft = np.zeros(capacity, dtype=np.bool_)
+        self._hard_totals = np.zeros(capacity, dtype=np.uint8)
+        self._aces = np.zeros(capacity, dtype=np.uint8)
+        self._card_counts = np.zeros(capacity, dtype=np.uint8)
+        self._split = np.zeros(capacity, dtype=np.bool_)
+        self._split_aces = np.zeros(capacity, dtype=np.bool_)
+        self._status = np.zeros(capacity, dtype=np.uint8)
+        self._bets = np.ones(capacity, dtype=np.float64)
+        self._offsets = np.zeros(capacity, dtype=np.uint64)
+        self._card_buffer = np.zeros(capacity * 3, dtype=np.uint8)
+        self._cards_used = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    # 各欄位（長度為手牌數的視圖）
+    @property
+    def totals(self) -> "npt.NDArray[np.uint8]":
+        return self._totals[: self.size]
+
+    @property
+    def soft(self) -> "npt.NDArray[np.bool_]":
+        return self._soft[: self.size]
+
+    @property
+    def hard_totals(self) -> "npt.NDArray[np.uint8]":
+        return self._hard_totals[: self.size]
+
+    @property
+    def aces(self) -> "npt.NDArray[np.uint8]":
+        return self._aces[: self.size]
+
+    @property
+    def card_counts(self) -> "npt.NDArray[np.uint8]":
+        return self._card_counts[: self.size]
+
+    @property
+    def split(self) -> "npt.NDArray[np.bool_]":
+        return self._split[: self.size]
+
+    @property
+    def split_aces(self) -> "npt.NDArray[np.bool_]":
+        return self._split_aces[: self.size]
+
+    @property
+    def status(self) -> "npt.NDArray[np.uint8]":
+        return self._status[: self.size]
+
+    @property
+    def bets(self) -> "npt.NDArray[np.float64]":
+        return self._bets[: self.size]
+
+    @property
+    def offsets(self) -> "npt.NDArray[np.uint64]":
+        return self._offsets[: self.size]
+
+    @property
+    def card_buffer(self) -> "npt.NDArray[np.uint8]":
+        return self._card_buffer[: self._cards_used]
+
+    def _reserve(self, hands: int, cards: int) -> None:
+        """確保還能再放入 hands 手牌與 cards 張牌"""
+        capacity = len(self._status)
+        if self.size + hands > capacity:
+            capacity = max(capacity * 2, self.size + hands)
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[: self.size] = column[: self.size]
+                setattr(self, name, grown)
+        if self._cards_used + cards > len(self._card_buffer):
+            # 先回收補牌搬移留下的空位，仍不夠時才擴充
+            if 2 * int(self._card_counts[: self.size].sum()) <= self._cards_used:
+                self.compact()
+        if self._cards_used + cards > len(self._card_buffer):
+            grown = np.zeros(
+                max(len(self._card_buffer) * 2, self._cards_used + cards), dtype=np.uint8
+            )
+            grown[: self._cards_used] = self._card_buffer[: self._cards_used]
+            self._card_buffer = grown
+
+    def compact(self) -> None:
+        """
+        依手牌順序重新緊密排列 card_buffer，回收補牌搬移留下的空位
+
+        緩衝區需要擴充時會自動呼叫；之前由 cards 取得的視圖不會隨之更新。
+        """
+        counts = self._card_counts[: self.size].astype(np.int64)
+        live = int(counts.sum())
+        buffer = np.zeros(max(live, 1), dtype=np.uint8)
+        buffer[:live] = self._card_buffer[
+            _segments(self._offsets[: self.size].astype(np.int64), counts)
+        ]
+        self._offsets[: self.size] = np.cumsum(counts) - counts
+        self._card_buffer = buffer
+        self._cards_used = live
+
+    def _refresh(self, rows: "npt.NDArray[np.int64]") -> None:
+        """依 A 以 1 計的點數與 A 張數更新點數與軟牌旗標"""
+        hard = self._hard_totals[rows]
+        soft = (self._aces[rows] > 0) & (hard <= 11)
+        self._soft[rows] = soft
+        self._totals[rows] = hard + 10 * soft
+
+    def _indices(self, indices: Indices) -> "npt.NDArray[np.int64]":
+        rows = np.asarray(indices, dtype=np.int64)
+        if rows.size and (rows.min() < 0 or rows.max() >= self.size):
+            raise IndexError(f"手牌索引超出範圍：0 ~ {self.size - 1}")
+        return rows
+
+    def append_codes(
+        self, codes: "npt.NDArray[np.uint8]", lengths: "npt.NDArray[np.integer[Any]]"
+    ) -> "npt.NDArray[np.int64]":
+        """
+        批次新增手牌
+
+        Args:
+            codes: 所有新手牌的牌面代碼（依手牌順序串接）
+            lengths: 各手牌的張數
+
+        Returns:
+            新手牌的索引
+
+        Raises:
+            ValueError: 張數總和與牌數不符或含無效的牌面代碼
+        """
+        codes = np.asarray(codes, dtype=np.uint8)
+        counts = np.asarray(lengths, dtype=np.int64)
+        if int(counts.sum()) != len(codes) or (counts < 0).any():
+            raise ValueError(f"張數總和與牌數不符：{int(counts.sum())} != {len(codes)}")
+        if codes.size and (codes.min() < 1 or codes.max() >= len(CODE_TO_CARD)):
+            raise ValueError("含無效的牌面代碼")
+        self._reserve(len(counts), len(codes))
+        rows = np.arange(self.size, self.size + len(counts))
+        starts = self._cards_used + np.cumsum(counts) - counts
+        self._card_buffer[self._cards_used : self._cards_used + len(codes)] = codes
+        self._cards_used += len(codes)
+        self.size += len(counts)
+
+        # 每手牌的點數與 A 張數以 reduceat 分段加總（空手牌另外設為 0）
+        nonempty = counts > 0
+        points = _POINTS[codes].astype(np.int64)
+        boundaries = (np.cumsum(counts) - counts)[nonempty]
+        hard = np.zeros(len(counts), dtype=np.int64)
+        aces = np.zeros(len(counts), dtype=np.int64)
+        if codes.size:
+            hard[nonempty] = np.add.reduceat(points, boundaries)
+            aces[nonempty] = np.add.reduceat((codes == _ACE).astype(np.int64), boundaries)
+        self._hard_totals[rows] = hard
+        self._aces[rows] = aces
+        self._card_counts[rows] = counts
+        self._offsets[rows] = starts
+        self._split[rows] = False
+        self._split_aces[rows] = False
+        self._bets[rows] = 1.0
+        self._refresh(rows)
+        blackjack = (counts == 2) & (self._totals[rows] == 21)
+        self._status[rows] = np.where(blackjack, _BLACKJACK, _ACTIVE)
+        return rows
+
+    def append(self, hands: Sequence[Sequence[str]]) -> "npt.NDArray[np.int64]":
+        """
+        批次新增以牌面字串表示的手牌
+
+        Raises:
+            ValueError: 無效的牌面
+        """
+        try:
+            codes = np.array([CARD_CODES[card] for cards in hands for card in cards], np.uint8)
+        except KeyError as e:
+            raise ValueError(f"無效的牌面：{e.args[0]}") from None
+        return self.append_codes(codes, np.array([len(cards) for cards in hands]))
+
+    def deal(self, indices: Indices, codes: "npt.NDArray[np.uint8]") -> None:
+        """
+        批次補牌：每個索引的手牌各補一張（索引不可重複）
+
+        點數超過 21 的手牌狀態改為爆牌。
+
+        Raises:
+            ValueError: 索引重複、牌數與索引數不符或含無效的牌面代碼
+        """
+        rows = self._indices(indices)
+        codes = np.asarray(codes, dtype=np.uint8)
+        if len(codes) != len(rows) or len(np.unique(rows)) != len(rows):
+            raise ValueError("補牌的索引不可重複，且每個索引需要一張牌")
+        if codes.size and (codes.min() < 1 or codes.max() >= len(CODE_TO_CARD)):
+            raise ValueError("含無效的牌面代碼")
+        counts = self._card_counts[rows].astype(np.int64)
+        # 先保留空間（可能重新排列緩衝區並改變 offsets），再計算新位置
+        self._reserve(0, int(counts.sum()) + len(rows))
+        new_starts = self._cards_used + np.cumsum(counts + 1) - (counts + 1)
+        # 把整手牌搬到緩衝區尾端，再接上新牌
+        buffer = self._card_buffer
+        old = _segments(self._offsets[rows].astype(np.int64), counts)
+        buffer[_segments(new_starts, counts)] = buffer[old]
+        buffer[new_starts + counts] = codes
+        self._cards_used += int(counts.sum()) + len(rows)
+
+        self._offsets[rows] = new_starts
+        self._card_counts[rows] = counts + 1
+        self._hard_totals[rows] += _POINTS[codes]
+        self._aces[rows] += (codes == _ACE).astype(np.uint8)
+        self._refresh(rows)
+        # 與 Hand.add_card 相同：非分牌手補到兩張 21 點為黑傑克
+        blackjack = (
+            (counts == 1)
+            & (self._totals[rows] == 21)
+            & ~self._split[rows]
+            & (self._status[rows] == _ACTIVE)
+        )
+        self._status[rows[blackjack]] = _BLACKJACK
+        self._status[rows[self._hard_totals[rows] > 21]] = _BUSTED
+
+    def split_hands(self, indices: Indices) -> "npt.NDArray[np.int64]":
+        """
+        批次分牌：原手牌保留第一張，第二張成為接在尾端的新手牌（索引不可重複）
+
+        只能分仍在活動中的手牌（已加倍、停牌或結束的手牌不能再分），兩手牌都標記為分牌手
+        （分 A 時另外標記）並繼承下注倍數；之後各自以 deal 補第二張牌。
+
+        Returns:
+            新手牌的索引（與 indices 順序相同）
+
+        Raises:
+            ValueError: 索引重複、不是兩張相同牌面的手牌，或手牌不在活動中
+        """
+        rows = self._indices(indices)
+        if len(np.unique(rows)) != len(rows):
+            raise ValueError("分牌的索引不可重複")
+        if (self._status[rows] != _ACTIVE).any():
+            raise ValueError("只能分仍在活動中的手牌")
+        offsets = self._offsets[rows].astype(np.int64)
+        first = self._card_buffer[offsets]
+        second = self._card_buffer[offsets + 1]
+        if (self._card_counts[rows] != 2).any() or (first != second).any():
+            raise ValueError("只能分兩張相同牌面的手牌")
+        bets = self._bets[rows].copy()
+        new_rows = self.append_codes(second, np.ones(len(rows), dtype=np.int64))
+        is_ace = first == _ACE
+        self._card_counts[rows] = 1
+        self._hard_totals[rows] = _POINTS[first]
+        self._aces[rows] = is_ace
+        self._refresh(rows)
+        for group in (rows, new_rows):
+            self._split[group] = True
+            self._split_aces[group] = is_ace
+            self._bets[group] = bets
+        return new_rows
+
+    def double_down(self, indices: Indices) -> None:
+        """批次加倍：只有兩張牌且仍在活動中的手牌會加倍"""
+        rows = self._indices(indices)
+        rows = rows[(self._card_counts[rows] == 2) & (self._status[rows] == _ACTIVE)]
+        self._bets[rows] = 2.0
+        self._status[rows] = _DOUBLED
+
+    def stand(self, indices: Indices) -> None:
+        """批次停牌：只有仍在活動中的手牌會停牌"""
+        rows = self._indices(indices)
+        self._status[rows[self._status[rows] == _ACTIVE]] = _STANDING
+
+    def settle(
+        self,
+        dealer_totals: "npt.ArrayLike",
+        dealer_blackjack: "npt.ArrayLike" = False,
+        blackjack_payout: float = 1.5,
+        indices: Optional[Indices] = None,
+    ) -> "npt.NDArray[np.float64]":
+        """
+        批次結算
+
+        Args:
+            dealer_totals: 莊家點數（每手一個，或所有手牌共用一個）
+            dealer_blackjack: 莊家是否為黑傑克（同上）
+            blackjack_payout: 黑傑克賠率
+            indices: 要結算的手牌；省略時為全部
+
+        Returns:
+            每手牌的輸贏（以一單位原注計）
+        """
+        rows = self._indices(indices) if indices is not None else np.arange(self.size)
+        totals = self._totals[rows].astype(np.int64)
+        bets = self._bets[rows]
+        dealer = np.broadcast_to(np.asarray(dealer_totals, dtype=np.int64), rows.shape)
+        dealer_bj = np.broadcast_to(np.asarray(dealer_blackjack, dtype=bool), rows.shape)
+        player_bj = self._status[rows] == _BLACKJACK
+
+        outcome = np.sign(totals - dealer).astype(np.float64)
+        outcome[dealer > 21] = 1.0
+        outcome[totals > 21] = -1.0
+        net: "npt.NDArray[np.float64]" = outcome * bets
+        # 莊家黑傑克時只輸原注（先看底牌），玩家黑傑克另計
+        net[dealer_bj] = -1.0
+        net[player_bj] = np.where(dealer_bj[player_bj], 0.0, blackjack_payout * bets[player_bj])
+        return net
+
+    def cards(self, index: int) -> "npt.NDArray[np.uint8]":
+        """單一手牌的牌面代碼（card_buffer 的視圖）"""
+        start = int(self._offsets[index])
+        return self._card_buffer[start : start + int(self._card_counts[index])]
+
+    def to_hand(self, index: int) -> Hand:
+        """轉換為單一 Hand 物件"""
+        if not 0 <= index < self.size:
+            raise IndexError(f"手牌索引超出範圍：{index}")
+        hand = Hand([CODE_TO_CARD[code] for code in self.cards(index).tolist()])
+        hand.status = CODE_TO_STATUS[int(self._status[index])]
+        hand.bet_multiplier = float(self._bets[index])
+        hand.is_split_hand = bool(self._split[index])
+        hand.split_aces = bool(self._split_aces[index])
+        return hand
+
+    def to_hands(self) -> List[Hand]:
+        """轉換為 Hand 物件列表"""
+        return [self.to_hand(index) for index in range(self.size)]
+
+    @classmethod
+    def from_hands(cls, hands: Sequence[Hand]) -> "HandStore":
+        """由 Hand 物件建立（保留狀態、下注倍數與分牌旗標）"""
+        store = cls(len(hands))
+        rows = store.append([hand.cards for hand in hands])
+        store._status[rows] = [STATUS_CODES[hand.status] for hand in hands]
+        store._bets[rows] = [hand.bet_multiplier for hand in hands]
+        store._split[rows] = [hand.is_split_hand for hand in hands]
+        store._split_aces[rows] = [hand.split_aces for hand in hands]
+        return store
@@ -0,0 +1,448 @@
+"""
+牌靴重播稽核管線
+
+讀取已記錄的牌局（JSON-lines 日誌、CSV 或牌靴歷史二進位檔），依序將每張牌
+送入 WongHalvesCounter、重建 GameState 手牌，並在每個記錄的玩家動作處呼叫
+BasicStrategy.get_decision，標記實際動作與建議動作不一致的地方。
+
+所有來源都以產生器逐筆處理，記憶體用量只與單一牌靴大小有關；
+也可依牌靴分派到多個行程平行稽核；recommend_history 則批次算出牌靴歷史檔中
+每個記錄動作當時的建議動作代碼。
+"""
+
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.basic_strategy import BasicStrategy
+from src.core.card_counter import WongHalvesCounter
+from src.core.game_state import GameState
+from src.core.hand import HandStatus
+
+from .shoe_history import (
+    ACTION_CODES,
+    CODE_TO_ACTION,
+    CODE_TO_CARD,
+    ROLE_DEALER,
+    ROLE_OTHER,
+    ROLE_PLAYER,
+    ShoeHistoryReader,
+)
+
+# 事件種類
+EVENT_CARD = "card"
+EVENT_ACTION = "action"
+EVENT_ROUND = "round"
+EVENT_SHOE = "shoe"
+
+ROLE_NAMES: Dict[str, int] = {
+    "player": ROLE_PLAYER,
+    "dealer": ROLE_DEALER,
+    "other": ROLE_OTHER,
+}
+
+
+class ReplayEvent(NamedTuple):
+    """單一重播事件"""
+
+    kind: str
+    value: str = ""
+    role: int = ROLE_PLAYER
+
+
+class Divergence(NamedTuple):
+    """實際動作與建議動作不一致的紀錄"""
+
+    shoe: int
+    round: int
+    player_cards: Tuple[str, ...]
+    dealer_card: str
+    true_count: float
+    logged_action: str
+    recommended_action: str
+
+
+class ReplayStats:
+    """重播統計與處理速率"""
+
+    def __init__(self) -> None:
+        self.events: int = 0
+        self.decisions: int = 0
+        self.divergences: int = 0
+        self.shoes: int = 0
+        self.elapsed: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.elapsed if self.elapsed > 0 else 0.0
+
+    def merge(self, other: "ReplayStats") -> None:
+        """合併另一份統計（不含耗時）"""
+        self.events += other.events
+        self.decisions += other.decisions
+        self.divergences += other.divergences
+        self.shoes += other.shoes
+
+    def __repr__(self) -> str:
+        return (
+            f"ReplayStats(events={self.events}, decisions={self.decisions}, "
+            f"divergences={self.divergences}, shoes={self.shoes}, "
+            f"events_per_second={self.events_per_second:.0f})"
+        )
+
+
+def iter_journal_events(path: Union[str, Path]) -> Iterator[ReplayEvent]:
+    """
+    讀取 JSON-lines 日誌
+
+    每行一個物件，例如：
+        {"event": "shoe"}
+        {"event": "round"}
+        {"event": "card", "role": "player", "card": "10"}
+        {"event": "action", "action": "S"}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"日誌第 {line_number} 行格式錯誤：{e}") from e
+            yield _event_from_record(record, line_number)
+
+
+def _event_from_record(record: Dict[str, Any], line_number: int) -> ReplayEvent:
+    kind = record.get("event")
+    if kind == EVENT_CARD:
+        role = ROLE_NAMES.get(record.get("role", "player"))
+        if role is None:
+            raise ValueError(f"日誌第 {line_number} 行的牌張歸屬無效：{record.get('role')}")
+        return ReplayEvent(EVENT_CARD, str(record.get("card", "")), role)
+    if kind == EVENT_ACTION:
+        return ReplayEvent(EVENT_ACTION, str(record.get("action", "")))
+    if kind in (EVENT_ROUND, EVENT_SHOE):
+        return ReplayEvent(kind)
+    raise ValueError(f"日誌第 {line_number} 行的事件種類無效：{kind}")
+
+
+def iter_csv_events(path: Union[str, Path]) -> Iterator[ReplayEvent]:
+    """
+    讀取 CSV 紀錄
+
+    欄位：shoe, round, role, card, action（每列只填 card 或 action 其中之一）。
+    shoe 或 round 欄位改變時自動產生新牌靴 / 新一輪事件。
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        current_shoe: Optional[str] = None
+        current_round: Optional[str] = None
+        for row in reader:
+            shoe, round_id = row.get("shoe", ""), row.get("round", "")
+            if shoe != current_shoe:
+                current_shoe, current_round = shoe, None
+                yield ReplayEvent(EVENT_SHOE)
+            if round_id != current_round:
+                current_round = round_id
+                yield ReplayEvent(EVENT_ROUND)
+
+            card = (row.get("card") or "").strip()
+            action = (row.get("action") or "").strip()
+            if card:
+                role = ROLE_NAMES.get((row.get("role") or "player").strip())
+                if role is None:
+                    raise ValueError(f"CSV 第 {reader.line_num} 行的牌張歸屬無效")
+                yield ReplayEvent(EVENT_CARD, card, role)
+            elif action:
+                yield ReplayEvent(EVENT_ACTION, action)
+
+
+def iter_history_events(
+    reader: ShoeHistoryReader, start: int = 0, stop: Optional[int] = None
+) -> Iterator[ReplayEvent]:
+    """將牌靴歷史二進位檔轉為事件串流"""
+    stop = len(reader) if stop is None else min(stop, len(reader))
+    for shoe_index in range(start, stop):
+        yield ReplayEvent(EVENT_SHOE)
+        for record in reader.iter_rounds(shoe_index):
+            yield ReplayEvent(EVENT_ROUND)
+            cards = record.cards.tolist()
+            roles = record.roles.tolist()
+            actions = record.actions.tolist()
+            positions = record.action_positions.tolist()
+            next_action = 0
+            for position in range(len(cards) + 1):
+                while next_action < len(actions) and positions[next_action] == position:
+                    yield ReplayEvent(EVENT_ACTION, CODE_TO_ACTION[actions[next_action]])
+                    next_action += 1
+                if position < len(cards):
+                    yield ReplayEvent(EVENT_CARD, CODE_TO_CARD[cards[position]], roles[position])
+
+
+def split_shoes(events: Iterable[ReplayEvent]) -> Iterator[List[ReplayEvent]]:
+    """將事件串流依牌靴切成批次（一次只保留一個牌靴）"""
+    batch: List[ReplayEvent] = []
+    for event in events:
+        if event.kind == EVENT_SHOE and batch:
+            yield batch
+            batch = []
+        batch.append(event)
+    if batch:
+        yield batch
+
+
+class ReplayAuditor:
+    """逐事件重建牌局並比對建議動作"""
+
+    def __init__(
+        self,
+        strategy: Optional[BasicStrategy] = None,
+        counter: Optional[WongHalvesCounter] = None,
+    ) -> None:
+        self.strategy = strategy if strategy is not None else BasicStrategy()
+        self.counter = counter if counter is not None else WongHalvesCounter()
+        self.game_state = GameState()
+        self.stats = ReplayStats()
+        self.shoe_index = -1
+        self.round_index = -1
+        # 設定為串列時，每個動作事件附加一個建議的 ACTION_CODES 代碼（沒有建議時為 0）
+        self.recommendations: Optional[List[int]] = None
+
+        # 動作代碼 → get_decision 回傳的動作文字
+        self._action_names: Dict[str, str] = {
+            code: info.get("action", "") for code, info in self.strategy.action_codes.items()
+        }
+        # 動作文字 → ACTION_CODES 代碼
+        self._recommended_codes: Dict[str, int] = {
+            self._action_names[code]: value
+            for code, value in ACTION_CODES.items()
+            if self._action_names.get(code)
+        }
+
+    def process(self, events: Iterable[ReplayEvent]) -> Iterator[Divergence]:
+        """處理事件串流，產生所有不一致的紀錄"""
+        start = time.perf_counter()
+        try:
+            for event in events:
+                self.stats.events += 1
+                divergence = self.handle(event)
+                if divergence is not None:
+                    yield divergence
+        finally:
+            self.stats.elapsed += time.perf_counter() - start
+
+    def handle(self, event: ReplayEvent) -> Optional[Divergence]:
+        """處理單一事件"""
+        if event.kind == EVENT_CARD:
+            self.counter.add_card(event.value)
+            if event.role == ROLE_PLAYER:
+                self._add_player_card(event.value)
+            elif event.role == ROLE_DEALER:
+                self.game_state.add_dealer_card(event.value)
+            return None
+
+        if event.kind == EVENT_ACTION:
+            return self._handle_action(event.value)
+
+        if event.kind == EVENT_ROUND:
+            self.round_index += 1
+            self.game_state.clear_hand()
+        elif event.kind == EVENT_SHOE:
+            self.shoe_index += 1
+            self.round_index = -1
+            self.stats.shoes += 1
+            self.counter.new_shoe()
+            self.game_state.clear_hand()
+        return None
+
+    def _add_player_card(self, card: str) -> None:
+        """加牌到目前手牌；超過 21 點時標記爆牌並切換到下一個分牌手"""
+        game_state = self.game_state
+        hand = game_state.current_hand
+        game_state.add_player_card(card)
+        if hand.status in (HandStatus.ACTIVE, HandStatus.DOUBLED):
+            value, _ = hand.calculate_value()
+            if value > 21:
+                # 加倍的手牌在加牌時已經切換，不再重複切換
+                was_active = hand.status == HandStatus.ACTIVE
+                hand.status = HandStatus.BUSTED
+                if was_active:
+                    game_state.move_to_next_active_hand()
+
+    def _handle_action(self, code: str) -> Optional[Divergence]:
+        game_state = self.game_state
+        dealer_card = game_state.get_dealer_upcard()
+        true_count = self.counter.get_playing_true_count()
+        divergence: Optional[Divergence] = None
+
+        if code == "I":
+            # 保險只在建議不買時才算偏離
+            self.stats.decisions += 1
+            take = self.strategy.should_take_insurance(true_count)
+            if dealer_card is not None and not take:
+                divergence = self._divergence(dealer_card, true_count, "I", "不買保險")
+            if self.recommendations is not None:
+                self.recommendations.append(ACTION_CODES["I"] if take else 0)
+            return divergence
+
+        hand = game_state.current_hand
+        recommended = ""
+        if dealer_card is not None and hand.cards:
+            self.stats.decisions += 1
+            recommended, _ = self.strategy.get_decision(hand.cards, dealer_card, true_count)
+            logged = self._action_names.get(code, code)
+            # 基本策略回傳空字串代表不分牌（沿用停牌 / 要牌表格），不與紀錄比對
+            if recommended and logged != recommended:
+                divergence = self._divergence(dealer_card, true_count, logged, recommended)
+        if self.recommendations is not None:
+            self.recommendations.append(self._recommended_codes.get(recommended, 0))
+
+        if code == "S":
+            game_state.stand_current_hand()
+        elif code == "Y":
+            game_state.split_current_hand()
+        elif code == "D":
+            game_state.double_down_current_hand()
+        elif code == "R":
+            hand.stand()
+            game_state.move_to_next_active_hand()
+        return divergence
+
+    def _divergence(
+        self, dealer_card: str, true_count: float, logged: str, recommended: str
+    ) -> Divergence:
+        self.stats.divergences += 1
+        return Divergence(
+            self.shoe_index,
+            self.round_index,
+            tuple(self.game_state.current_hand.cards),
+            dealer_card,
+            true_count,
+            logged,
+            recommended,
+        )
+
+
+def recommend_history(
+    reader: ShoeHistoryReader,
+    strategy: Optional[BasicStrategy] = None,
+    counter: Optional[WongHalvesCounter] = None,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> "npt.NDArray[np.uint8]":
+    """
+    批次決策：重播牌靴 [start, stop)，算出每個記錄動作當時的建議動作
+
+    Returns:
+        ACTION_CODES 代碼陣列，與 reader.actions 中這些牌靴的動作逐一對應
+        （起點為 reader.action_offsets[reader.shoe_offsets[start]]）；
+        沒有建議（例如不買保險、沒有莊家明牌）時為 0
+    """
+    auditor = ReplayAuditor(strategy, counter)
+    recommendations: List[int] = []
+    auditor.recommendations = recommendations
+    for _ in auditor.process(iter_history_events(reader, start, stop)):
+        pass
+    return np.array(recommendations, dtype=np.uint8)
+
+
+# 平行稽核：每個工作行程只建立一次策略與計數器
+_worker_auditor: Optional[ReplayAuditor] = None
+
+
+def _init_worker(strategy_kwargs: Dict[str, Any], counter_kwargs: Dict[str, Any]) -> None:
+    global _worker_auditor
+    _worker_auditor = ReplayAuditor(
+        BasicStrategy(**strategy_kwargs), WongHalvesCounter(**counter_kwargs)
+    )
+
+
+def _audit_batch(
+    job: Tuple[int, List[ReplayEvent]],
+) -> Tuple[int, List[Divergence], ReplayStats]:
+    shoe_offset, events = job
+    auditor = _worker_auditor
+    if auditor is None:
+        raise RuntimeError("工作行程尚未初始化")
+    auditor.stats = ReplayStats()
+    auditor.shoe_index = shoe_offset - 1
+    divergences = list(auditor.process(events))
+    return shoe_offset, divergences, auditor.stats
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _bounded_map(
+    executor: ProcessPoolExecutor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_pending: int,
+) -> Iterator[R]:
+    """依序提交工作，同時在途的工作數量不超過 max_pending"""
+    pending: Deque["Future[R]"] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def audit_parallel(
+    events: Iterable[ReplayEvent],
+    processes: int = 2,
+    strategy_kwargs: Optional[Dict[str, Any]] = None,
+    counter_kwargs: Optional[Dict[str, Any]] = None,
+    stats: Optional[ReplayStats] = None,
+) -> Iterator[Divergence]:
+    """
+    依牌靴將事件串流分派到多個行程稽核
+
+    結果依牌靴順序產生；在途的牌靴數量以行程數的兩倍為上限，記憶體用量有界。
+
+    Args:
+        events: 事件串流（必須以牌靴事件開頭）
+        processes: 工作行程數
+        strategy_kwargs: 傳給 BasicStrategy 的參數
+        counter_kwargs: 傳給 WongHalvesCounter 的參數
+        stats: 用於累計統計的物件
+    """
+    stats = stats if stats is not None else ReplayStats()
+    start = time.perf_counter()
+    jobs = ((index, batch) for index, batch in enumerate(split_shoes(events)))
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(strategy_kwargs or {}, counter_kwargs or {}),
+        ) as executor:
+            for _, divergences, batch_stats in _bounded_map(
+                executor, _audit_batch, jobs, processes * 2
+            ):
+                stats.merge(batch_stats)
+                yield from divergences
+    finally:
+        stats.elapsed += time.perf_counter() - start
@@ -0,0 +1,448 @@
+"""
+SQLite 牌局紀錄儲存
+
+以 SQLite 保存牌局（sessions）、牌靴（shoes）、每一輪（rounds）、手牌（hands）
+與決策（decisions），並提供常用的分析查詢。
+
+寫入由背景執行緒負責：呼叫端只把資料放入佇列，背景執行緒以交易批次寫入，
+資料庫使用 WAL 模式，因此 GUI 執行緒記錄資料時不會被磁碟 I/O 阻塞，
+查詢也不會與寫入互相鎖住。
+
+編號一律由資料庫產生（AUTOINCREMENT），多個 SessionStore 或多個行程寫入同一個
+資料庫也不會衝突。牌局與牌靴很少建立，直接同步寫入以取得編號；每一輪則在背景執行緒
+寫入，手牌與決策以該輪的 lastrowid 關聯。
+
+批次交易失敗時會回復整批，再逐輪重試；仍然失敗的輪次保留在 failed_rounds，
+所有錯誤在下一次 flush()、close() 或寫入時一併回報。程式結束時會自動寫入剩餘資料。
+"""
+
+import atexit
+import math
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.core.hand import Hand
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    num_decks INTEGER NOT NULL,
+    note TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS shoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shoe_id INTEGER NOT NULL REFERENCES shoes(id),
+    played_at TEXT NOT NULL,
+    true_count REAL NOT NULL,
+    tc_bucket INTEGER NOT NULL,
+    dealer_cards TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hands (
+    id INTEGER PRIMARY KEY,
+    round_id INTEGER NOT NULL REFERENCES rounds(id),
+    hand_no INTEGER NOT NULL,
+    cards TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    is_soft INTEGER NOT NULL,
+    is_split INTEGER NOT NULL,
+    bet_multiplier REAL NOT NULL,
+    result REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    round_id INTEGER NOT NULL REFERENCES rounds(id),
+    hand_no INTEGER NOT NULL,
+    player_total INTEGER NOT NULL,
+    is_soft INTEGER NOT NULL,
+    dealer_card TEXT NOT NULL,
+    true_count REAL NOT NULL,
+    tc_bucket INTEGER NOT NULL,
+    recommended TEXT NOT NULL,
+    taken TEXT NOT NULL,
+    is_deviation INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
+CREATE INDEX IF NOT EXISTS idx_shoes_session ON shoes(session_id);
+CREATE INDEX IF NOT EXISTS idx_rounds_shoe ON rounds(shoe_id);
+CREATE INDEX IF NOT EXISTS idx_rounds_played ON rounds(played_at);
+CREATE INDEX IF NOT EXISTS idx_rounds_bucket ON rounds(tc_bucket);
+CREATE INDEX IF NOT EXISTS idx_hands_round ON hands(round_id);
+CREATE INDEX IF NOT EXISTS idx_decisions_round ON decisions(round_id);
+CREATE INDEX IF NOT EXISTS idx_decisions_bucket ON decisions(tc_bucket);
+CREATE INDEX IF NOT EXISTS idx_decisions_hand ON decisions(player_total, is_soft, dealer_card);
+"""
+
+_INSERT_SESSION = "INSERT INTO sessions (started_at, num_decks, note) VALUES (?, ?, ?)"
+_INSERT_SHOE = "INSERT INTO shoes (session_id, started_at) VALUES (?, ?)"
+_INSERT_ROUND = (
+    "INSERT INTO rounds (shoe_id, played_at, true_count, tc_bucket, dealer_cards) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_INSERT_HAND = (
+    "INSERT INTO hands (round_id, hand_no, cards, total, is_soft, is_split, bet_multiplier, "
+    "result) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_DECISION = (
+    "INSERT INTO decisions (round_id, hand_no, player_total, is_soft, dealer_card, true_count, "
+    "tc_bucket, recommended, taken, is_deviation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# 每批交易最多寫入的輪數
+_BATCH_SIZE = 512
+
+
+class HandRecord(NamedTuple):
+    """單一手牌的結果"""
+
+    cards: Sequence[str]
+    total: int
+    is_soft: bool
+    result: float  # 以基本下注單位計的輸贏
+    is_split: bool = False
+    bet_multiplier: float = 1.0
+
+
+class DecisionRecord(NamedTuple):
+    """單一決策"""
+
+    hand_no: int
+    player_total: int
+    is_soft: bool
+    dealer_card: str
+    recommended: str
+    taken: str
+    is_deviation: bool = False  # 建議動作是否來自計數偏移
+
+
+class TrueCountWinRate(NamedTuple):
+    """某個真實計數區間的勝率"""
+
+    tc_bucket: int
+    hands: int
+    wins: int
+    losses: int
+    pushes: int
+    win_rate: float
+    average_result: float
+
+
+class DeviationFrequency(NamedTuple):
+    """某個手牌 / 莊家牌組合的偏移頻率"""
+
+    player_total: int
+    is_soft: bool
+    dealer_card: str
+    decisions: int
+    deviations: int
+    frequency: float
+
+
+def hand_record(hand: Hand, result: float) -> HandRecord:
+    """由 Hand 物件建立手牌紀錄"""
+    total, is_soft = hand.calculate_value()
+    return HandRecord(
+        list(hand.cards), total, is_soft, result, hand.is_split_hand, hand.bet_multiplier
+    )
+
+
+def true_count_bucket(true_count: float) -> int:
+    """真實計數區間（無條件捨去至整數）"""
+    return int(math.floor(true_count))
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class PendingRound(NamedTuple):
+    """等待寫入的一輪（手牌與決策的列不含 round_id，寫入時由 lastrowid 補上）"""
+
+    round: Tuple[Any, ...]
+    hands: List[Tuple[Any, ...]]
+    decisions: List[Tuple[Any, ...]]
+
+
+class SessionStore:
+    """以 SQLite 保存牌局紀錄，寫入在背景執行緒進行"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+
+        # 建立資料表並開啟 WAL 模式
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        conn.close()
+
+        self._queue: "queue.Queue[Optional[Union[PendingRound, threading.Event]]]" = queue.Queue()
+        # 背景執行緒記錄的錯誤與重試後仍失敗的輪次（以鎖保護）
+        self._lock = threading.Lock()
+        self._errors: List[sqlite3.Error] = []
+        self._failed: List[PendingRound] = []
+        # 背景執行緒設為 daemon，避免忘記 close() 時程式無法結束；
+        # 改在程式結束時（atexit）寫入剩餘資料
+        self._writer = threading.Thread(target=self._run_writer, name="SessionStoreWriter")
+        self._writer.daemon = True
+        self._writer.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    # ---- 寫入（非阻塞） ----
+
+    def start_session(self, num_decks: int = 8, note: str = "") -> int:
+        """開始新的牌局，回傳資料庫產生的牌局編號（同步寫入）"""
+        return self._insert(_INSERT_SESSION, (_now(), num_decks, note))
+
+    def start_shoe(self, session_id: int) -> int:
+        """開始新牌靴，回傳資料庫產生的牌靴編號（同步寫入）"""
+        return self._insert(_INSERT_SHOE, (session_id, _now()))
+
+    def record_round(
+        self,
+        shoe_id: int,
+        true_count: float,
+        dealer_cards: Sequence[str],
+        hands: Sequence[HandRecord],
+        decisions: Sequence[DecisionRecord] = (),
+    ) -> None:
+        """
+        記錄一輪牌局（放入佇列，由背景執行緒寫入）
+
+        Args:
+            shoe_id: 牌靴編號
+            true_count: 本輪開始時的真實計數
+            dealer_cards: 莊家所有牌
+            hands: 玩家各手牌的結果
+            decisions: 本輪的決策紀錄
+        """
+        bucket = true_count_bucket(true_count)
+        self._put(
+            PendingRound(
+                (shoe_id, _now(), true_count, bucket, ",".join(dealer_cards)),
+                [
+                    (
+                        hand_no,
+                        ",".join(hand.cards),
+                        hand.total,
+                        int(hand.is_soft),
+                        int(hand.is_split),
+                        hand.bet_multiplier,
+                        hand.result,
+                    )
+                    for hand_no, hand in enumerate(hands)
+                ],
+                [
+                    (
+                        decision.hand_no,
+                        decision.player_total,
+                        int(decision.is_soft),
+                        decision.dealer_card,
+                        true_count,
+                        bucket,
+                        decision.recommended,
+                        decision.taken,
+                        int(decision.is_deviation),
+                    )
+                    for decision in decisions
+                ],
+            )
+        )
+
+    @property
+    def failed_rounds(self) -> List[PendingRound]:
+        """重試後仍寫入失敗的輪次"""
+        with self._lock:
+            return list(self._failed)
+
+    def retry_failed(self) -> None:
+        """把寫入失敗的輪次重新放入佇列"""
+        with self._lock:
+            failed, self._failed = self._failed, []
+        for pending in failed:
+            self._put(pending)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        等待佇列中的資料全部寫入
+
+        Raises:
+            TimeoutError: 超過 timeout 秒仍未寫完
+            RuntimeError: 背景寫入發生錯誤（包含所有尚未回報的錯誤）
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            raise TimeoutError("等待紀錄資料庫寫入逾時")
+        self._raise_pending_error()
+
+    def close(self) -> None:
+        """寫入剩餘資料並停止背景執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(None)
+        self._writer.join()
+        self._raise_pending_error()
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _insert(self, sql: str, row: Tuple[Any, ...]) -> int:
+        if self._closed:
+            raise ValueError("紀錄資料庫已關閉")
+        self._raise_pending_error()
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                cursor = conn.execute(sql, row)
+        finally:
+            conn.close()
+        return int(cursor.lastrowid or 0)
+
+    def _put(self, pending: PendingRound) -> None:
+        if self._closed:
+            raise ValueError("紀錄資料庫已關閉")
+        self._raise_pending_error()
+        self._queue.put(pending)
+
+    def _raise_pending_error(self) -> None:
+        with self._lock:
+            errors, self._errors = self._errors, []
+            failed = len(self._failed)
+        if errors:
+            messages = "；".join(str(error) for error in errors)
+            raise RuntimeError(
+                f"寫入紀錄資料庫失敗（{len(errors)} 個錯誤，{failed} 輪待重試）：{messages}"
+            ) from errors[0]
+
+    def _run_writer(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            running = True
+            while running:
+                item = self._queue.get()
+                batch: List[PendingRound] = []
+                waiters: List[threading.Event] = []
+                while True:
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if not running or len(batch) >= _BATCH_SIZE:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    try:
+                        with conn:
+                            for pending in batch:
+                                _write_round(conn, pending)
+                    except sqlite3.Error:
+                        # 整批已回復；逐輪重試，只保留真正失敗的輪次
+                        for pending in batch:
+                            try:
+                                with conn:
+                                    _write_round(conn, pending)
+                            except sqlite3.Error as e:
+                                with self._lock:
+                                    self._errors.append(e)
+                                    self._failed.append(pending)
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+
+    # ---- 查詢 ----
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> Iterator[Tuple[Any, ...]]:
+        conn = sqlite3.connect(self.path)
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    def win_rate_by_true_count(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> List[TrueCountWinRate]:
+        """
+        依真實計數區間統計手牌勝率
+
+        Args:
+            since: 起始時間（ISO 格式，含）
+            until: 結束時間（ISO 格式，不含）
+        """
+        conditions, params = _date_range("r.played_at", since, until)
+        sql = (
+            "SELECT r.tc_bucket, COUNT(*), "
+            "SUM(h.result > 0), SUM(h.result < 0), SUM(h.result = 0), AVG(h.result) "
+            "FROM hands h JOIN rounds r ON r.id = h.round_id"
+            f"{conditions} GROUP BY r.tc_bucket ORDER BY r.tc_bucket"
+        )
+        return [
+            TrueCountWinRate(bucket, hands, wins, losses, pushes, wins / hands, average)
+            for bucket, hands, wins, losses, pushes, average in self._query(sql, params)
+        ]
+
+    def deviation_frequency(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> List[DeviationFrequency]:
+        """依手牌 / 莊家牌統計計數偏移被採用的頻率"""
+        conditions, params = _date_range("r.played_at", since, until)
+        sql = (
+            "SELECT d.player_total, d.is_soft, d.dealer_card, COUNT(*), SUM(d.is_deviation) "
+            "FROM decisions d JOIN rounds r ON r.id = d.round_id"
+            f"{conditions} GROUP BY d.player_total, d.is_soft, d.dealer_card "
+            "ORDER BY d.is_soft, d.player_total, d.dealer_card"
+        )
+        return [
+            DeviationFrequency(total, bool(soft), dealer, count, deviations, deviations / count)
+            for total, soft, dealer, count, deviations in self._query(sql, params)
+        ]
+
+    def decision_accuracy_by_true_count(self) -> Dict[int, float]:
+        """依真實計數區間統計實際動作與建議一致的比例"""
+        sql = (
+            "SELECT tc_bucket, AVG(recommended = taken) FROM decisions "
+            "GROUP BY tc_bucket ORDER BY tc_bucket"
+        )
+        return {bucket: accuracy for bucket, accuracy in self._query(sql)}
+
+
+def _write_round(conn: sqlite3.Connection, pending: PendingRound) -> None:
+    round_id = conn.execute(_INSERT_ROUND, pending.round).lastrowid
+    if pending.hands:
+        conn.executemany(_INSERT_HAND, [(round_id, *row) for row in pending.hands])
+    if pending.decisions:
+        conn.executemany(_INSERT_DECISION, [(round_id, *row) for row in pending.decisions])
+
+
+def _date_range(column: str, since: Optional[str], until: Optional[str]) -> Tuple[str, List[str]]:
+    clauses: List[str] = []
+    params: List[str] = []
+    if since is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
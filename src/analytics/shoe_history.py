@@ -0,0 +1,367 @@
+"""
+牌靴歷史紀錄的欄式二進位格式
+
+檔案結構（小端序，各區段以 8 位元組對齊）：
+    標頭   magic、版本、各欄位長度與區段位移
+    cards          uint8   每張牌一個位元組（牌面代碼，見 CARD_CODES）
+    roles          uint8   每張牌的歸屬（玩家 / 莊家 / 其他玩家）
+    round_offsets  uint64  每一輪在 cards 中的起點（長度 n_rounds + 1）
+    shoe_offsets   uint64  每個牌靴在 rounds 中的起點（長度 n_shoes + 1）
+    actions        uint8   玩家動作代碼（見 ACTION_CODES）
+    action_pos     uint16  動作發生時該輪已發出的牌數
+    action_offsets uint64  每一輪在 actions 中的起點（長度 n_rounds + 1）
+
+讀取端以記憶體映射開啟檔案，所有欄位皆為不複製資料的 NumPy 視圖。
+"""
+
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+MAGIC = b"BJSH"
+VERSION = 1
+
+# 牌面代碼：0 保留給無效值
+CARD_CODES: Dict[str, int] = {
+    "A": 1,
+    "2": 2,
+    "3": 3,
+    "4": 4,
+    "5": 5,
+    "6": 6,
+    "7": 7,
+    "8": 8,
+    "9": 9,
+    "10": 10,
+    "J": 11,
+    "Q": 12,
+    "K": 13,
+}
+CODE_TO_CARD: List[str] = [""] + list(CARD_CODES)
+
+# 牌張歸屬
+ROLE_PLAYER = 0
+ROLE_DEALER = 1
+ROLE_OTHER = 2
+
+# 玩家動作代碼（沿用 strategy.yaml 的動作代碼）
+ACTION_CODES: Dict[str, int] = {
+    "H": 1,  # 要牌
+    "S": 2,  # 停牌
+    "D": 3,  # 加倍
+    "Y": 4,  # 分牌
+    "R": 5,  # 投降
+    "I": 6,  # 買保險
+}
+CODE_TO_ACTION: List[str] = [""] + list(ACTION_CODES)
+
+# magic, version, 保留, n_shoes, n_rounds, n_cards, n_actions
+_HEADER = struct.Struct("<4sHHQQQQ")
+# 7 個區段的位移
+_SECTIONS = struct.Struct("<7Q")
+_HEADER_SIZE = _HEADER.size + _SECTIONS.size
+
+RoundAction = Tuple[str, int]
+
+
+def encode_cards(cards: Sequence[str]) -> bytes:
+    """將牌面字串轉換為每張一個位元組的代碼"""
+    try:
+        return bytes(CARD_CODES[card] for card in cards)
+    except KeyError as e:
+        raise ValueError(f"無效的牌面：{e.args[0]}") from None
+
+
+def decode_cards(codes: "npt.NDArray[np.uint8]") -> List[str]:
+    """將牌面代碼轉換回牌面字串"""
+    return [CODE_TO_CARD[code] for code in codes.tolist()]
+
+
+class _ColumnSpool:
+    """單一欄位的暫存檔，累積到一定大小才寫出"""
+
+    def __init__(self, typecode: str, flush_items: int = 1 << 16) -> None:
+        self.typecode = typecode
+        self.buffer: "array[int]" = array(typecode)
+        self.flush_items = flush_items
+        self.count = 0
+        self.file: IO[bytes] = tempfile.TemporaryFile()
+
+    def extend(self, values: Union[bytes, Sequence[int]]) -> None:
+        self.buffer.extend(values)
+        self.count += len(values)
+        if len(self.buffer) >= self.flush_items:
+            self.flush()
+
+    def append(self, value: int) -> None:
+        self.buffer.append(value)
+        self.count += 1
+        if len(self.buffer) >= self.flush_items:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            if sys.byteorder == "big":
+                self.buffer.byteswap()
+            self.file.write(self.buffer.tobytes())
+            self.buffer = array(self.typecode)
+
+    def copy_to(self, out: IO[bytes]) -> None:
+        self.flush()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, out)
+        self.file.close()
+
+
+class ShoeHistoryWriter:
+    """以串流方式寫入牌靴歷史，記憶體用量不隨資料量成長"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._cards = _ColumnSpool("B")
+        self._roles = _ColumnSpool("B")
+        self._round_offsets = _ColumnSpool("Q")
+        self._shoe_offsets = _ColumnSpool("Q")
+        self._actions = _ColumnSpool("B")
+        self._action_pos = _ColumnSpool("H")
+        self._action_offsets = _ColumnSpool("Q")
+        self._round_offsets.append(0)
+        self._action_offsets.append(0)
+        self._shoe_offsets.append(0)
+        self._shoe_open = False
+        self._closed = False
+
+    @property
+    def n_rounds(self) -> int:
+        return self._round_offsets.count - 1
+
+    def begin_shoe(self) -> None:
+        """開始新牌靴（自動結束前一個牌靴）"""
+        if self._shoe_open:
+            self.end_shoe()
+        self._shoe_open = True
+
+    def end_shoe(self) -> None:
+        """結束目前的牌靴"""
+        if self._shoe_open:
+            self._shoe_offsets.append(self.n_rounds)
+            self._shoe_open = False
+
+    def add_round(
+        self,
+        cards: Sequence[str],
+        roles: Optional[Sequence[int]] = None,
+        actions: Optional[Sequence[RoundAction]] = None,
+    ) -> None:
+        """
+        新增一輪牌局
+
+        Args:
+            cards: 依發牌順序排列的牌面
+            roles: 每張牌的歸屬（ROLE_PLAYER / ROLE_DEALER / ROLE_OTHER），預設皆為玩家
+            actions: (動作代碼, 發生時已發出的牌數) 列表
+        """
+        if self._closed:
+            raise ValueError("牌靴歷史檔案已關閉")
+        if not self._shoe_open:
+            self.begin_shoe()
+
+        if roles is None:
+            roles = [ROLE_PLAYER] * len(cards)
+        elif len(roles) != len(cards):
+            raise ValueError("牌張歸屬數量與牌張數量不一致")
+
+        self._cards.extend(encode_cards(cards))
+        self._roles.extend(roles)
+        self._round_offsets.append(self._cards.count)
+
+        for action, position in actions or ():
+            if action not in ACTION_CODES:
+                raise ValueError(f"無效的動作代碼：{action}")
+            if not 0 <= position <= len(cards):
+                raise ValueError(f"動作位置 {position} 超出該輪牌張範圍")
+            self._actions.append(ACTION_CODES[action])
+            self._action_pos.append(position)
+        self._action_offsets.append(self._actions.count)
+
+    def close(self) -> None:
+        """寫出所有欄位並關閉檔案"""
+        if self._closed:
+            return
+        self.end_shoe()
+        self._closed = True
+
+        columns = [
+            self._cards,
+            self._roles,
+            self._round_offsets,
+            self._shoe_offsets,
+            self._actions,
+            self._action_pos,
+            self._action_offsets,
+        ]
+        offsets = []
+        position = _HEADER_SIZE
+        for column in columns:
+            position = _align(position)
+            offsets.append(position)
+            position += column.count * column.buffer.itemsize
+
+        with open(self.path, "wb") as out:
+            out.write(
+                _HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    0,
+                    self._shoe_offsets.count - 1,
+                    self.n_rounds,
+                    self._cards.count,
+                    self._actions.count,
+                )
+            )
+            out.write(_SECTIONS.pack(*offsets))
+            for column, offset in zip(columns, offsets):
+                out.write(b"\0" * (offset - out.tell()))
+                column.copy_to(out)
+
+    def __enter__(self) -> "ShoeHistoryWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+class RoundRecord(NamedTuple):
+    """單輪資料（皆為記憶體映射的視圖）"""
+
+    cards: "npt.NDArray[np.uint8]"
+    roles: "npt.NDArray[np.uint8]"
+    actions: "npt.NDArray[np.uint8]"
+    action_positions: "npt.NDArray[np.uint16]"
+
+
+class ShoeRecord(NamedTuple):
+    """單一牌靴資料（皆為記憶體映射的視圖）"""
+
+    shoe_index: int
+    cards: "npt.NDArray[np.uint8]"
+    roles: "npt.NDArray[np.uint8]"
+    round_offsets: "npt.NDArray[np.uint64]"  # 各輪起點（全域牌張位移）
+
+
+class ShoeHistoryReader:
+    """以記憶體映射讀取牌靴歷史，逐牌靴 / 逐輪提供零複製視圖"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"找不到牌靴歷史檔案：{self.path}") from None
+
+        header = self._file.read(_HEADER_SIZE)
+        if len(header) < _HEADER_SIZE:
+            self._file.close()
+            raise ValueError("牌靴歷史檔案格式錯誤：標頭不完整")
+        magic, version, _, n_shoes, n_rounds, n_cards, n_actions = _HEADER.unpack_from(header)
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError("牌靴歷史檔案格式錯誤：識別碼不符")
+        if version != VERSION:
+            self._file.close()
+            raise ValueError(f"不支援的牌靴歷史檔案版本：{version}")
+
+        self.n_shoes: int = n_shoes
+        self.n_rounds: int = n_rounds
+        self.n_cards: int = n_cards
+        self.n_actions: int = n_actions
+
+        sections = _SECTIONS.unpack_from(header, _HEADER.size)
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def column(index: int, dtype: str, count: int) -> "npt.NDArray[Any]":
+            return np.frombuffer(
+                self._mmap, dtype=np.dtype(dtype), count=count, offset=sections[index]
+            )
+
+        self.cards = column(0, "u1", n_cards)
+        self.roles = column(1, "u1", n_cards)
+        self.round_offsets = column(2, "<u8", n_rounds + 1)
+        self.shoe_offsets = column(3, "<u8", n_shoes + 1)
+        self.actions = column(4, "u1", n_actions)
+        self.action_positions = column(5, "<u2", n_actions)
+        self.action_offsets = column(6, "<u8", n_rounds + 1)
+
+    def __len__(self) -> int:
+        return self.n_shoes
+
+    def shoe(self, index: int) -> ShoeRecord:
+        """取得第 index 個牌靴"""
+        if not 0 <= index < self.n_shoes:
+            raise IndexError(f"牌靴索引 {index} 超出範圍")
+        first_round = int(self.shoe_offsets[index])
+        last_round = int(self.shoe_offsets[index + 1])
+        start = int(self.round_offsets[first_round])
+        end = int(self.round_offsets[last_round])
+        return ShoeRecord(
+            index,
+            self.cards[start:end],
+            self.roles[start:end],
+            self.round_offsets[first_round : last_round + 1],
+        )
+
+    def round(self, index: int) -> RoundRecord:
+        """取得第 index 輪（全域編號）"""
+        if not 0 <= index < self.n_rounds:
+            raise IndexError(f"牌局索引 {index} 超出範圍")
+        start, end = int(self.round_offsets[index]), int(self.round_offsets[index + 1])
+        a_start, a_end = int(self.action_offsets[index]), int(self.action_offsets[index + 1])
+        return RoundRecord(
+            self.cards[start:end],
+            self.roles[start:end],
+            self.actions[a_start:a_end],
+            self.action_positions[a_start:a_end],
+        )
+
+    def iter_shoes(self, start: int = 0, stop: Optional[int] = None) -> Iterator[ShoeRecord]:
+        """依序產生牌靴"""
+        stop = self.n_shoes if stop is None else min(stop, self.n_shoes)
+        for index in range(start, stop):
+            yield self.shoe(index)
+
+    def iter_rounds(self, shoe_index: int) -> Iterator[RoundRecord]:
+        """依序產生某個牌靴中的每一輪"""
+        if not 0 <= shoe_index < self.n_shoes:
+            raise IndexError(f"牌靴索引 {shoe_index} 超出範圍")
+        first_round = int(self.shoe_offsets[shoe_index])
+        last_round = int(self.shoe_offsets[shoe_index + 1])
+        for index in range(first_round, last_round):
+            yield self.round(index)
+
+    def close(self) -> None:
+        """釋放記憶體映射（之前取得的視圖將失效）"""
+        if not self._mmap.closed:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 仍有視圖參照映射區，交由垃圾回收釋放
+                pass
+        self._file.close()
+
+    def __enter__(self) -> "ShoeHistoryReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -4,5 +4,16 @@ from .basic_strategy import BasicStrategy
 from .card_counter import WongHalvesCounter
 from .game_state import GameState
 from .hand import Hand, HandStatus
+from .insurance import InsuranceAdvice, analyze_insurance
+from .strategy_generator import StrategyRules
 
-__all__ = ["GameState", "WongHalvesCounter", "BasicStrategy", "Hand", "HandStatus"]
+__all__ = [
+    "GameState",
+    "WongHalvesCounter",
+    "BasicStrategy",
+    "Hand",
+    "HandStatus",
+    "StrategyRules",
+    "InsuranceAdvice",
+    "analyze_insurance",
+]
@@ -3,6 +3,7 @@
 假設莊家軟17點停牌
 """
 
+from bisect import bisect_right
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -10,6 +11,71 @@ import yaml
 
 from src.config import DEVIATIONS_CONFIG, STRATEGY_CONFIG
 
+from .strategy_generator import (
+    StrategyRules,
+    cached_composition_index,
+    cached_strategy_file,
+    card_composition_key,
+)
+
+# 計數偏移決策的說明後綴
+DEVIATION_SUFFIX = "(計數偏移)"
+
+
+class DecisionCurve:
+    """
+    單一手牌類別對莊家牌的分段決策函數
+
+    starts[i] 是第 i 段的起點 (門檻, 0 = 含門檻 / 1 = 不含門檻)，
+    查詢時以 bisect 找出真實計數所在的段落。
+    """
+
+    def __init__(
+        self,
+        starts: List[Tuple[float, int]],
+        decisions: List[Tuple[str, str]],
+        no_count: Tuple[str, str],
+    ) -> None:
+        self.starts = starts
+        self.decisions = decisions
+        self.no_count = no_count
+
+    def lookup(self, true_count: float) -> Tuple[str, str]:
+        """取得真實計數下的決策"""
+        return self.decisions[bisect_right(self.starts, (true_count, 0)) - 1]
+
+    def breakpoints(self) -> List[Tuple[float, bool, str]]:
+        """決策改變的位置：(門檻, 是否包含門檻, 新動作)"""
+        return [
+            (start, inclusive == 0, decision[0])
+            for (start, inclusive), decision in zip(self.starts[1:], self.decisions[1:])
+        ]
+
+    def hint(self, true_count: float) -> str:
+        """離目前計數最近、會改變動作的門檻提示"""
+        index = bisect_right(self.starts, (true_count, 0)) - 1
+        action = self.decisions[index][0]
+        hints = []
+        # 往上：下一個動作不同的段落
+        for next_index in range(index + 1, len(self.starts)):
+            if self.decisions[next_index][0] != action:
+                threshold, exclusive = self.starts[next_index]
+                operator = ">" if exclusive else "≥"
+                hints.append(
+                    f"真實計數 {operator} {threshold:+g} 時改為{self.decisions[next_index][0]}"
+                )
+                break
+        # 往下：目前段落起點以下的動作
+        for previous in range(index - 1, -1, -1):
+            if self.decisions[previous][0] != action:
+                threshold, exclusive = self.starts[previous + 1]
+                operator = "≤" if exclusive else "<"
+                hints.append(
+                    f"真實計數 {operator} {threshold:+g} 時改為{self.decisions[previous][0]}"
+                )
+                break
+        return "；".join(hints)
+
 
 class BasicStrategy:
     def __init__(
@@ -88,9 +154,51 @@ class BasicStrategy:
             self.pair_deviations = {}
             self.surrender_deviations = {}
 
+        # 組合策略索引（可選）：多張牌手牌依點數組合覆寫總點數策略
+        self.composition_overrides: Dict[int, str] = {}
+
+        # 決策曲線快取（依需要建立）
+        self._decision_curves: Dict[Tuple[str, Union[int, str], str, int], DecisionCurve] = {}
+
         # 驗證策略表格
         self._validate_strategies()
 
+    @classmethod
+    def from_rules(
+        cls,
+        rules: StrategyRules,
+        deviations_file: Optional[Union[str, Path]] = None,
+        allow_surrender: Optional[bool] = None,
+        cache_dir: Optional[Union[str, Path]] = None,
+        composition_dependent: bool = False,
+    ) -> "BasicStrategy":
+        """
+        依牌桌規則建立策略引擎（策略表由 strategy_generator 計算並快取於磁碟）
+
+        Args:
+            rules: 牌桌規則
+            deviations_file: 偏移策略檔案
+            allow_surrender: 是否允許投降；預設依規則的 late_surrender
+            cache_dir: 快取目錄
+            composition_dependent: 是否載入多張牌的組合策略索引
+        """
+        if allow_surrender is None:
+            allow_surrender = rules.late_surrender
+        strategy = cls(cached_strategy_file(rules, cache_dir), deviations_file, allow_surrender)
+        if composition_dependent:
+            strategy.set_composition_overrides(cached_composition_index(rules, cache_dir))
+        return strategy
+
+    def set_composition_overrides(self, index: Dict[int, str]) -> None:
+        """
+        設定組合策略索引
+
+        Args:
+            index: {card_composition_key: 動作代碼}，由 build_composition_index 產生；
+                   傳入空字典則停用
+        """
+        self.composition_overrides = index
+
     def _validate_strategies(self) -> None:
         """驗證策略表格的完整性"""
         # 檢查硬牌策略
@@ -310,11 +418,152 @@ class BasicStrategy:
     def set_allow_surrender(self, allow: bool) -> None:
         """設定是否允許投降"""
         self.allow_surrender = allow
+        self._decision_curves.clear()
+
+    def _curve_key(
+        self, player_cards: List[str], dealer_card: str
+    ) -> Optional[Tuple[str, Union[int, str], str, int]]:
+        """
+        決策曲線的鍵：(手牌類別, 點數或對子牌面, 莊家牌, 張數分組)
+
+        同一個鍵下的所有手牌在任何真實計數下的決策都相同；張數分組為 1、2、3（3 張以上）。
+        """
+        if not player_cards or dealer_card not in self.dealer_card_index:
+            return None
+        hand_value, is_soft = self.calculate_hand_value(player_cards)
+        if hand_value > 21:
+            return None
+        if len(player_cards) == 2 and player_cards[0] == player_cards[1]:
+            return ("pair", player_cards[0], dealer_card, 2)
+        return ("soft" if is_soft else "hard", hand_value, dealer_card, min(len(player_cards), 3))
+
+    def _curve_thresholds(self, hand_value: int, dealer_card: str, pair_card: str) -> List[float]:
+        """可能改變決策的真實計數門檻"""
+        keys = [f"{hand_value}-{dealer_card}"]
+        if pair_card:
+            card_value = str(hand_value // 2)
+            keys.append(f"{card_value},{card_value}-{dealer_card}")
+        thresholds = set()
+        for table in (
+            self.surrender_deviations,
+            self.pair_deviations,
+            self.soft_deviations,
+            self.hard_deviations,
+        ):
+            for key in keys:
+                if key in table:
+                    thresholds.add(float(table[key]["true_count_threshold"]))
+        return sorted(thresholds)
+
+    def _build_decision_curve(self, player_cards: List[str], dealer_card: str) -> "DecisionCurve":
+        """以代表手牌在每個門檻及門檻之間取樣，建立分段決策函數"""
+        hand_value, _ = self.calculate_hand_value(player_cards)
+        is_pair = len(player_cards) == 2 and player_cards[0] == player_cards[1]
+        thresholds = self._curve_thresholds(
+            hand_value, dealer_card, player_cards[0] if is_pair else ""
+        )
+
+        # 門檻以 >= 或 <= 比較，門檻本身與其兩側可能有不同決策
+        samples: List[Tuple[Tuple[float, int], float]] = []
+        if thresholds:
+            samples.append(((float("-inf"), 0), thresholds[0] - 1.0))
+            for index, threshold in enumerate(thresholds):
+                upper = thresholds[index + 1] if index + 1 < len(thresholds) else threshold + 2.0
+                samples.append(((threshold, 0), threshold))
+                samples.append(((threshold, 1), (threshold + upper) / 2.0))
+        else:
+            samples.append(((float("-inf"), 0), 0.0))
+
+        starts: List[Tuple[float, int]] = []
+        decisions: List[Tuple[str, str]] = []
+        for start, true_count in samples:
+            decision = self._evaluate_decision(player_cards, dealer_card, true_count)
+            if decisions and decisions[-1] == decision:
+                continue
+            starts.append(start)
+            decisions.append(decision)
+
+        no_count = self._evaluate_decision(player_cards, dealer_card, None)
+        return DecisionCurve(starts, decisions, no_count)
+
+    def decision_curve(
+        self, player_cards: List[str], dealer_card: str
+    ) -> Optional["DecisionCurve"]:
+        """
+        取得手牌對莊家牌的分段決策函數（以真實計數為變數）
+
+        Returns:
+            DecisionCurve；手牌為空、爆牌或莊家牌無效時回傳 None
+        """
+        key = self._curve_key(player_cards, dealer_card)
+        if key is None:
+            return None
+        curve = self._decision_curves.get(key)
+        if curve is None:
+            curve = self._build_decision_curve(player_cards, dealer_card)
+            self._decision_curves[key] = curve
+        return curve
+
+    def precompute_decision_curves(
+        self,
+    ) -> Dict[Tuple[str, Union[int, str], str, int], "DecisionCurve"]:
+        """預先計算所有 (手牌類別, 點數, 莊家牌, 張數分組) 的決策曲線"""
+        ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+        hands: List[List[str]] = [[card] for card in ranks]
+        hands += [[card, card] for card in ranks]
+        hands += [[a, b] for i, a in enumerate(ranks) for b in ranks[i + 1 :]]
+        hands += [
+            [a, b, c]
+            for i, a in enumerate(ranks)
+            for j, b in enumerate(ranks[i:], i)
+            for c in ranks[j:]
+        ]
+        for dealer_card in self.dealer_card_index:
+            for cards in hands:
+                self.decision_curve(cards, dealer_card)
+        return dict(self._decision_curves)
+
+    def decision_hint(
+        self, player_cards: List[str], dealer_card: str, true_count: Optional[float]
+    ) -> str:
+        """
+        提示目前決策會在哪個真實計數改變（供 GUI 顯示）
+
+        Returns:
+            例如「真實計數 ≥ +3 時改為停牌」；沒有門檻時回傳空字串
+        """
+        curve = self.decision_curve(player_cards, dealer_card)
+        if curve is None or true_count is None:
+            return ""
+        return curve.hint(true_count)
 
     def get_decision(
         self, player_cards: List[str], dealer_card: str, true_count: Optional[float] = None
     ) -> Tuple[str, str]:
-        """取得策略決策（含偏移）"""
+        """取得策略決策（含偏移），以預先計算的決策曲線二分搜尋"""
+        curve = self.decision_curve(player_cards, dealer_card)
+        if curve is None:
+            return self._evaluate_decision(player_cards, dealer_card, true_count)
+        decision = curve.no_count if true_count is None else curve.lookup(true_count)
+
+        # 多張牌手牌的組合策略覆寫（計數偏移優先）
+        if (
+            self.composition_overrides
+            and len(player_cards) >= 3
+            and not decision[1].endswith(DEVIATION_SUFFIX)
+        ):
+            override = self.composition_overrides.get(
+                card_composition_key(player_cards, dealer_card)
+            )
+            if override is not None:
+                action_info = self.action_codes.get(override, {})
+                return action_info.get("action", override), "依手牌組合調整"
+        return decision
+
+    def _evaluate_decision(
+        self, player_cards: List[str], dealer_card: str, true_count: Optional[float]
+    ) -> Tuple[str, str]:
+        """逐步檢查偏移與策略表求得決策（不含組合策略覆寫）"""
         if len(player_cards) == 0:
             return "無手牌", "請加入玩家手牌"
 
@@ -0,0 +1,352 @@
+"""
+下注級距最佳化
+
+依各真實計數區間的出現頻率、每手期望值與變異數，以 Kelly 比例下注並限制破產機率，
+求出每個區間的下注單位（以牌桌最低下注為一單位）。結果依規則與參數快取於磁碟，
+計數器查詢下注單位只需一次陣列索引。
+
+模型（近似）：
+    - 每手期望值 = 規則基本優勢 + 每單位真實計數的優勢增量 × 真實計數
+      （可改用模擬器量測的各區間期望值與標準差，例如 ResultHistograms.by_true_count()）
+    - 真實計數頻率：以無放回抽牌的常態近似，對發牌深度取平均
+    - 破產機率：布朗運動近似 exp(-2 × 每手期望值 × 資金 / 每手變異數)
+"""
+
+import hashlib
+import json
+import math
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Protocol, Tuple, Union
+
+from src.utils.atomic_write import atomic_write
+
+from .strategy_generator import StrategyRules, default_cache_dir
+
+
+class CountBucket(NamedTuple):
+    """單一真實計數區間（tc <= 真實計數 < tc + 1）"""
+
+    true_count: int
+    frequency: float
+    edge: float  # 每單位下注的期望值
+    variance: float  # 每單位下注的變異數
+
+
+# 量測結果少於此樣本數的區間不採用，改用線性模型（太少的樣本沒有可用的標準差）
+_MIN_BUCKET_SAMPLES = 30
+
+
+class BucketResult(Protocol):
+    """
+    單一真實計數區間每單位下注的結果（例如模擬器的 BinStats）
+
+    另外有 samples 屬性時，樣本數不足的區間不會被採用。
+    """
+
+    @property
+    def mean(self) -> float: ...
+
+    @property
+    def sd(self) -> float: ...
+
+
+class BetRamp:
+    """真實計數區間到下注單位的對照表"""
+
+    def __init__(
+        self,
+        min_true_count: int,
+        units: List[int],
+        edges: List[float],
+        kelly_fraction: float,
+        ev_per_round: float,
+        sd_per_round: float,
+        risk_of_ruin: float,
+        true_counts: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Args:
+            true_counts: 各區間的起點（遞增，可不連續）；省略時為從 min_true_count 起的連續區間
+        """
+        if true_counts is None:
+            true_counts = list(range(min_true_count, min_true_count + len(units)))
+        if len(true_counts) != len(units) or true_counts != sorted(set(true_counts)):
+            raise ValueError("真實計數區間必須遞增且與下注單位數量一致")
+        self.min_true_count = min_true_count
+        self.true_counts = true_counts
+        self.units = units
+        self.edges = edges
+        self.kelly_fraction = kelly_fraction
+        self.ev_per_round = ev_per_round  # 以單位計
+        self.sd_per_round = sd_per_round
+        self.risk_of_ruin = risk_of_ruin
+
+    def _index(self, true_count: float) -> int:
+        # 落在區間之間的空缺時使用較低的區間；低於第一個區間時使用第一個
+        return max(bisect_right(self.true_counts, math.floor(true_count)) - 1, 0)
+
+    def units_for(self, true_count: float) -> int:
+        """真實計數對應的下注單位"""
+        return self.units[self._index(true_count)]
+
+    def edge_for(self, true_count: float) -> float:
+        """真實計數對應的預期優勢"""
+        return self.edges[self._index(true_count)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "min_true_count": self.min_true_count,
+            "units": self.units,
+            "edges": self.edges,
+            "kelly_fraction": self.kelly_fraction,
+            "ev_per_round": self.ev_per_round,
+            "sd_per_round": self.sd_per_round,
+            "risk_of_ruin": self.risk_of_ruin,
+        }
+        # 連續區間沿用原本的格式（快取檔與檢查點設定指紋不變）
+        if self.true_counts and self.true_counts[-1] - self.true_counts[0] != len(self.units) - 1:
+            data["true_counts"] = self.true_counts
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BetRamp":
+        return cls(
+            int(data["min_true_count"]),
+            [int(unit) for unit in data["units"]],
+            [float(edge) for edge in data["edges"]],
+            float(data["kelly_fraction"]),
+            float(data["ev_per_round"]),
+            float(data["sd_per_round"]),
+            float(data["risk_of_ruin"]),
+            [int(tc) for tc in data["true_counts"]] if "true_counts" in data else None,
+        )
+
+
+def rule_base_edge(rules: StrategyRules) -> float:
+    """
+    規則的基本策略玩家優勢（常見規則影響的近似值）
+
+    以單副牌、莊家軟17停牌、不可分牌後加倍、可分至4手、不可再分A、無投降為 0 為基準。
+    """
+    deck_effect = {1: 0.0, 2: -0.0035, 3: -0.0043, 4: -0.0048, 5: -0.0051, 6: -0.0054}
+    edge = deck_effect.get(rules.decks, -0.0057)
+    if rules.hit_soft_17:
+        edge -= 0.0022
+    if rules.double_after_split:
+        edge += 0.0014
+    if rules.late_surrender:
+        edge += 0.0008
+    if rules.resplit_aces:
+        edge += 0.0008
+    if rules.max_split_hands < 4:
+        edge -= 0.0010 if rules.max_split_hands == 2 else 0.0003
+    return edge
+
+
+def true_count_frequencies(
+    decks: int, penetration: float, card_values: Dict[str, float], bucket_range: int = 10
+) -> Dict[int, float]:
+    """
+    估計每手開始時真實計數區間的頻率
+
+    以無放回抽牌的常態近似計算已發 n 張牌時的真實計數分布，再對 n 取平均。
+
+    Args:
+        decks: 牌副數
+        penetration: 發牌深度（0-1）
+        card_values: 計數系統牌值
+        bucket_range: 區間範圍 [-bucket_range, bucket_range]
+    """
+    values = [card_values[card] for card in card_values]
+    mean = sum(values) / len(values)
+    per_card_variance = sum((value - mean) ** 2 for value in values) / len(values)
+
+    total = decks * 52
+    cut = int(total * penetration)
+    frequencies = {bucket: 0.0 for bucket in range(-bucket_range, bucket_range + 1)}
+    depths = range(0, max(cut, 1), 4)
+    for seen in depths:
+        remaining = total - seen
+        variance = per_card_variance * seen * remaining / (total - 1)
+        sd = math.sqrt(variance) / (remaining / 52.0)
+        for bucket in frequencies:
+            lower = -math.inf if bucket == -bucket_range else bucket
+            upper = math.inf if bucket == bucket_range else bucket + 1
+            frequencies[bucket] += _normal_mass(lower, upper, sd)
+    return {bucket: mass / len(depths) for bucket, mass in frequencies.items()}
+
+
+def _normal_mass(lower: float, upper: float, sd: float) -> float:
+    """平均為 0 的常態分布在 [lower, upper) 的機率"""
+    if sd == 0:
+        return 1.0 if lower <= 0 < upper else 0.0
+
+    def cdf(x: float) -> float:
+        if math.isinf(x):
+            return 0.0 if x < 0 else 1.0
+        return 0.5 * (1.0 + math.erf(x / (sd * math.sqrt(2.0))))
+
+    return cdf(upper) - cdf(lower)
+
+
+def count_profile(
+    rules: StrategyRules,
+    card_values: Dict[str, float],
+    penetration: float = 0.75,
+    edge_per_true_count: float = 0.005,
+    variance: float = 1.33,
+    frequencies: Optional[Dict[int, float]] = None,
+    results: Optional[Mapping[int, BucketResult]] = None,
+) -> List[CountBucket]:
+    """
+    依規則建立各真實計數區間的頻率、期望值與變異數
+
+    Args:
+        frequencies: 各整數真實計數區間的頻率（例如快取的真實計數直方圖）；
+                     省略時以常態近似估計
+        results: 各區間量測到的每單位期望值與標準差（例如模擬結果的
+                 ResultHistograms.by_true_count()）；沒有結果、樣本數不足或標準差不為正的
+                 區間使用線性模型
+    """
+    base_edge = rule_base_edge(rules)
+    if frequencies is None:
+        frequencies = true_count_frequencies(rules.decks, penetration, card_values)
+    profile = []
+    for tc, frequency in sorted(frequencies.items()):
+        result = results.get(tc) if results is not None else None
+        if (
+            result is not None
+            and result.sd > 0
+            and getattr(result, "samples", _MIN_BUCKET_SAMPLES) >= _MIN_BUCKET_SAMPLES
+        ):
+            profile.append(CountBucket(tc, frequency, result.mean, result.sd * result.sd))
+        else:
+            # 區間 [tc, tc + 1) 以中點估計優勢
+            edge = base_edge + edge_per_true_count * (tc + 0.5)
+            profile.append(CountBucket(tc, frequency, edge, variance))
+    return profile
+
+
+def _evaluate(
+    profile: List[CountBucket], units: List[int], bankroll_units: float
+) -> Tuple[float, float, float]:
+    ev = sum(bucket.frequency * unit * bucket.edge for bucket, unit in zip(profile, units))
+    second_moment = sum(
+        bucket.frequency * unit * unit * bucket.variance for bucket, unit in zip(profile, units)
+    )
+    variance = max(second_moment - ev * ev, 1e-12)
+    ror = 1.0 if ev <= 0 else min(1.0, math.exp(-2.0 * ev * bankroll_units / variance))
+    return ev, math.sqrt(variance), ror
+
+
+def optimize_bet_ramp(
+    profile: List[CountBucket],
+    table_min: float,
+    table_max: float,
+    bankroll: float,
+    max_risk_of_ruin: float = 0.05,
+) -> BetRamp:
+    """
+    求出 Kelly 比例、受破產機率限制的下注級距
+
+    每個區間的下注為 k × 資金 × 優勢 ÷ 變異數（Kelly 比例），以牌桌最低/最高下注截斷並
+    取整數單位；k 取在破產機率上限內的最大值。
+
+    Args:
+        profile: 各真實計數區間的頻率、期望值與變異數
+        table_min: 牌桌最低下注（一單位）
+        table_max: 牌桌最高下注
+        bankroll: 資金
+        max_risk_of_ruin: 破產機率上限
+    """
+    if table_min <= 0 or table_max < table_min:
+        raise ValueError(f"無效的牌桌下注範圍：{table_min} - {table_max}")
+    if bankroll < table_min:
+        raise ValueError(f"資金不足一單位：{bankroll}")
+    if not profile:
+        raise ValueError("真實計數區間不可為空")
+
+    max_units = int(table_max // table_min)
+    bankroll_units = bankroll / table_min
+
+    def ramp(fraction: float) -> List[int]:
+        units = []
+        for bucket in profile:
+            kelly = fraction * bankroll_units * bucket.edge / bucket.variance
+            units.append(min(max_units, max(1, int(round(kelly)))))
+        return units
+
+    best: Optional[Tuple[float, List[int], Tuple[float, float, float]]] = None
+    fallback: Optional[Tuple[float, List[int], Tuple[float, float, float]]] = None
+    for step in range(1, 101):
+        fraction = step / 100.0
+        units = ramp(fraction)
+        stats = _evaluate(profile, units, bankroll_units)
+        if stats[2] <= max_risk_of_ruin:
+            best = (fraction, units, stats)
+        if fallback is None or stats[2] < fallback[2][2]:
+            fallback = (fraction, units, stats)
+    # 無法滿足破產機率上限時，取破產機率最低的級距
+    chosen = best if best is not None else fallback
+    assert chosen is not None
+    fraction, units, (ev, sd, ror) = chosen
+    return BetRamp(
+        profile[0].true_count,
+        units,
+        [bucket.edge for bucket in profile],
+        fraction,
+        ev,
+        sd,
+        ror,
+        [bucket.true_count for bucket in profile],
+    )
+
+
+def cached_bet_ramp(
+    rules: StrategyRules,
+    card_values: Dict[str, float],
+    table_min: float,
+    table_max: float,
+    bankroll: float,
+    max_risk_of_ruin: float = 0.05,
+    penetration: float = 0.75,
+    cache_dir: Optional[Union[str, Path]] = None,
+    frequencies: Optional[Dict[int, float]] = None,
+    results: Optional[Mapping[int, BucketResult]] = None,
+) -> BetRamp:
+    """
+    取得規則與下注參數對應的下注級距，快取中沒有時計算並寫入
+
+    frequencies 與 results 的意義同 count_profile，兩者都納入快取鍵。
+    """
+    parameters: Dict[str, Any] = {
+        "rules": rules._asdict(),
+        "card_values": card_values,
+        "table_min": table_min,
+        "table_max": table_max,
+        "bankroll": bankroll,
+        "max_risk_of_ruin": max_risk_of_ruin,
+        "penetration": penetration,
+    }
+    if frequencies is not None:
+        parameters["frequencies"] = sorted(frequencies.items())
+    if results is not None:
+        parameters["results"] = sorted(
+            (tc, result.mean, result.sd) for tc, result in results.items()
+        )
+    digest = hashlib.sha256(json.dumps(parameters, sort_keys=True).encode("utf-8")).hexdigest()
+    directory = Path(cache_dir) if cache_dir is not None else default_cache_dir() / "ramps"
+    path = directory / f"ramp-{digest[:16]}.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return BetRamp.from_dict(json.load(f))
+
+    profile = count_profile(
+        rules, card_values, penetration, frequencies=frequencies, results=results
+    )
+    ramp = optimize_bet_ramp(profile, table_min, table_max, bankroll, max_risk_of_ruin)
+    directory.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as f:
+        json.dump(ramp.to_dict(), f)
+    return ramp
@@ -3,22 +3,42 @@ Wong Halves 算牌系統實作
 """
 
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
 
 import yaml
 
 from src.config import WONG_HALVES_CONFIG
 
+if TYPE_CHECKING:
+    from .bet_spread import BetRamp
+
+# 點數（J/Q/K 併入 10）與每副牌的張數
+RANKS: Tuple[str, ...] = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+RANK_OF: Dict[str, str] = {**{rank: rank for rank in RANKS}, "J": "10", "Q": "10", "K": "10"}
+RANK_CARDS_PER_DECK: Dict[str, int] = {**dict.fromkeys(RANKS, 4), "10": 16}
+
 
 class WongHalvesCounter:
     def __init__(
-        self, num_decks: int = 8, counting_file: Optional[Union[str, Path]] = None
+        self,
+        num_decks: int = 8,
+        counting_file: Optional[Union[str, Path]] = None,
+        ace_side_count: bool = False,
     ) -> None:
-        """初始化計數器，從YAML檔案載入牌值"""
+        """
+        初始化計數器，從YAML檔案載入牌值
+
+        Args:
+            num_decks: 牌組數
+            counting_file: 計數系統檔案；省略時使用預設的 Wong Halves
+            ace_side_count: 另外旁計 A，下注與玩牌改用依 A 剩餘張數調整的真實計數
+        """
         self.num_decks: int = num_decks
         self.total_cards: int = num_decks * 52
         self.cards_seen: int = 0
         self.running_count: float = 0.0
+        # 各點數已見張數，供依剩餘牌組成的精確計算（例如保險期望值）
+        self.rank_seen: Dict[str, int] = dict.fromkeys(RANKS, 0)
 
         # 使用預設路徑或自定義路徑
         if counting_file is None:
@@ -59,9 +79,20 @@ class WongHalvesCounter:
         self.properties: Dict[str, Any] = config.get("properties", {})
         self.betting_thresholds: Dict[str, float] = config.get("betting_thresholds", {})
 
+        # 下注級距（由 bet_spread 計算；未設定時使用文字建議）
+        self.bet_ramp: Optional["BetRamp"] = None
+
         # 驗證牌值完整性
         self._validate_card_values()
 
+        # A 旁計：以預先算好的調整牌值維護下注與玩牌兩個流水計數
+        self.ace_side_count = ace_side_count
+        self.ace_weights: Dict[str, float] = config.get("ace_side_count", {})
+        self.betting_values = self._adjusted_values(self.ace_weights.get("betting_weight", 0.0))
+        self.playing_values = self._adjusted_values(self.ace_weights.get("playing_weight", 0.0))
+        self.betting_count: float = 0.0
+        self.playing_count: float = 0.0
+
     def _validate_card_values(self) -> None:
         """驗證牌值對照表的完整性"""
         required_cards = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
@@ -69,17 +100,39 @@ class WongHalvesCounter:
             if card not in self.card_values:
                 raise ValueError(f"牌值對照表缺少 {card} 的數值")
 
+    def _adjusted_values(self, weight: float) -> Dict[str, float]:
+        """
+        每剩下一張多於平均的 A，流水計數加 weight 時的各牌牌值
+
+        剩餘 A 相對於平均張數的差 = 已見張數 × 1/13 - 已見 A 張數，可以拆到每張牌上：
+        每張牌加 weight / 13，A 再減 weight。調整後的牌值仍然平衡，逐張累加即可。
+        """
+        share = weight / 13
+        return {
+            card: value + share - (weight if card == "A" else 0.0)
+            for card, value in self.card_values.items()
+        }
+
     def add_card(self, card: str) -> None:
         """新增一張牌到計數中"""
         if card in self.card_values:
             self.running_count += self.card_values[card]
             self.cards_seen += 1
+            self.rank_seen[RANK_OF[card]] += 1
+            if self.ace_side_count:
+                self.betting_count += self.betting_values[card]
+                self.playing_count += self.playing_values[card]
 
     def remove_card(self, card: str) -> None:
         """從計數中移除一張牌"""
         if card in self.card_values:
             self.running_count -= self.card_values[card]
             self.cards_seen = max(0, self.cards_seen - 1)
+            rank = RANK_OF[card]
+            self.rank_seen[rank] = max(0, self.rank_seen[rank] - 1)
+            if self.ace_side_count:
+                self.betting_count -= self.betting_values[card]
+                self.playing_count -= self.playing_values[card]
 
     def get_true_count(self) -> float:
         """計算真實計數（流水計數 ÷ 剩餘牌組數）"""
@@ -90,6 +143,24 @@ class WongHalvesCounter:
             return round(self.running_count / decks_remaining, 2)
         return 0.0
 
+    def get_betting_true_count(self) -> float:
+        """下注用的真實計數（啟用 A 旁計時依剩餘 A 調整）"""
+        if not self.ace_side_count:
+            return self.get_true_count()
+        return self._true_count(self.betting_count)
+
+    def get_playing_true_count(self) -> float:
+        """玩牌決策用的真實計數（啟用 A 旁計時依剩餘 A 調整）"""
+        if not self.ace_side_count:
+            return self.get_true_count()
+        return self._true_count(self.playing_count)
+
+    def _true_count(self, running_count: float) -> float:
+        decks_remaining = (self.total_cards - self.cards_seen) / 52.0
+        if decks_remaining > 0:
+            return round(running_count / decks_remaining, 2)
+        return 0.0
+
     def get_decks_remaining(self) -> float:
         """取得剩餘牌組數"""
         cards_remaining = self.total_cards - self.cards_seen
@@ -99,9 +170,29 @@ class WongHalvesCounter:
         """取得剩餘牌張數"""
         return self.total_cards - self.cards_seen
 
+    def get_rank_remaining(self, card: str) -> int:
+        """取得某點數的剩餘張數（J/Q/K 與 10 合併計算）"""
+        rank = RANK_OF[card]
+        return self.num_decks * RANK_CARDS_PER_DECK[rank] - self.rank_seen[rank]
+
+    def set_bet_ramp(self, ramp: Optional["BetRamp"]) -> None:
+        """設定下注級距；傳入 None 則恢復文字建議"""
+        self.bet_ramp = ramp
+
+    def get_bet_units(self) -> int:
+        """依下注級距取得目前真實計數的下注單位（未設定級距時為 1）"""
+        if self.bet_ramp is None:
+            return 1
+        return self.bet_ramp.units_for(self.get_betting_true_count())
+
     def get_betting_suggestion(self) -> Tuple[str, str]:
         """根據真實計數取得下注建議"""
-        true_count = self.get_true_count()
+        true_count = self.get_betting_true_count()
+
+        if self.bet_ramp is not None:
+            units = self.bet_ramp.units_for(true_count)
+            edge = self.bet_ramp.edge_for(true_count)
+            return f"下注 {units} 單位", f"真實計數 {true_count:.1f} - 預期優勢 {edge:+.2%}"
 
         if true_count >= self.betting_thresholds.get("max_bet", 4.0):
             return "最大下注", f"真實計數 {true_count:.1f} - 強烈玩家優勢"
@@ -122,7 +213,17 @@ class WongHalvesCounter:
         """重置計數器"""
         self.cards_seen = 0
         self.running_count = 0.0
+        self.rank_seen = dict.fromkeys(RANKS, 0)
+        self.betting_count = 0.0
+        self.playing_count = 0.0
 
     def new_shoe(self) -> None:
         """開始新牌靴"""
         self.reset()
+
+    def clone(self) -> "WongHalvesCounter":
+        """複製計數器（共用已載入的設定，不重新讀取YAML）"""
+        new_counter = WongHalvesCounter.__new__(WongHalvesCounter)
+        new_counter.__dict__.update(self.__dict__)
+        new_counter.rank_seen = dict(self.rank_seen)
+        return new_counter
@@ -4,17 +4,29 @@
 
 from typing import List, Optional
 
-from .hand import Hand, HandStatus
+from .hand import CARDS, CardList, Hand, HandStatus, encode_cards
 
 
 class GameState:
+    # 與 Hand 相同，以 __slots__ 儲存；莊家牌存成 bytes 牌面代碼
+    __slots__ = ("player_hands", "current_hand_index", "_dealer_cards", "is_new_hand", "max_hands")
+
     def __init__(self) -> None:
         self.player_hands: List[Hand] = [Hand()]  # 初始化一個手牌
         self.current_hand_index: int = 0  # 當前活動手牌索引
-        self.dealer_cards: List[str] = []  # 莊家所有牌
+        self._dealer_cards = b""  # 莊家所有牌
         self.is_new_hand: bool = True
         self.max_hands: int = 32  # 最多允許32個分牌手（8副牌理論最大值）
 
+    @property
+    def dealer_cards(self) -> CardList:
+        """莊家所有牌（每次取得都是新的唯讀列表，就地修改會拋出 TypeError）"""
+        return CardList(map(CARDS.__getitem__, self._dealer_cards))
+
+    @dealer_cards.setter
+    def dealer_cards(self, cards: List[str]) -> None:
+        self._dealer_cards = encode_cards(cards)
+
     @property
     def current_hand(self) -> Hand:
         """取得當前活動手牌"""
@@ -24,14 +36,14 @@ class GameState:
         return self.player_hands[0]
 
     @property
-    def player_cards(self) -> List[str]:
+    def player_cards(self) -> CardList:
         """向後相容：取得當前手牌的牌張"""
         return self.current_hand.cards
 
     @property
     def dealer_card(self) -> Optional[str]:
         """向後相容：取得莊家明牌（第一張牌）"""
-        return self.dealer_cards[0] if self.dealer_cards else None
+        return CARDS[self._dealer_cards[0]] if self._dealer_cards else None
 
     def add_player_card(self, card: str) -> None:
         """新增一張牌到當前玩家手牌"""
@@ -44,29 +56,31 @@ class GameState:
 
     def set_dealer_card(self, card: str) -> None:
         """設定莊家的明牌（向後相容）"""
-        self.dealer_cards = [card]
+        self._dealer_cards = encode_cards([card])
         self.is_new_hand = False
 
     def add_dealer_card(self, card: str) -> None:
         """新增一張牌到莊家手牌"""
-        self.dealer_cards.append(card)
+        self._dealer_cards += encode_cards([card])
         self.is_new_hand = False
 
     def remove_last_dealer_card(self) -> Optional[str]:
         """移除莊家最後一張牌"""
-        if self.dealer_cards:
-            return self.dealer_cards.pop()
-        return None
+        if not self._dealer_cards:
+            return None
+        removed = CARDS[self._dealer_cards[-1]]
+        self._dealer_cards = self._dealer_cards[:-1]
+        return removed
 
     def get_dealer_upcard(self) -> Optional[str]:
         """取得莊家明牌（第一張牌）"""
-        return self.dealer_cards[0] if self.dealer_cards else None
+        return CARDS[self._dealer_cards[0]] if self._dealer_cards else None
 
     def clear_hand(self) -> None:
         """清除所有手牌"""
         self.player_hands = [Hand()]
         self.current_hand_index = 0
-        self.dealer_cards = []
+        self._dealer_cards = b""
         self.is_new_hand = True
 
     def get_player_hand_string(self) -> str:
@@ -1,9 +1,14 @@
 """
 手牌類別 - 表示單一手牌的狀態和操作
+
+手牌以 __slots__ 儲存，不建立實例字典；牌張存成 bytes（每張牌一個位元組的牌面代碼），
+取得 cards 時才轉回唯讀的字串列表（CardList）。狀態與旗標本身是共用的單例（列舉成員、True/False），
+每個欄位只占一個指標。分析時在記憶體中保留大量歷史手牌也只占很少空間。
 """
 
+import itertools
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, NoReturn, Optional, Tuple
 
 
 class HandStatus(Enum):
@@ -16,8 +21,79 @@ class HandStatus(Enum):
     DOUBLED = "doubled"  # 已加倍
 
 
+# 牌面代碼（CARDS 的索引）與點數（A 先算 11 點）
+CARDS: Tuple[str, ...] = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+_CARD_BYTES: Dict[str, bytes] = {card: bytes((code,)) for code, card in enumerate(CARDS)}
+_CARD_POINTS: Tuple[int, ...] = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+_ACE = CARDS.index("A")
+
+
+def _hand_value(codes: bytes) -> Tuple[int, bool]:
+    value = sum(map(_CARD_POINTS.__getitem__, codes))
+    aces = codes.count(_ACE)
+
+    # 調整A的點數
+    while value > 21 and aces > 0:
+        value -= 10
+        aces -= 1
+
+    return value, aces > 0 and value <= 21
+
+
+# 三張以內的手牌點數預先算好（共 1 + 13 + 13² + 13³ 種），計算點數只需一次查表
+_SHORT_VALUES: Dict[bytes, Tuple[int, bool]] = {
+    bytes(codes): _hand_value(bytes(codes))
+    for length in range(4)
+    for codes in itertools.product(range(len(CARDS)), repeat=length)
+}
+
+
+def encode_cards(cards: Iterable[str]) -> bytes:
+    """
+    將牌張轉為手牌使用的 bytes 牌面代碼
+
+    Raises:
+        ValueError: 無效的牌面
+    """
+    try:
+        return b"".join(map(_CARD_BYTES.__getitem__, cards))
+    except KeyError as e:
+        raise ValueError(f"無效的牌面：{e.args[0]}") from None
+
+
+def decode_cards(codes: bytes) -> List[str]:
+    """將 bytes 牌面代碼轉回牌張列表"""
+    return list(map(CARDS.__getitem__, codes))
+
+
+class CardList(List[str]):
+    """
+    唯讀的牌張列表
+
+    Hand.cards 與 GameState.dealer_cards 由 bytes 牌面代碼解出，每次取得都是新的列表，
+    就地修改不會寫回手牌。為了不讓這類修改默默失效，所有修改列表的方法都會拋出
+    TypeError；其餘行為（索引、迭代、與一般列表比較相等）與 list 相同，需要可修改的副本時
+    使用 list(...) 或 copy()。
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError("牌張列表是唯讀的：請使用 add_card、remove_last_card 或重新指定整個列表")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+
 class Hand:
-    """表示一個21點手牌"""
+    """
+    表示一個21點手牌
+
+    牌張只接受 CARDS 中的標準牌面（"2"～"10"、"J"、"Q"、"K"、"A"）；建構、add_card
+    或指定 cards 時遇到其他字串（例如小寫或 "1"）都會拋出 ValueError，不會默默存入。
+    """
+
+    __slots__ = ("_cards", "status", "bet_multiplier", "is_split_hand", "split_aces")
 
     def __init__(self, initial_cards: Optional[List[str]] = None) -> None:
         """
@@ -25,20 +101,45 @@ class Hand:
 
         Args:
             initial_cards: 初始牌張列表
+
+        Raises:
+            ValueError: 無效的牌面
         """
-        self.cards: List[str] = initial_cards or []
+        self._cards = encode_cards(initial_cards) if initial_cards else b""
         self.status: HandStatus = HandStatus.ACTIVE
         self.bet_multiplier: float = 1.0  # 用於追蹤加倍等情況
         self.is_split_hand: bool = False  # 標記是否為分牌後的手牌
         self.split_aces: bool = False  # 標記是否為分A的手牌
 
+    @property
+    def cards(self) -> CardList:
+        """
+        牌張列表
+
+        每次取得都是新的唯讀列表，就地修改會拋出 TypeError；修改手牌請使用 add_card、
+        remove_last_card 或重新指定整個列表（指定時同樣檢查牌面，無效時拋出 ValueError）。
+        """
+        return CardList(map(CARDS.__getitem__, self._cards))
+
+    @cards.setter
+    def cards(self, cards: List[str]) -> None:
+        self._cards = encode_cards(cards)
+
     def add_card(self, card: str) -> None:
-        """新增一張牌到手牌"""
-        self.cards.append(card)
+        """
+        新增一張牌到手牌
+
+        Raises:
+            ValueError: 無效的牌面
+        """
+        try:
+            self._cards += _CARD_BYTES[card]
+        except KeyError:
+            raise ValueError(f"無效的牌面：{card}") from None
 
         # 檢查是否為21點
         value, _ = self.calculate_value()
-        if value == 21 and len(self.cards) == 2 and not self.is_split_hand:
+        if value == 21 and len(self._cards) == 2 and not self.is_split_hand:
             # 只有非分牌手才能算作blackjack
             self.status = HandStatus.BLACKJACK
 
@@ -49,35 +150,19 @@ class Hand:
         Returns:
             (點數, 是否為軟牌)
         """
-        value = 0
-        aces = 0
-
-        for card in self.cards:
-            if card == "A":
-                value += 11
-                aces += 1
-            elif card in ["J", "Q", "K"]:
-                value += 10
-            else:
-                value += int(card)
-
-        # 調整A的點數
-        while value > 21 and aces > 0:
-            value -= 10
-            aces -= 1
-
-        is_soft = aces > 0 and value <= 21
-        return value, is_soft
+        cards = self._cards
+        short = _SHORT_VALUES.get(cards)
+        return short if short is not None else _hand_value(cards)
 
     def can_double_down(self) -> bool:
         """檢查是否可以加倍"""
-        return len(self.cards) == 2 and self.status == HandStatus.ACTIVE
+        return len(self._cards) == 2 and self.status == HandStatus.ACTIVE
 
     def can_be_split(self) -> bool:
         """檢查是否可以分牌"""
         if not (
-            len(self.cards) == 2
-            and self.cards[0] == self.cards[1]
+            len(self._cards) == 2
+            and self._cards[0] == self._cards[1]
             and self.status == HandStatus.ACTIVE
         ):
             return False
@@ -102,17 +187,18 @@ class Hand:
         Returns:
             被移除的牌，如果沒有牌則返回 None
         """
-        if not self.cards:
+        if not self._cards:
             return None
 
-        removed_card = self.cards.pop()
+        removed_card = CARDS[self._cards[-1]]
+        self._cards = self._cards[:-1]
 
         # 重新計算狀態
-        if self.cards:
+        if self._cards:
             value, _ = self.calculate_value()
             # 如果之前是21點，可能需要恢復為活動狀態
             if self.status == HandStatus.BLACKJACK:
-                if value != 21 or len(self.cards) != 2:
+                if value != 21 or len(self._cards) != 2:
                     self.status = HandStatus.ACTIVE
         else:
             # 如果沒有牌了，重置為活動狀態
@@ -122,7 +208,7 @@ class Hand:
 
     def get_display_string(self) -> str:
         """取得格式化的手牌顯示字串"""
-        if not self.cards:
+        if not self._cards:
             return "無手牌"
 
         cards_str = ", ".join(self.cards)
@@ -134,8 +220,8 @@ class Hand:
 
     def clone(self) -> "Hand":
         """複製手牌（用於分牌）"""
-        new_hand = Hand()
-        new_hand.cards = self.cards.copy()
+        new_hand = Hand.__new__(Hand)
+        new_hand._cards = self._cards  # bytes 不可變，可以共用
         new_hand.status = self.status
         new_hand.bet_multiplier = self.bet_multiplier
         new_hand.is_split_hand = self.is_split_hand
@@ -0,0 +1,47 @@
+"""
+保險與 even money 分析
+
+保險（付 2 賠 1）的期望值只取決於莊家蓋牌是 10 點牌的機率。計數器逐點數記錄已見的牌，
+因此可以直接由剩餘牌組成算出精確機率，不需要依賴真實計數與 10 點牌密度的近似關係：
+
+    - 10 點牌機率 p = 剩餘 10 點牌張數 / 剩餘張數
+    - 每單位保險注的期望值 = 2p - (1 - p) = 3p - 1
+    - even money（玩家黑傑克）：拿 1 倍的期望值為 1，不拿為 1.5 × (1 - p)；
+      與買半注保險等價，因此同樣在 p > 1/3 時應該拿
+
+計算只需查詢十個點數的剩餘張數，每次莊家明牌為 A 時都可以重新計算。
+"""
+
+from typing import NamedTuple, Optional
+
+from .card_counter import RANKS, WongHalvesCounter
+
+
+class InsuranceAdvice(NamedTuple):
+    """依剩餘牌組成的保險建議"""
+
+    ten_probability: float  # 莊家蓋牌為 10 點牌的機率
+    insurance_ev: float  # 每單位保險注的期望值
+    even_money_gain: float  # 拿 even money 相對於不拿的期望值增量（每單位原注）
+
+    @property
+    def take(self) -> bool:
+        """是否應該買保險（或拿 even money）"""
+        return self.insurance_ev > 0
+
+
+def analyze_insurance(counter: WongHalvesCounter) -> Optional[InsuranceAdvice]:
+    """
+    依計數器記錄的剩餘牌組成分析保險
+
+    計數器必須已經加入所有看得到的牌（包含莊家的 A 與玩家手牌）；莊家的蓋牌屬於剩餘的牌。
+
+    Returns:
+        保險建議；沒有剩餘牌或記錄的牌組成不一致（某點數見到的張數超過牌靴內的張數）時為 None
+    """
+    remaining = counter.get_cards_remaining()
+    tens = counter.get_rank_remaining("10")
+    if remaining <= 0 or any(counter.get_rank_remaining(rank) < 0 for rank in RANKS):
+        return None
+    probability = tens / remaining
+    return InsuranceAdvice(probability, 3 * probability - 1, 1.5 * probability - 0.5)
@@ -0,0 +1,553 @@
+"""
+依規則產生基本策略表，並快取於磁碟
+
+以組合分析計算每個玩家手牌對每張莊家明牌的各動作期望值：
+    - 莊家結果機率：以實際牌靴組成精確計算（移除明牌、玩家前兩張牌與莊家抽出的牌），
+      並以莊家已偷看沒有21點為條件
+    - 玩家要牌 / 加倍：以移除前三張牌後的牌靴組成計算，後續抽牌不再逐張移除
+    - 分牌：以單張起手牌的期望值及再分牌次數上限遞迴估算
+總點數策略依各兩張牌組合出現的機率加權後取期望值最高的動作。
+
+產生的表格沿用 strategy.yaml 的格式，快取檔名由規則內容的雜湊決定。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import yaml
+
+from src.config import STRATEGY_CONFIG
+from src.utils.atomic_write import atomic_write
+
+# 牌點索引：1 = A，10 = 10/J/Q/K
+RANKS = range(1, 11)
+DEALER_CARDS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "A"]
+_DEALER_RANKS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 1]
+
+# 莊家結果索引：0-4 = 17-21，5 = 爆牌
+_BUST = 5
+
+CACHE_ENV = "BLACKJACK_COUNTER_CACHE"
+
+
+class StrategyRules(NamedTuple):
+    """牌桌規則"""
+
+    decks: int = 8
+    hit_soft_17: bool = False
+    double_after_split: bool = True
+    max_split_hands: int = 4
+    resplit_aces: bool = False
+    late_surrender: bool = True
+
+    def cache_key(self) -> str:
+        """規則內容的雜湊值"""
+        payload = json.dumps(self._asdict(), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def validate(self) -> None:
+        if not 1 <= self.decks <= 8:
+            raise ValueError(f"牌副數必須介於 1 到 8：{self.decks}")
+        if self.max_split_hands < 1:
+            raise ValueError(f"分牌手數上限必須至少為 1：{self.max_split_hands}")
+
+
+class ActionValues(NamedTuple):
+    """單一手牌組合的各動作期望值（以原始下注為單位）"""
+
+    hit: float
+    stand: float
+    double: float
+    surrender: float
+    split: Optional[float] = None
+
+    def best(self, allow_double: bool = True, allow_surrender: bool = False) -> float:
+        values = [self.hit, self.stand]
+        if allow_double:
+            values.append(self.double)
+        if allow_surrender:
+            values.append(self.surrender)
+        return max(values)
+
+
+def full_shoe(decks: int) -> List[int]:
+    """完整牌靴各點數的張數（索引 0 不使用）"""
+    counts = [0] + [4 * decks] * 10
+    counts[10] = 16 * decks
+    return counts
+
+
+def dealer_distribution(counts: List[int], upcard: int, hit_soft_17: bool) -> List[float]:
+    """
+    計算莊家最終點數機率（條件：莊家沒有21點）
+
+    Args:
+        counts: 已移除明牌與其他已知牌後的牌靴組成
+        upcard: 莊家明牌點數（1 = A）
+        hit_soft_17: 莊家軟17是否要牌
+
+    Returns:
+        [P(17), P(18), P(19), P(20), P(21), P(爆牌)]
+    """
+    removed = [0] * 11
+    total_cards = sum(counts)
+    memo: Dict[int, List[float]] = {}
+
+    def draw(hard: int, has_ace: bool, key: int, drawn: int, first: bool) -> List[float]:
+        soft_total = hard + 10 if has_ace and hard + 10 <= 21 else hard
+        if hard > 21:
+            return [0.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        if soft_total >= 17:
+            is_soft = soft_total != hard
+            if not (hit_soft_17 and soft_total == 17 and is_soft):
+                result = [0.0] * 6
+                result[soft_total - 17] = 1.0
+                return result
+
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+
+        # 暗牌不可能構成21點（莊家已偷看）
+        excluded = 0
+        if first and upcard == 1:
+            excluded = 10
+        elif first and upcard == 10:
+            excluded = 1
+        remaining = total_cards - drawn
+        if excluded:
+            remaining -= counts[excluded] - removed[excluded]
+
+        result = [0.0] * 6
+        if remaining > 0:
+            for rank in RANKS:
+                if rank == excluded:
+                    continue
+                available = counts[rank] - removed[rank]
+                if available <= 0:
+                    continue
+                probability = available / remaining
+                removed[rank] += 1
+                sub = draw(
+                    hard + rank, has_ace or rank == 1, key + _KEY_WEIGHTS[rank], drawn + 1, False
+                )
+                removed[rank] -= 1
+                for index in range(6):
+                    result[index] += probability * sub[index]
+        memo[key] = result
+        return result
+
+    return draw(upcard, upcard == 1, 0, 0, True)
+
+
+# 以整數編碼莊家抽出的牌張組合（每個點數最多 31 張）
+_KEY_WEIGHTS = [0] + [1 << (5 * rank) for rank in RANKS]
+
+
+def _stand_values(dealer: List[float]) -> List[float]:
+    """玩家各點數（0-21）停牌的期望值"""
+    bust = dealer[_BUST]
+    values = []
+    for total in range(22):
+        if total < 17:
+            values.append(bust - (1.0 - bust))
+        else:
+            index = total - 17
+            below = sum(dealer[:index])
+            above = sum(dealer[index + 1 : _BUST])
+            values.append(bust + below - above)
+    return values
+
+
+class _HandEvaluator:
+    """固定牌靴組成下的玩家要牌 / 停牌 / 加倍期望值"""
+
+    def __init__(self, counts: List[int], dealer: List[float]) -> None:
+        total = sum(counts)
+        self.probabilities = [count / total if total else 0.0 for count in counts]
+        self.stand_values = _stand_values(dealer)
+        self._hit_memo: Dict[Tuple[int, bool], float] = {}
+
+    @staticmethod
+    def value(hard: int, has_ace: bool) -> int:
+        return hard + 10 if has_ace and hard + 10 <= 21 else hard
+
+    def stand(self, hard: int, has_ace: bool) -> float:
+        if hard > 21:
+            return -1.0
+        return self.stand_values[self.value(hard, has_ace)]
+
+    def best(self, hard: int, has_ace: bool) -> float:
+        """要牌或停牌中較佳者"""
+        if hard > 21:
+            return -1.0
+        if self.value(hard, has_ace) == 21:
+            return self.stand(hard, has_ace)
+        return max(self.stand(hard, has_ace), self.hit(hard, has_ace))
+
+    def hit(self, hard: int, has_ace: bool) -> float:
+        key = (hard, has_ace)
+        cached = self._hit_memo.get(key)
+        if cached is not None:
+            return cached
+        result = 0.0
+        for rank in RANKS:
+            probability = self.probabilities[rank]
+            if probability:
+                result += probability * self.best(hard + rank, has_ace or rank == 1)
+        self._hit_memo[key] = result
+        return result
+
+    def double(self, hard: int, has_ace: bool) -> float:
+        result = 0.0
+        for rank in RANKS:
+            probability = self.probabilities[rank]
+            if probability:
+                result += probability * self.stand(hard + rank, has_ace or rank == 1)
+        return 2.0 * result
+
+    def split(self, pair_rank: int, rules: StrategyRules) -> float:
+        """分牌期望值（兩手合計，以原始下注為單位）"""
+        q = self.probabilities[pair_rank]
+        is_aces = pair_rank == 1
+        max_hands = rules.max_split_hands
+        if is_aces and not rules.resplit_aces:
+            max_hands = min(max_hands, 2)
+
+        def single_hand(second: int) -> float:
+            hard = pair_rank + second
+            has_ace = is_aces or second == 1
+            if is_aces:
+                # 分A後每手只發一張牌
+                return self.stand(hard, has_ace)
+            best = self.best(hard, has_ace)
+            if rules.double_after_split:
+                best = max(best, self.double(hard, has_ace))
+            return best
+
+        # 第二張不是同點數時的條件期望值
+        if q < 1.0:
+            other = sum(
+                self.probabilities[rank] * single_hand(rank) for rank in RANKS if rank != pair_rank
+            ) / (1.0 - q)
+        else:
+            other = 0.0
+        # 第二張又是同點數但不能再分牌時的期望值
+        repeat = single_hand(pair_rank)
+
+        memo: Dict[Tuple[int, int], float] = {}
+
+        def expected(open_hands: int, hands: int) -> float:
+            if open_hands == 0:
+                return 0.0
+            key = (open_hands, hands)
+            cached = memo.get(key)
+            if cached is not None:
+                return cached
+            if hands < max_hands:
+                paired = expected(open_hands + 1, hands + 1)
+            else:
+                paired = repeat + expected(open_hands - 1, hands)
+            result = q * paired + (1.0 - q) * (other + expected(open_hands - 1, hands))
+            memo[key] = result
+            return result
+
+        return expected(2, 2)
+
+
+def evaluate_hand(
+    counts: List[int], first: int, second: int, upcard: int, rules: StrategyRules
+) -> ActionValues:
+    """
+    計算兩張牌手牌對莊家明牌的各動作期望值
+
+    Args:
+        counts: 完整牌靴組成
+        first, second: 玩家前兩張牌點數（1 = A）
+        upcard: 莊家明牌點數
+        rules: 牌桌規則
+    """
+    shoe = list(counts)
+    for rank in (first, second, upcard):
+        if shoe[rank] <= 0:
+            raise ValueError("牌靴中沒有足夠的牌")
+        shoe[rank] -= 1
+
+    dealer = dealer_distribution(shoe, upcard, rules.hit_soft_17)
+    evaluator = _HandEvaluator(shoe, dealer)
+    hard = first + second
+    has_ace = first == 1 or second == 1
+    split = evaluator.split(first, rules) if first == second else None
+    return ActionValues(
+        evaluator.hit(hard, has_ace),
+        evaluator.stand(hard, has_ace),
+        evaluator.double(hard, has_ace),
+        -0.5,
+        split,
+    )
+
+
+def _composition_probability(counts: List[int], first: int, second: int, upcard: int) -> float:
+    """在已知明牌下拿到 (first, second) 兩張牌的機率"""
+    shoe = list(counts)
+    shoe[upcard] -= 1
+    total = sum(shoe)
+    probability = shoe[first] / total
+    shoe[first] -= 1
+    probability *= shoe[second] / (total - 1)
+    return probability if first == second else 2.0 * probability
+
+
+def _action_code(values: ActionValues, allow_double: bool = True) -> str:
+    best = values.best(allow_double=allow_double)
+    if allow_double and best == values.double and values.double > max(values.hit, values.stand):
+        return "D" if values.hit >= values.stand else "Ds"
+    return "H" if values.hit > values.stand else "S"
+
+
+def _weighted(items: List[Tuple[float, ActionValues]]) -> ActionValues:
+    total = sum(weight for weight, _ in items)
+    return ActionValues(
+        sum(weight * values.hit for weight, values in items) / total,
+        sum(weight * values.stand for weight, values in items) / total,
+        sum(weight * values.double for weight, values in items) / total,
+        -0.5,
+    )
+
+
+def generate_strategy(
+    rules: StrategyRules, progress: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    依規則計算完整策略表（strategy.yaml 格式）
+
+    Args:
+        rules: 牌桌規則
+        progress: 進度回呼 (已完成明牌數, 明牌總數)
+    """
+    rules.validate()
+    counts = full_shoe(rules.decks)
+
+    with open(STRATEGY_CONFIG, "r", encoding="utf-8") as f:
+        template = yaml.safe_load(f)
+
+    hard: Dict[int, List[str]] = {total: [] for total in range(5, 22)}
+    soft: Dict[int, List[str]] = {total: [] for total in range(13, 22)}
+    pairs: Dict[str, List[str]] = {}
+    surrender: Dict[int, List[str]] = {total: [] for total in range(5, 22)}
+
+    for done, upcard in enumerate(_DEALER_RANKS):
+        # 所有兩張牌組合（first <= second）
+        values: Dict[Tuple[int, int], ActionValues] = {}
+        for first in RANKS:
+            for second in range(first, 11):
+                shoe = list(counts)
+                shoe[upcard] -= 1
+                if shoe[first] <= 0 or shoe[second] - (first == second) <= 0:
+                    continue
+                values[(first, second)] = evaluate_hand(counts, first, second, upcard, rules)
+
+        # 硬牌（不含A），依組合機率加權
+        for total in range(5, 22):
+            items = [
+                (_composition_probability(counts, a, b, upcard), hand_values)
+                for (a, b), hand_values in values.items()
+                if a != 1 and a + b == total
+            ]
+            if items:
+                weighted = _weighted(items)
+                hard[total].append(_action_code(weighted))
+                surrender_best = rules.late_surrender and weighted.surrender > weighted.best()
+                surrender[total].append("Y" if surrender_best else "N")
+            else:
+                # 沒有兩張牌組合（硬21）：多張牌手牌只能要牌或停牌
+                hard[total].append("S" if total >= 17 else "H")
+                surrender[total].append("N")
+
+        # 軟牌（A + x）
+        for total in range(13, 21):
+            soft[total].append(_action_code(values[(1, total - 11)]))
+        soft[21].append("S")
+
+        # 對子
+        for rank in RANKS:
+            key = "A,A" if rank == 1 else f"{rank},{rank}"
+            pair_values = values.get((rank, rank))
+            if pair_values is None or pair_values.split is None:
+                pairs.setdefault(key, []).append("N")
+                continue
+            alternative = pair_values.best(allow_surrender=rules.late_surrender)
+            pairs.setdefault(key, []).append("Y" if pair_values.split > alternative else "N")
+
+        if progress is not None:
+            progress(done + 1, len(_DEALER_RANKS))
+
+    config: Dict[str, Any] = {
+        "settings": {
+            "decks": rules.decks,
+            "dealer_stands_soft_17": not rules.hit_soft_17,
+            "double_after_split": rules.double_after_split,
+            "max_split_hands": rules.max_split_hands,
+            "resplit_aces": rules.resplit_aces,
+            "late_surrender": rules.late_surrender,
+        },
+        "action_codes": template.get("action_codes", {}),
+        "dealer_card_index": template.get("dealer_card_index", {}),
+        "hard_strategy": {"dealer_cards": DEALER_CARDS, "hands": hard},
+        "soft_strategy": {"dealer_cards": DEALER_CARDS, "hands": soft},
+        "pair_strategy": {"dealer_cards": DEALER_CARDS, "pairs": pairs},
+    }
+    if rules.late_surrender:
+        config["surrender_strategy"] = {"dealer_cards": DEALER_CARDS, "hands": surrender}
+    return config
+
+
+def default_cache_dir() -> Path:
+    """預設快取目錄（可用環境變數 BLACKJACK_COUNTER_CACHE 覆寫）"""
+    override = os.environ.get(CACHE_ENV)
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "blackjack-counter"
+
+
+def cached_strategy_file(
+    rules: StrategyRules, cache_dir: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    取得規則對應的策略檔，快取中沒有時計算並寫入
+
+    Returns:
+        可直接傳給 BasicStrategy 的 YAML 檔案路徑
+    """
+    directory = Path(cache_dir) if cache_dir is not None else default_cache_dir() / "strategies"
+    path = directory / f"strategy-{rules.cache_key()}.yaml"
+    if path.exists():
+        return path
+
+    config = generate_strategy(rules)
+    directory.mkdir(parents=True, exist_ok=True)
+    # 先寫入暫存檔再改名，避免其他行程讀到不完整的檔案
+    with atomic_write(path) as f:
+        f.write(f"# 由 strategy_generator 產生：{json.dumps(rules._asdict())}\n")
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+    return path
+
+
+# 組合策略索引：以整數編碼手牌的點數組合，低 5 位元放莊家明牌點數
+# （每個點數最多 31 張，與莊家抽牌的編碼方式相同）
+CARD_RANKS = {"A": 1, "J": 10, "Q": 10, "K": 10}
+CARD_RANKS.update({str(rank): rank for rank in range(2, 11)})
+
+
+CARD_KEYS = {card: _KEY_WEIGHTS[rank] for card, rank in CARD_RANKS.items()}
+
+
+def composition_key(player_ranks: List[int], upcard: int) -> int:
+    """手牌點數組合與莊家明牌的索引鍵"""
+    key = upcard
+    for rank in player_ranks:
+        key += _KEY_WEIGHTS[rank]
+    return key
+
+
+def card_composition_key(player_cards: List[str], dealer_card: str) -> int:
+    """以牌面字串計算索引鍵（與 composition_key 相同）"""
+    key = CARD_RANKS[dealer_card]
+    for card in player_cards:
+        key += CARD_KEYS[card]
+    return key
+
+
+def _multi_card_hands(max_cards: int) -> List[List[int]]:
+    """列出需要查表的多張牌組合（硬 12-17 或軟 17-19，三張以上）"""
+    hands: List[List[int]] = []
+    current: List[int] = []
+
+    def extend(start: int, hard: int) -> None:
+        if len(current) >= 3:
+            has_ace = 1 in current
+            soft = has_ace and hard + 10 <= 21
+            if (soft and 17 <= hard + 10 <= 19) or (not soft and 12 <= hard <= 17):
+                hands.append(list(current))
+        if len(current) >= max_cards:
+            return
+        for rank in range(start, 11):
+            if hard + rank > 21:
+                break
+            current.append(rank)
+            extend(rank, hard + rank)
+            current.pop()
+
+    extend(1, 0)
+    return hands
+
+
+def build_composition_index(
+    rules: StrategyRules,
+    chart: Optional[Dict[str, Any]] = None,
+    max_cards: int = 6,
+) -> Dict[int, str]:
+    """
+    計算多張牌手牌與總點數策略不同的組合
+
+    只針對三張以上（不能加倍、分牌或投降）的手牌比較要牌與停牌，
+    牌靴組成為完整牌靴移除手牌與莊家明牌。
+
+    Args:
+        rules: 牌桌規則
+        chart: 總點數策略表（generate_strategy 的輸出）；省略時重新計算
+        max_cards: 手牌張數上限
+
+    Returns:
+        {composition_key: 動作代碼}，只包含與總點數策略不同的組合
+    """
+    rules.validate()
+    if chart is None:
+        chart = generate_strategy(rules)
+    counts = full_shoe(rules.decks)
+    hands = _multi_card_hands(max_cards)
+    index: Dict[int, str] = {}
+
+    for column, upcard in enumerate(_DEALER_RANKS):
+        for ranks in hands:
+            shoe = list(counts)
+            shoe[upcard] -= 1
+            for rank in ranks:
+                shoe[rank] -= 1
+            if min(shoe[1:]) < 0:
+                continue
+
+            hard = sum(ranks)
+            has_ace = 1 in ranks
+            total = _HandEvaluator.value(hard, has_ace)
+            table = "soft_strategy" if total != hard else "hard_strategy"
+            # 多張牌不能加倍：D 視為要牌，Ds 視為停牌
+            chart_code = chart[table]["hands"][total][column]
+            chart_action = "H" if chart_code in ("H", "D") else "S"
+
+            evaluator = _HandEvaluator(shoe, dealer_distribution(shoe, upcard, rules.hit_soft_17))
+            best = "H" if evaluator.hit(hard, has_ace) > evaluator.stand(hard, has_ace) else "S"
+            if best != chart_action:
+                index[composition_key(ranks, upcard)] = best
+    return index
+
+
+def cached_composition_index(
+    rules: StrategyRules, cache_dir: Optional[Union[str, Path]] = None
+) -> Dict[int, str]:
+    """取得規則對應的組合策略索引，快取中沒有時計算並寫入"""
+    directory = Path(cache_dir) if cache_dir is not None else default_cache_dir() / "strategies"
+    path = directory / f"composition-{rules.cache_key()}.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return {int(key): action for key, action in json.load(f).items()}
+
+    with open(cached_strategy_file(rules, directory), "r", encoding="utf-8") as f:
+        chart = yaml.safe_load(f)
+    index = build_composition_index(rules, chart)
+    with atomic_write(path) as f:
+        json.dump({str(key): action for key, action in index.items()}, f)
+    return index
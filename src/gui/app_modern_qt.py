@@ -39,7 +39,13 @@ from PyQt6.QtWidgets import (
 )
 
 from src.config import SHORTCUTS_CONFIG
-from src.core import BasicStrategy, GameState, HandStatus, WongHalvesCounter
+from src.core import (
+    BasicStrategy,
+    GameState,
+    HandStatus,
+    WongHalvesCounter,
+    analyze_insurance,
+)
 
 
 class ClickableGroupBox(QGroupBox):
@@ -636,6 +642,13 @@ class ModernBlackjackCounterApp(QMainWindow):
         )
         decision_layout.addWidget(self.decision_label)
 
+        # 計數門檻提示標籤（例如「真實計數 ≥ +3 時改為停牌」）
+        self.decision_hint_label = QLabel("")
+        self.decision_hint_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.decision_hint_label.setStyleSheet("color: #aaa; font-size: 12px;")
+        self.decision_hint_label.setVisible(False)
+        decision_layout.addWidget(self.decision_hint_label)
+
         # 保險建議標籤
         self.insurance_label = QLabel("")
         self.insurance_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -1112,6 +1125,11 @@ class ModernBlackjackCounterApp(QMainWindow):
                 current_hand.cards, self.game_state.dealer_card, true_count
             )
             self.decision_label.setText(action)
+            hint = self.strategy.decision_hint(
+                current_hand.cards, self.game_state.dealer_card, true_count
+            )
+            self.decision_hint_label.setText(hint)
+            self.decision_hint_label.setVisible(bool(hint))
             self.decision_label.setStyleSheet(
                 f"""
                 QLabel {{
@@ -1128,9 +1146,18 @@ class ModernBlackjackCounterApp(QMainWindow):
 
             # 檢查是否需要顯示保險建議（只在莊家第一張牌是A且只有一張牌時）
             if self.game_state.dealer_card == "A" and len(self.game_state.dealer_cards) == 1:
-                should_insure = self.strategy.should_take_insurance(true_count)
+                # 優先依剩餘牌組成計算精確期望值；牌組成不一致時退回真實計數門檻
+                advice = analyze_insurance(self.counter)
+                if advice is not None:
+                    should_insure = advice.take
+                    detail = (
+                        f"10點牌 {advice.ten_probability:.1%}，期望值 {advice.insurance_ev:+.1%}"
+                    )
+                else:
+                    should_insure = self.strategy.should_take_insurance(true_count)
+                    detail = "計數 ≥ 3" if should_insure else "計數 < 3"
                 if should_insure:
-                    self.insurance_label.setText("建議買保險 (計數 ≥ 3)")
+                    self.insurance_label.setText(f"建議買保險 ({detail})")
                     self.insurance_label.setStyleSheet(
                         """
                         QLabel {
@@ -1146,7 +1173,7 @@ class ModernBlackjackCounterApp(QMainWindow):
                     """
                     )
                 else:
-                    self.insurance_label.setText("不建議買保險 (計數 < 3)")
+                    self.insurance_label.setText(f"不建議買保險 ({detail})")
                     self.insurance_label.setStyleSheet(
                         """
                         QLabel {
@@ -1179,6 +1206,7 @@ class ModernBlackjackCounterApp(QMainWindow):
                 }
             """
             )
+            self.decision_hint_label.setVisible(False)
             self.insurance_label.setVisible(False)
 
     def update_button_states(self) -> None:
@@ -0,0 +1,14 @@
+"""Headless and networked services built on the core counting engine."""
+
+from .headless import HeadlessEngine
+from .table_server import TableServer, TableSession
+from .team_play import AggregatorServer, SpotterClient, TeamAggregator
+
+__all__ = [
+    "HeadlessEngine",
+    "TableServer",
+    "TableSession",
+    "TeamAggregator",
+    "SpotterClient",
+    "AggregatorServer",
+]
@@ -0,0 +1,263 @@
+"""
+無介面 JSON-lines 決策引擎
+
+從標準輸入讀取 JSON-lines 事件，每個事件輸出一行 JSON，包含計數與
+當前手牌的 get_decision 結果。不需要 PyQt6，方便串接其他工具或測試流程。
+
+輸入事件（與重播日誌相同的 "event" 欄位）：
+    {"event": "card", "role": "player", "card": "10"}   role: player / dealer / other
+    {"event": "upcard", "card": "6"}                     設定莊家明牌
+    {"event": "split"} {"event": "stand"} {"event": "double"}
+    {"event": "round"}                                   清除手牌（保留計數）
+    {"event": "shoe"}                                    新牌靴（重置計數）
+
+輸出：
+    {"rc": 1.5, "tc": 0.19, "cards_remaining": 408, "hand": 0,
+     "action": "停牌", "explanation": "保持現有手牌"}
+"""
+
+import argparse
+import json
+import sys
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.basic_strategy import BasicStrategy, DecisionCurve
+from src.core.card_counter import WongHalvesCounter
+from src.core.game_state import GameState
+
+# 每次讀取的行數上限
+_BATCH_LINES = 4096
+# 快取大小上限
+_CACHE_LIMIT = 8192
+
+_NO_DECISION = '"action": null, "explanation": null'
+
+
+class HeadlessEngine:
+    """逐事件更新計數與手牌，並輸出決策"""
+
+    def __init__(
+        self,
+        strategy: Optional[BasicStrategy] = None,
+        counter: Optional[WongHalvesCounter] = None,
+    ) -> None:
+        self.strategy = strategy if strategy is not None else BasicStrategy()
+        self.counter = counter if counter is not None else WongHalvesCounter()
+        self.game_state = GameState()
+        self.events_processed: int = 0
+
+        # 輸入行 → 解析後的 (事件, 牌面, 歸屬)，事件種類有限，重複行很多
+        self._parsed: Dict[bytes, Tuple[str, str, str]] = {}
+        # 計數 → 輸出文字；流水計數是半點的倍數、真實計數取到小數兩位，數值種類有限
+        self._numbers: Dict[float, str] = {}
+        # (動作, 說明) → 已編碼的決策 JSON 片段，決策結果只有少數幾種
+        self._fragments: Dict[Tuple[str, str], str] = {}
+        # 目前的 (玩家手牌, 莊家明牌, 決策曲線)；只有改變手牌或明牌的事件才需要重新取得，
+        # 其他人的牌只改變真實計數，直接查詢決策曲線
+        self._context: Optional[Tuple[List[str], Optional[str], Optional[DecisionCurve]]] = None
+
+        self._handlers: Dict[str, Callable[[str, str], None]] = {
+            "card": self._on_card,
+            "upcard": self._on_upcard,
+            "split": self._on_split,
+            "stand": self._on_stand,
+            "double": self._on_double,
+            "round": self._on_round,
+            "shoe": self._on_shoe,
+        }
+
+    # ---- 事件處理 ----
+    # 先驗證事件並更新手牌，最後才更新計數；無效的事件不會改變任何狀態
+
+    def _on_card(self, card: str, role: str) -> None:
+        if card not in self.counter.card_values:
+            raise ValueError(f"無效的牌面：{card}")
+        if role == "player":
+            self.game_state.add_player_card(card)
+            self._context = None
+        elif role == "dealer":
+            self.game_state.add_dealer_card(card)
+            self._context = None
+        elif role != "other":
+            raise ValueError(f"無效的牌張歸屬：{role}")
+        self.counter.add_card(card)
+
+    def _on_upcard(self, card: str, role: str) -> None:
+        if card not in self.counter.card_values:
+            raise ValueError(f"無效的牌面：{card}")
+        self.game_state.set_dealer_card(card)
+        self._context = None
+        self.counter.add_card(card)
+
+    def _on_split(self, card: str, role: str) -> None:
+        if not self.game_state.split_current_hand():
+            raise ValueError("當前手牌無法分牌")
+        self._context = None
+
+    def _on_stand(self, card: str, role: str) -> None:
+        self.game_state.stand_current_hand()
+        self._context = None
+
+    def _on_double(self, card: str, role: str) -> None:
+        self.game_state.double_down_current_hand()
+        self._context = None
+
+    def _on_round(self, card: str, role: str) -> None:
+        self.game_state.clear_hand()
+        self._context = None
+
+    def _on_shoe(self, card: str, role: str) -> None:
+        self.game_state.clear_hand()
+        self._context = None
+        self.counter.new_shoe()
+
+    # ---- 解析與輸出 ----
+
+    def _parse(self, line: bytes) -> Tuple[str, str, str]:
+        parsed = self._parsed.get(line)
+        if parsed is None:
+            record: Any = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("事件必須是 JSON 物件")
+            parsed = (
+                str(record.get("event", "")),
+                str(record.get("card", "")),
+                str(record.get("role", "player")),
+            )
+            if len(self._parsed) < _CACHE_LIMIT:
+                self._parsed[line] = parsed
+        return parsed
+
+    def _number(self, value: float) -> str:
+        # 0.0 與 -0.0 是同一個鍵，一律輸出 0.0
+        text = repr(value + 0.0)
+        if len(self._numbers) < _CACHE_LIMIT:
+            self._numbers[value] = text
+        return text
+
+    def _decision_context(
+        self,
+    ) -> Tuple[List[str], Optional[str], Optional[DecisionCurve]]:
+        game_state = self.game_state
+        strategy = self.strategy
+        cards = game_state.current_hand.cards
+        dealer_card = game_state.get_dealer_upcard()
+        curve = None
+        # 三張以上的手牌可能有組合策略覆寫，交給 get_decision 處理
+        if dealer_card is not None and cards:
+            if not (strategy.composition_overrides and len(cards) >= 3):
+                curve = strategy.decision_curve(cards, dealer_card)
+        return cards, dealer_card, curve
+
+    def _decision_fragment(self, true_count: float) -> str:
+        context = self._context
+        if context is None:
+            context = self._context = self._decision_context()
+        cards, dealer_card, curve = context
+        if dealer_card is None or not cards:
+            return _NO_DECISION
+
+        if curve is not None:
+            decision = curve.lookup(true_count)
+        else:
+            decision = self.strategy.get_decision(cards, dealer_card, true_count)
+        fragment = self._fragments.get(decision)
+        if fragment is None:
+            action, explanation = decision
+            fragment = (
+                f'"action": {json.dumps(action, ensure_ascii=False)}, '
+                f'"explanation": {json.dumps(explanation, ensure_ascii=False)}'
+            )
+            if len(self._fragments) < _CACHE_LIMIT:
+                self._fragments[decision] = fragment
+        return fragment
+
+    def apply(self, event: str, card: str = "", role: str = "player") -> str:
+        """
+        套用單一事件，回傳輸出的 JSON 字串（不含換行）
+
+        Raises:
+            ValueError: 事件種類、牌面或歸屬無效
+        """
+        handler = self._handlers.get(event)
+        if handler is None:
+            raise ValueError(f"無效的事件種類：{event}")
+        handler(card, role)
+
+        self.events_processed += 1
+        counter = self.counter
+        true_count = counter.get_playing_true_count()
+        numbers = self._numbers
+        running_text = numbers.get(counter.running_count) or self._number(counter.running_count)
+        true_text = numbers.get(true_count) or self._number(true_count)
+        return (
+            f'{{"rc": {running_text}, "tc": {true_text}, '
+            f'"cards_remaining": {counter.total_cards - counter.cards_seen}, '
+            f'"hand": {self.game_state.current_hand_index}, '
+            f"{self._decision_fragment(true_count)}}}"
+        )
+
+    def handle_line(self, line: bytes) -> str:
+        """處理單行事件，回傳輸出的 JSON 字串（不含換行）"""
+        try:
+            return self.apply(*self._parse(line))
+        except (ValueError, TypeError) as e:
+            return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    def handle(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """處理單一事件物件（方便程式內呼叫），回傳解析後的輸出"""
+        result: Dict[str, Any] = json.loads(self.handle_line(json.dumps(event).encode("utf-8")))
+        return result
+
+    def run(self, infile: IO[bytes], outfile: IO[bytes]) -> int:
+        """
+        處理整個輸入串流
+
+        以批次讀取輸入、批次寫出輸出，回傳處理的事件數。
+        """
+        handle_line = self.handle_line
+        while True:
+            lines = infile.readlines(_BATCH_LINES * 64)
+            if not lines:
+                break
+            output: List[str] = [handle_line(line) for line in lines if line.strip()]
+            if output:
+                output.append("")
+                outfile.write("\n".join(output).encode("utf-8"))
+                outfile.flush()
+        return self.events_processed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """無介面決策引擎進入點"""
+    parser = argparse.ArgumentParser(
+        prog="blackjack-counter-headless",
+        description="從標準輸入讀取 JSON-lines 事件，輸出計數與策略決策",
+    )
+    parser.add_argument("--decks", type=int, default=8, help="牌副數（預設 8）")
+    parser.add_argument("--strategy", help="策略 YAML 檔案路徑")
+    parser.add_argument("--deviations", help="偏移 YAML 檔案路徑")
+    parser.add_argument("--counting", help="計數系統 YAML 檔案路徑")
+    parser.add_argument("--no-surrender", action="store_true", help="不允許投降")
+    parser.add_argument(
+        "--ace-side-count", action="store_true", help="旁計 A，以調整後的真實計數決策"
+    )
+    args = parser.parse_args(argv)
+
+    engine = HeadlessEngine(
+        BasicStrategy(args.strategy, args.deviations, allow_surrender=not args.no_surrender),
+        WongHalvesCounter(
+            num_decks=args.decks,
+            counting_file=args.counting,
+            ace_side_count=args.ace_side_count,
+        ),
+    )
+    try:
+        engine.run(sys.stdin.buffer, sys.stdout.buffer)
+    except BrokenPipeError:
+        # 下游提早關閉管線時安靜結束
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
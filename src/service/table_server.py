@@ -0,0 +1,241 @@
+"""
+asyncio 多牌桌計數伺服器
+
+單一行程同時追蹤多張牌桌。每張牌桌有獨立的 WongHalvesCounter 與 GameState，
+所有牌桌共用同一個已載入的 BasicStrategy；新牌桌由範本計數器複製而來，
+事件處理過程不會重新讀取 YAML。
+
+通訊協定為 JSON-lines（localhost TCP 或 Unix socket），每行一個請求：
+    {"op": "event", "table": "t1", "event": "card", "role": "player", "card": "10"}
+    {"op": "subscribe", "table": "t1"}
+    {"op": "unsubscribe", "table": "t1"}
+    {"op": "close", "table": "t1"}
+    {"op": "tables"}
+
+事件的輸出格式與無介面引擎相同，另加上 "table" 欄位，並推送給該牌桌的所有訂閱者。
+每個連線的輸出佇列有上限，讀取太慢的訂閱者會丟棄最舊的更新，記憶體用量有界。
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from src.core.basic_strategy import BasicStrategy
+from src.core.card_counter import WongHalvesCounter
+
+from .headless import HeadlessEngine
+
+# 單一請求行的長度上限
+_LINE_LIMIT = 64 * 1024
+
+
+class _Connection:
+    """單一客戶端連線與其輸出佇列"""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int) -> None:
+        self.writer = writer
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+        self.subscriptions: Set[str] = set()
+        self.dropped: int = 0
+
+    def send(self, line: str) -> None:
+        """放入輸出佇列；佇列已滿時丟棄最舊的一筆"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+    async def drain(self) -> None:
+        while True:
+            line = await self.queue.get()
+            if line is None:
+                break
+            self.writer.write(line.encode("utf-8") + b"\n")
+            if self.queue.empty():
+                await self.writer.drain()
+
+
+class TableSession:
+    """單張牌桌的狀態"""
+
+    def __init__(self, name: str, engine: HeadlessEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.subscribers: Set[_Connection] = set()
+        self._prefix = f'{{"table": {json.dumps(name, ensure_ascii=False)}, '
+
+    def apply(self, event: str, card: str, role: str) -> str:
+        """套用事件並回傳帶有牌桌名稱的輸出"""
+        return self._prefix + self.engine.apply(event, card, role)[1:]
+
+
+class TableServer:
+    """多牌桌計數伺服器"""
+
+    def __init__(
+        self,
+        strategy: Optional[BasicStrategy] = None,
+        counter: Optional[WongHalvesCounter] = None,
+        max_tables: int = 1024,
+        queue_size: int = 256,
+    ) -> None:
+        self.strategy = strategy if strategy is not None else BasicStrategy()
+        self._counter_template = counter if counter is not None else WongHalvesCounter()
+        self._counter_template.reset()
+        self.max_tables = max_tables
+        self.queue_size = queue_size
+        self.tables: Dict[str, TableSession] = {}
+        self._connections: Set[_Connection] = set()
+        self._servers: List[asyncio.AbstractServer] = []
+
+    def get_table(self, name: str) -> TableSession:
+        """取得牌桌，不存在時建立"""
+        table = self.tables.get(name)
+        if table is None:
+            if len(self.tables) >= self.max_tables:
+                raise ValueError(f"牌桌數量已達上限 {self.max_tables}")
+            engine = HeadlessEngine(self.strategy, self._counter_template.clone())
+            table = TableSession(name, engine)
+            self.tables[name] = table
+        return table
+
+    def close_table(self, name: str) -> bool:
+        """移除牌桌"""
+        table = self.tables.pop(name, None)
+        if table is None:
+            return False
+        for connection in table.subscribers:
+            connection.subscriptions.discard(name)
+        return True
+
+    def handle_request(self, request: Dict[str, Any], connection: _Connection) -> Optional[str]:
+        """處理單一請求，回傳要送回請求者的輸出（已推送給訂閱者時回傳 None）"""
+        op = request.get("op", "event")
+        name = request.get("table")
+        if op == "tables":
+            return json.dumps({"tables": sorted(self.tables)}, ensure_ascii=False)
+        if not isinstance(name, str) or not name:
+            raise ValueError("請求缺少牌桌名稱")
+
+        if op == "event":
+            created = name not in self.tables
+            table = self.get_table(name)
+            try:
+                line = table.apply(
+                    str(request.get("event", "")),
+                    str(request.get("card", "")),
+                    str(request.get("role", "player")),
+                )
+            except (ValueError, TypeError):
+                # 無效的事件不改變牌桌狀態；因這個事件才建立的牌桌不保留、不佔用上限
+                if created:
+                    del self.tables[name]
+                raise
+            for subscriber in table.subscribers:
+                subscriber.send(line)
+            return None if connection in table.subscribers else line
+        if op == "subscribe":
+            self.get_table(name).subscribers.add(connection)
+            connection.subscriptions.add(name)
+            return json.dumps({"table": name, "subscribed": True}, ensure_ascii=False)
+        if op == "unsubscribe":
+            existing = self.tables.get(name)
+            if existing is not None:
+                existing.subscribers.discard(connection)
+            connection.subscriptions.discard(name)
+            return json.dumps({"table": name, "subscribed": False}, ensure_ascii=False)
+        if op == "close":
+            closed = self.close_table(name)
+            return json.dumps({"table": name, "closed": closed}, ensure_ascii=False)
+        raise ValueError(f"無效的操作：{op}")
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _Connection(writer, self.queue_size)
+        self._connections.add(connection)
+        drain_task = asyncio.ensure_future(connection.drain())
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    connection.send(json.dumps({"error": "請求過長"}, ensure_ascii=False))
+                    break
+                except ConnectionError:
+                    break
+                if not raw:
+                    break
+                if not raw.strip():
+                    continue
+                try:
+                    request = json.loads(raw)
+                    if not isinstance(request, dict):
+                        raise ValueError("請求必須是 JSON 物件")
+                    reply = self.handle_request(request, connection)
+                except (ValueError, TypeError) as e:
+                    reply = json.dumps({"error": str(e)}, ensure_ascii=False)
+                if reply is not None:
+                    connection.send(reply)
+        finally:
+            for name in connection.subscriptions:
+                table = self.tables.get(name)
+                if table is not None:
+                    table.subscribers.discard(connection)
+            self._connections.discard(connection)
+            if connection.queue.full():
+                connection.queue.get_nowait()
+            connection.queue.put_nowait(None)
+            try:
+                await drain_task
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """在 localhost TCP 埠啟動伺服器（port 0 代表自動選擇）"""
+        server = await asyncio.start_server(self._handle_client, host, port, limit=_LINE_LIMIT)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """在 Unix socket 啟動伺服器"""
+        server = await asyncio.start_unix_server(self._handle_client, path, limit=_LINE_LIMIT)
+        self._servers.append(server)
+        return server
+
+    async def close(self) -> None:
+        """停止所有監聽中的伺服器"""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+
+
+def main() -> None:
+    """以預設設定在 localhost:8765 啟動伺服器"""
+    parser = argparse.ArgumentParser(description="多牌桌計數伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="改用 Unix socket 路徑")
+    parser.add_argument("--decks", type=int, default=8, help="牌副數（預設 8）")
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        server = TableServer(counter=WongHalvesCounter(num_decks=args.decks))
+        if args.unix:
+            listener = await server.start_unix(args.unix)
+        else:
+            listener = await server.start_tcp(args.host, args.port)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+團隊算牌：多名觀察者（spotter）回報牌張，由主玩家端彙整計數
+
+每位觀察者執行輕量的計數器，將看到的牌以 (牌桌, 牌靴編號, 序號, 牌面) 傳給彙整端。
+彙整端為每張牌桌維護一個 WongHalvesCounter，並把合併後的真實計數推送給主玩家。
+
+序號有兩種：
+    共用序號  該牌在牌靴中的發牌順序，所有觀察者一致；同一張牌被多名觀察者回報
+              或重送時只計算一次
+    本地序號  觀察者自己遞增的序號，只在同一名觀察者內去除重送，
+              不同觀察者的牌一律分別計算
+
+牌靴編號也是各觀察者本地的編號。觀察者啟動（包含重新啟動）時送出 ShoeReset，
+彙整端把它的本地牌靴編號對應到牌桌目前的牌靴，之後本地編號加一即代表新牌靴；
+多名觀察者回報同一次換靴只會重置一次。
+
+傳輸方式：
+    LoopbackTransport  同一行程內直接傳遞（測試與單機使用）
+    SocketTransport    以 JSON-lines 透過本機 TCP / Unix socket 傳給 AggregatorServer
+"""
+
+import asyncio
+import json
+import socket
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from src.core.card_counter import WongHalvesCounter
+
+# 訂閱者的輸出緩衝上限（位元組）；讀取太慢、超過上限的訂閱者會被中斷
+_SUBSCRIBER_BUFFER_LIMIT = 256 * 1024
+
+
+class Observation(NamedTuple):
+    """觀察者回報的一張牌"""
+
+    table: str
+    shoe: int
+    seq: int
+    card: str
+    spotter: str = ""
+    sent_at: float = 0.0  # time.time()，用於計算延遲
+    shared: bool = True  # seq 是否為所有觀察者一致的發牌序號
+
+
+class ShoeReset(NamedTuple):
+    """觀察者宣告：它的本地牌靴編號 shoe 對應到牌桌目前的牌靴"""
+
+    table: str
+    spotter: str
+    shoe: int
+
+
+class TableCount(NamedTuple):
+    """牌桌合併後的計數"""
+
+    table: str
+    shoe: int
+    running_count: float
+    true_count: float
+    cards_seen: int
+    latency_ms: float
+
+
+class _TableState:
+    """彙整端單張牌桌的狀態"""
+
+    def __init__(self, counter: WongHalvesCounter) -> None:
+        self.counter = counter
+        self.shoe = -1
+        # 已計算的牌：共用序號為 ("", seq)，本地序號為 (觀察者, seq)
+        self.seen: Set[Tuple[str, int]] = set()
+        # 觀察者 → 牌桌牌靴編號與其本地編號的差
+        self.shoe_offsets: Dict[str, int] = {}
+
+
+class TeamAggregator:
+    """將多名觀察者的牌張串流合併為每張牌桌一個計數器"""
+
+    def __init__(self, counter: Optional[WongHalvesCounter] = None) -> None:
+        self._counter_template = counter if counter is not None else WongHalvesCounter()
+        self._counter_template.reset()
+        self.tables: Dict[str, _TableState] = {}
+        self.subscribers: List[Callable[[TableCount], None]] = []
+        self.duplicates: int = 0
+        self.stale: int = 0
+        self.max_latency_ms: float = 0.0
+
+    def _table(self, name: str) -> _TableState:
+        state = self.tables.get(name)
+        if state is None:
+            state = _TableState(self._counter_template.clone())
+            self.tables[name] = state
+        return state
+
+    def observe(self, observation: Observation) -> Optional[TableCount]:
+        """
+        合併一筆觀察
+
+        Returns:
+            更新後的牌桌計數；重複或過期（舊牌靴）的觀察回傳 None
+        """
+        if observation.card not in self._counter_template.card_values:
+            raise ValueError(f"無效的牌面：{observation.card}")
+        state = self._table(observation.table)
+
+        shoe = observation.shoe + state.shoe_offsets.get(observation.spotter, 0)
+        if shoe < state.shoe:
+            self.stale += 1
+            return None
+        if shoe > state.shoe:
+            # 新牌靴：重置計數與已見序號
+            state.shoe = shoe
+            state.counter.new_shoe()
+            state.seen.clear()
+        key = ("" if observation.shared else observation.spotter, observation.seq)
+        if key in state.seen:
+            self.duplicates += 1
+            return None
+
+        state.seen.add(key)
+        state.counter.add_card(observation.card)
+
+        latency_ms = 0.0
+        if observation.sent_at:
+            latency_ms = max(0.0, (time.time() - observation.sent_at) * 1000.0)
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+        count = TableCount(
+            observation.table,
+            state.shoe,
+            state.counter.running_count,
+            state.counter.get_true_count(),
+            state.counter.cards_seen,
+            latency_ms,
+        )
+        for subscriber in self.subscribers:
+            subscriber(count)
+        return count
+
+    def reset_shoe(self, reset: ShoeReset) -> None:
+        """
+        將觀察者的本地牌靴編號對應到牌桌目前的牌靴
+
+        觀察者（重新）啟動時呼叫；之後它的舊牌靴編號與本地序號不再有效，
+        因此也清除它在目前牌靴中已見的本地序號。
+        """
+        state = self._table(reset.table)
+        state.shoe_offsets[reset.spotter] = max(state.shoe, 0) - reset.shoe
+        state.seen = {key for key in state.seen if key[0] != reset.spotter}
+
+    def table_count(self, table: str) -> TableCount:
+        """取得牌桌目前的合併計數"""
+        state = self._table(table)
+        return TableCount(
+            table,
+            state.shoe,
+            state.counter.running_count,
+            state.counter.get_true_count(),
+            state.counter.cards_seen,
+            0.0,
+        )
+
+
+class LoopbackTransport:
+    """同一行程內直接把觀察交給彙整端"""
+
+    def __init__(self, aggregator: TeamAggregator) -> None:
+        self.aggregator = aggregator
+
+    def send(self, message: Union[Observation, ShoeReset]) -> None:
+        if isinstance(message, ShoeReset):
+            self.aggregator.reset_shoe(message)
+        else:
+            self.aggregator.observe(message)
+
+    def close(self) -> None:
+        pass
+
+
+class SocketTransport:
+    """以 JSON-lines 將觀察送往 AggregatorServer"""
+
+    def __init__(self, address: Union[str, Tuple[str, int]]) -> None:
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(address)
+        else:
+            self._sock = socket.create_connection(address)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, message: Union[Observation, ShoeReset]) -> None:
+        op = "reset" if isinstance(message, ShoeReset) else "observe"
+        request = {"op": op, **message._asdict()}
+        self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class SpotterClient:
+    """觀察者：本地維護輕量計數，並將每張牌回報給彙整端"""
+
+    def __init__(
+        self,
+        table: str,
+        name: str,
+        transport: Union[LoopbackTransport, SocketTransport],
+        counter: Optional[WongHalvesCounter] = None,
+    ) -> None:
+        self.table = table
+        self.name = name
+        self.transport = transport
+        self.counter = counter.clone() if counter is not None else WongHalvesCounter()
+        self.counter.reset()
+        self.shoe = 0
+        self.next_seq = 0
+        # 本地牌靴 0 從牌桌目前的牌靴開始
+        self.transport.send(ShoeReset(table, name, self.shoe))
+
+    def see(self, card: str, seq: Optional[int] = None) -> Observation:
+        """
+        回報一張牌
+
+        Args:
+            card: 牌面
+            seq: 共用的發牌序號；多名觀察者可能看到同一張牌時必須提供，
+                 未提供時使用本地遞增序號（只去除自己重送的牌）
+        """
+        shared = seq is not None
+        if seq is None:
+            seq = self.next_seq
+        self.next_seq = max(self.next_seq, seq + 1)
+        self.counter.add_card(card)
+        observation = Observation(self.table, self.shoe, seq, card, self.name, time.time(), shared)
+        self.transport.send(observation)
+        return observation
+
+    def new_shoe(self) -> None:
+        """開始新牌靴"""
+        self.shoe += 1
+        self.next_seq = 0
+        self.counter.new_shoe()
+
+
+class AggregatorServer:
+    """以 asyncio 接收觀察者串流並推送合併計數給訂閱者（主玩家）"""
+
+    def __init__(self, aggregator: Optional[TeamAggregator] = None) -> None:
+        self.aggregator = aggregator if aggregator is not None else TeamAggregator()
+        self._subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._servers: List[asyncio.AbstractServer] = []
+        self.dropped_subscribers: int = 0
+        self.aggregator.subscribers.append(self._publish)
+
+    def _publish(self, count: TableCount) -> None:
+        writers = self._subscribers.get(count.table)
+        if not writers:
+            return
+        line = json.dumps(count._asdict()).encode("utf-8") + b"\n"
+        for writer in list(writers):
+            if writer.is_closing():
+                writers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > _SUBSCRIBER_BUFFER_LIMIT:
+                # 不等待慢速訂閱者，直接中斷連線，避免輸出緩衝無限增長
+                writers.discard(writer)
+                writer.close()
+                self.dropped_subscribers += 1
+            else:
+                writer.write(line)
+
+    def _handle(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> Optional[str]:
+        op = request.get("op")
+        if op == "observe":
+            self.aggregator.observe(
+                Observation(
+                    str(request["table"]),
+                    int(request["shoe"]),
+                    int(request["seq"]),
+                    str(request["card"]),
+                    str(request.get("spotter", "")),
+                    float(request.get("sent_at", 0.0)),
+                    bool(request.get("shared", True)),
+                )
+            )
+            return None
+        if op == "reset":
+            self.aggregator.reset_shoe(
+                ShoeReset(str(request["table"]), str(request["spotter"]), int(request["shoe"]))
+            )
+            return None
+        if op == "subscribe":
+            table = str(request["table"])
+            self._subscribers.setdefault(table, set()).add(writer)
+            return json.dumps(self.aggregator.table_count(table)._asdict())
+        raise ValueError(f"無效的操作：{op}")
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # 推送給主玩家的更新很小，關閉 Nagle 演算法以免等待對方的延遲確認
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                try:
+                    request = json.loads(raw)
+                    if not isinstance(request, dict):
+                        raise ValueError("請求必須是 JSON 物件")
+                    reply = self._handle(request, writer)
+                except (ValueError, TypeError, KeyError) as e:
+                    reply = json.dumps({"error": str(e)}, ensure_ascii=False)
+                if reply is not None:
+                    writer.write(reply.encode("utf-8") + b"\n")
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """在 localhost TCP 埠啟動彙整端"""
+        server = await asyncio.start_server(self._handle_client, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """在 Unix socket 啟動彙整端"""
+        server = await asyncio.start_unix_server(self._handle_client, path)
+        self._servers.append(server)
+        return server
+
+    async def close(self) -> None:
+        """停止所有監聽中的伺服器"""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
@@ -0,0 +1,48 @@
+"""Simulation building blocks driven by the core strategy and counting engine."""
+
+from .adaptive import AdaptiveResult, StoppingRule, run_until_converged
+from .branching import BranchingSimulator
+from .checkpoint import Checkpoint, load_checkpoint
+from .compare import StrategyVariant, compare_strategies
+from .engine import Simulator
+from .importance import TiltedShoeSource, WeightedResults, run_importance
+from .results import ResultHistograms, SharedResults
+from .runner import SimulationConfig, replay_history, run_lanes, run_simulation
+from .shoes import (
+    MemmapShoeSource,
+    RandomShoeSource,
+    SeededShoeSource,
+    ShoeBatch,
+    write_shoe_file,
+)
+from .streams import RunStreams
+from .telemetry import Dashboard, RunStatus
+
+__all__ = [
+    "RandomShoeSource",
+    "MemmapShoeSource",
+    "SeededShoeSource",
+    "ShoeBatch",
+    "RunStreams",
+    "write_shoe_file",
+    "Simulator",
+    "ResultHistograms",
+    "SharedResults",
+    "SimulationConfig",
+    "run_simulation",
+    "run_lanes",
+    "replay_history",
+    "StoppingRule",
+    "AdaptiveResult",
+    "run_until_converged",
+    "BranchingSimulator",
+    "StrategyVariant",
+    "TiltedShoeSource",
+    "WeightedResults",
+    "run_importance",
+    "compare_strategies",
+    "Checkpoint",
+    "load_checkpoint",
+    "Dashboard",
+    "RunStatus",
+]
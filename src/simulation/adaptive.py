@@ -0,0 +1,132 @@
+"""
+依信賴度自動停止的模擬
+
+以「波次」執行：每一波結束時合併各通道統計，檢查目標真實計數區間的每單位期望值標準誤；
+全部低於目標值即停止，否則依最吵（還需要最多牌靴）的區間估計下一波的牌靴數。
+每一波的牌靴數為「區塊大小 × 通道數」的倍數，且最多讓總數加倍，避免估計誤差造成大幅超跑。
+
+啟用集中模式時，已收斂（與不在目標內）的區間在後續波次中略過不玩（見 Simulator.set_skip），
+計算集中在仍需要樣本的區間。略過的輪次只依第一波量得的平均每輪牌數前進並計數，
+因此後續波次的真實計數軌跡是近似的；整體、手牌與動作統計也只包含實際進行的輪次。
+
+停止判斷只在波次之間、以合併後的統計進行，結果與工作行程數無關。
+"""
+
+import math
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .results import TC_MAX, TC_MIN, ResultHistograms, SharedResults, tc_bin
+from .runner import SimulationConfig, run_lanes
+
+
+class StoppingRule(NamedTuple):
+    """停止條件"""
+
+    target_stderr: float  # 每單位下注期望值的標準誤上限
+    true_counts: Tuple[int, ...] = tuple(range(-5, 6))  # 目標真實計數區間
+    min_samples: int = 1000  # 每個區間至少的樣本數（標準差估計需要足夠樣本）
+    max_shoes: int = 1_000_000  # 牌靴數上限；到達時停止（未收斂）
+
+
+class AdaptiveResult(NamedTuple):
+    """自適應模擬的結果"""
+
+    results: ResultHistograms
+    shoes: int
+    converged: bool
+    stderr: Dict[int, float]  # 各目標區間的標準誤
+
+
+def bucket_stderr(results: ResultHistograms, rule: StoppingRule) -> Dict[int, float]:
+    """各目標真實計數區間的每單位期望值標準誤（樣本不足時為無限大）"""
+    stderr: Dict[int, float] = {}
+    for true_count in rule.true_counts:
+        stats = results.stats(tc_bin(true_count))
+        stderr[true_count] = stats.stderr if stats.samples >= rule.min_samples else math.inf
+    return stderr
+
+
+def pending_buckets(results: ResultHistograms, rule: StoppingRule) -> List[int]:
+    """尚未達到停止條件的目標區間"""
+    return [
+        true_count
+        for true_count, stderr in bucket_stderr(results, rule).items()
+        if stderr > rule.target_stderr
+    ]
+
+
+def plan_shoes(results: ResultHistograms, rule: StoppingRule, shoes: int, block: int) -> int:
+    """
+    估計下一波的牌靴數
+
+    每個未收斂區間需要的樣本數為 max((標準差 / 目標)², 最少樣本數)，
+    以該區間目前每個牌靴的樣本數換算成牌靴數，取最大者。
+
+    Args:
+        results: 目前合併後的統計
+        rule: 停止條件
+        shoes: 目前已完成的牌靴數
+        block: 波次大小的單位（區塊大小 × 通道數）
+
+    Returns:
+        下一波的牌靴數（已完成或到達上限時為 0）
+    """
+    needed = 0.0
+    for true_count in pending_buckets(results, rule):
+        stats = results.stats(tc_bin(true_count))
+        target = max((stats.sd / rule.target_stderr) ** 2, rule.min_samples)
+        rate = stats.samples / shoes if shoes else 0.0
+        needed = max(needed, (target - stats.samples) / rate if rate > 0 else math.inf)
+    if needed <= 0:
+        return 0
+    wave = min(needed, max(shoes, block))
+    wave_shoes = max(math.ceil(wave / block), 1) * block
+    return max(min(wave_shoes, rule.max_shoes - shoes), 0)
+
+
+def run_until_converged(
+    config: SimulationConfig,
+    rule: StoppingRule,
+    processes: int = 1,
+    initial_shoes: Optional[int] = None,
+    focus: bool = False,
+) -> AdaptiveResult:
+    """
+    模擬到所有目標真實計數區間的標準誤都低於目標值（或到達牌靴數上限）
+
+    Args:
+        config: 模擬設定（其中的略過設定會被忽略）
+        rule: 停止條件
+        processes: 工作行程數
+        initial_shoes: 第一波的牌靴數；預設每個通道一個區塊
+        focus: 後續波次略過已收斂的區間，只玩仍需要樣本的區間
+
+    Raises:
+        ValueError: 停止條件或設定無效
+    """
+    if rule.target_stderr <= 0 or rule.min_samples < 2 or not rule.true_counts:
+        raise ValueError(f"無效的停止條件：{rule}")
+    if config.chunk_shoes <= 0:
+        raise ValueError(f"無效的區塊大小：{config.chunk_shoes}")
+
+    config = config._replace(skip_true_counts=(), skip_cards=0.0)
+    block = config.chunk_shoes * config.lanes
+    first = initial_shoes if initial_shoes is not None else block
+    shoes = min(max(math.ceil(first / block), 1) * block, rule.max_shoes)
+
+    with SharedResults(config.lanes) as shared:
+        rounds, cards = run_lanes(shared, config, shoes, processes)
+        cards_per_round = cards / rounds if rounds else 0.0
+        while True:
+            results = shared.merged()
+            pending = pending_buckets(results, rule)
+            wave = plan_shoes(results, rule, shoes, block) if pending else 0
+            if wave == 0:
+                break
+            wave_config = config
+            if focus and cards_per_round > 0:
+                skip = tuple(tc for tc in range(TC_MIN, TC_MAX + 1) if tc not in pending)
+                wave_config = config._replace(skip_true_counts=skip, skip_cards=cards_per_round)
+            shoes += wave
+            run_lanes(shared, wave_config, shoes, processes)
+    return AdaptiveResult(results, shoes, not pending, bucket_stderr(results, rule))
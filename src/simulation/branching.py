@@ -0,0 +1,219 @@
+"""
+單次多策略分支模擬
+
+多個策略一起玩同一個牌靴。計數器狀態只由已用掉的牌決定，因此位於同一個牌位置的策略
+狀態完全相同，可以合成一組共用發牌、計數、莊家補牌與結算：
+
+    1. 每組由一個代表引擎出牌，其他策略的引擎作為跟隨者，只在決策點比對決策
+    2. 決策（或保險）與代表不同的跟隨者脫離本輪，由它們自己組成的新組從本輪開頭重玩
+       （重玩前段的決策相同，直到下一次分歧）
+    3. 一輪結束後依結束的牌位置重新分組：不同決策最後用掉相同的牌時（例如只差在保險），
+       兩組再合併
+
+策略表相同、且同一手牌對莊家牌的決策曲線（見 BasicStrategy.decision_curve）也相同的策略，
+在任何真實計數下的決策都相同，不需要逐一查詢；比對結果依 (代表, 決策曲線) 快取。
+因此大多數決策只查詢代表一次，只有偏移不同的手牌需要查詢其他策略，
+只有真正分歧的輪次需要重玩。每個策略的結果與單獨模擬逐位元相同。
+分支模擬不支援略過真實計數區間。
+"""
+
+import heapq
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from src.analytics.shoe_history import CODE_TO_CARD
+from src.core.basic_strategy import BasicStrategy, DecisionCurve
+from src.core.card_counter import WongHalvesCounter
+
+from .engine import Simulator
+from .results import ResultRecorder
+
+
+def _same_tables(first: BasicStrategy, second: BasicStrategy) -> bool:
+    """決策曲線以外影響決策的設定是否相同"""
+    return (
+        first.hard_strategy == second.hard_strategy
+        and first.soft_strategy == second.soft_strategy
+        and first.dealer_card_index == second.dealer_card_index
+        and first.action_codes == second.action_codes
+        and first.composition_overrides == second.composition_overrides
+    )
+
+
+def _same_curve(curve: DecisionCurve, other: Optional[DecisionCurve]) -> bool:
+    return (
+        other is not None
+        and curve.starts == other.starts
+        and curve.decisions == other.decisions
+        and curve.no_count == other.no_count
+    )
+
+
+class _Fanout(ResultRecorder):
+    """把代表引擎的一輪結果記錄給代表與仍跟隨的引擎"""
+
+    def __init__(self, recorders: Dict[Simulator, ResultRecorder]) -> None:
+        super().__init__()
+        self.recorders = recorders
+        self.leader: Simulator
+
+    def record(
+        self,
+        net: float,
+        units: int,
+        true_count: float,
+        hand_index: int,
+        up_index: int,
+        action_index: int,
+    ) -> None:
+        leader = self.leader
+        for simulator in [leader, *leader.followers]:
+            self.recorders[simulator].record(
+                net, units, true_count, hand_index, up_index, action_index
+            )
+
+
+class BranchingSimulator:
+    """以共用計算的方式讓多個策略玩相同的牌靴"""
+
+    def __init__(
+        self, simulators: Sequence[Simulator], counter: Optional[WongHalvesCounter] = None
+    ) -> None:
+        """
+        Args:
+            simulators: 各策略的模擬引擎（規則需相同；各引擎的計數器在每輪由本類別指定）
+            counter: 所有策略共用的計數器設定（下注級距）；每個牌靴從它的複本開始
+
+        Raises:
+            ValueError: 沒有引擎或規則不同
+        """
+        if not simulators or any(sim.rules != simulators[0].rules for sim in simulators):
+            raise ValueError("需要至少一個引擎，且所有引擎的規則必須相同")
+        self.simulators = list(simulators)
+        self.counter = (
+            counter if counter is not None else WongHalvesCounter(simulators[0].rules.decks)
+        )
+        self.replays = 0  # 因決策分歧而重玩的輪數
+
+        # 策略表、動作代碼與組合策略都相同的引擎屬於同一類
+        tables: List[Simulator] = []
+        self._table_class: Dict[Simulator, int] = {}
+        for simulator in self.simulators:
+            for index, other in enumerate(tables):
+                if _same_tables(simulator.strategy, other.strategy):
+                    self._table_class[simulator] = index
+                    break
+            else:
+                self._table_class[simulator] = len(tables)
+                tables.append(simulator)
+        # (代表, 決策曲線的 id) → (決策曲線, 需要逐一比對的引擎)
+        self._suspects: Dict[Tuple[Simulator, int], Tuple[DecisionCurve, FrozenSet[Simulator]]] = {}
+        self._everyone = frozenset(self.simulators)
+        for simulator in self.simulators:
+            simulator.suspects = self.suspects
+
+    def suspects(self, leader: Simulator, cards: List[str], upcard: str) -> FrozenSet[Simulator]:
+        """手牌的決策可能與代表不同的引擎"""
+        curve = leader.strategy.decision_curve(cards, upcard)
+        if curve is None:
+            return self._everyone
+        key = (leader, id(curve))
+        cached = self._suspects.get(key)
+        if cached is None:
+            table_class = self._table_class[leader]
+            suspects = frozenset(
+                simulator
+                for simulator in self.simulators
+                if self._table_class[simulator] != table_class
+                or not _same_curve(curve, simulator.strategy.decision_curve(cards, upcard))
+            )
+            # 保留曲線的參照，避免 id 被重複使用
+            cached = (curve, suspects)
+            self._suspects[key] = cached
+        return cached[1]
+
+    def play_shoe(
+        self, codes: Sequence[int], burn: int, cut: int, recorders: Sequence[ResultRecorder]
+    ) -> List[int]:
+        """
+        讓所有策略玩完一個牌靴
+
+        Args:
+            codes: 整個牌靴的牌面代碼（CARD_CODES）
+            burn: 開頭燒掉的張數
+            cut: 切牌位置；到達後不再開始新的一輪
+            recorders: 各策略的結果紀錄（與引擎順序相同）
+
+        Returns:
+            各策略本牌靴的輪數
+        """
+        cards = [CODE_TO_CARD[code] for code in codes]
+        simulators = self.simulators
+        fanout = _Fanout(dict(zip(simulators, recorders)))
+        rounds = dict.fromkeys(simulators, 0)
+
+        counter = self.counter.clone()
+        counter.new_shoe()
+        # 牌位置 → (該位置的計數器, 位於該位置的引擎)
+        groups: Dict[int, Tuple[WongHalvesCounter, List[Simulator]]] = {
+            burn: (counter, list(simulators))
+        }
+        positions = [burn]
+        while positions:
+            position = heapq.heappop(positions)
+            counter, members = groups.pop(position)
+            if position >= cut:
+                continue
+            for end, end_counter, finished in self._play_group(
+                cards, position, counter, members, fanout
+            ):
+                for simulator in finished:
+                    rounds[simulator] += 1
+                if end in groups:
+                    # 用掉相同的牌，計數器狀態相同
+                    groups[end][1].extend(finished)
+                else:
+                    groups[end] = (end_counter, finished)
+                    heapq.heappush(positions, end)
+        for simulator in simulators:
+            simulator.rounds += rounds[simulator]
+        return [rounds[simulator] for simulator in simulators]
+
+    def _play_group(
+        self,
+        cards: List[str],
+        position: int,
+        counter: WongHalvesCounter,
+        members: List[Simulator],
+        fanout: _Fanout,
+    ) -> List[Tuple[int, WongHalvesCounter, List[Simulator]]]:
+        """
+        一組狀態相同的引擎玩一輪
+
+        Returns:
+            [(結束牌位置, 結束時的計數器, 決策相同的引擎)]；牌靴在一輪中途用盡的引擎不列入
+        """
+        outcomes: List[Tuple[int, WongHalvesCounter, List[Simulator]]] = []
+        pending = [members]
+        while pending:
+            group = pending.pop()
+            leader = group[0]
+            round_counter = counter.clone() if pending or len(group) > 1 else counter
+            for simulator in group:
+                simulator.counter = round_counter
+            leader.followers = group[1:]
+            leader.diverged = []
+            fanout.leader = leader
+            try:
+                end = leader._play_round(cards, position, fanout)
+            except IndexError:
+                # 牌靴在一輪中途用盡（只在發牌深度接近 100% 時發生），捨棄該輪
+                end = -1
+            finished = [leader, *leader.followers]
+            if leader.diverged:
+                self.replays += 1
+                pending.append(leader.diverged)
+            leader.followers = []
+            leader.diverged = []
+            if end >= 0:
+                outcomes.append((end, round_counter, finished))
+        return outcomes
@@ -0,0 +1,250 @@
+"""
+共同亂數的策略配對比較
+
+多個 BasicStrategy 設定（不同的策略表、偏移檔、是否投降或停用某些偏移區段）
+依序玩完完全相同的牌靴：同一個牌靴只洗一次，每個策略各自從頭計數與決策。
+牌靴之間的好運與壞運對所有策略相同，以牌靴為配對單位計算期望值差時大多互相抵銷，
+信賴區間遠小於兩次獨立模擬相減。預設以分支模擬（見 branching）讓所有策略在同一次出牌中
+共用決策相同的部分，結果與逐一模擬相同。
+
+每輪期望值是比值估計（總輸贏 / 總輪數；策略不同時同一牌靴的輪數可能不同），
+差的標準誤以牌靴為單位的線性化（delta method）估計。
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.basic_strategy import BasicStrategy
+from src.core.card_counter import WongHalvesCounter
+
+from .branching import BranchingSimulator
+from .engine import Simulator
+from .results import ResultHistograms, ResultRecorder
+from .runner import SimulationConfig, chunk_range, shoe_batch
+from .telemetry import Z_95
+
+# 可停用的偏移區段（deviations.yaml 的區段名稱 → BasicStrategy 屬性）
+DEVIATION_SECTIONS = {
+    "hard_hands": "hard_deviations",
+    "soft_hands": "soft_deviations",
+    "pairs": "pair_deviations",
+    "surrender": "surrender_deviations",
+}
+
+
+class StrategyVariant(NamedTuple):
+    """參與比較的策略設定（可傳遞到工作行程）"""
+
+    name: str
+    strategy_file: Optional[str] = None  # 省略時依模擬設定（規則策略表或 strategy.yaml）
+    deviations_file: Optional[str] = None
+    allow_surrender: Optional[bool] = None  # 預設依規則的 late_surrender
+    without: Tuple[str, ...] = ()  # 停用的偏移區段（DEVIATION_SECTIONS 或 "insurance"）
+
+
+def build_strategy(config: SimulationConfig, variant: StrategyVariant) -> BasicStrategy:
+    """
+    依模擬設定與策略設定建立策略引擎
+
+    Raises:
+        ValueError: 未知的偏移區段
+    """
+    rules = config.rules
+    allow_surrender = (
+        variant.allow_surrender if variant.allow_surrender is not None else rules.late_surrender
+    )
+    if variant.strategy_file is None and config.rules_chart:
+        strategy = BasicStrategy.from_rules(
+            rules,
+            variant.deviations_file,
+            allow_surrender,
+            cache_dir=config.cache_dir,
+            composition_dependent=config.composition_dependent,
+        )
+    else:
+        strategy = BasicStrategy(variant.strategy_file, variant.deviations_file, allow_surrender)
+    for section in variant.without:
+        if section == "insurance":
+            strategy.insurance_threshold = math.inf
+        elif section in DEVIATION_SECTIONS:
+            setattr(strategy, DEVIATION_SECTIONS[section], {})
+        else:
+            raise ValueError(f"未知的偏移區段：{section}")
+    return strategy
+
+
+class PairedDifference(NamedTuple):
+    """兩個策略的每輪期望值差（variant - baseline）"""
+
+    variant: str
+    baseline: str
+    ev_diff: float
+    stderr: float  # 配對（共同牌靴）的標準誤
+    low: float
+    high: float
+    independent_stderr: float  # 兩次獨立模擬相減時的標準誤（對照）
+
+
+class ComparisonResult(NamedTuple):
+    """配對比較的結果"""
+
+    names: List[str]
+    results: List[ResultHistograms]  # 各策略的統計
+    net: npt.NDArray[np.float64]  # 各牌靴各策略的淨輸贏，形狀 (shoes, variants)
+    rounds: npt.NDArray[np.float64]  # 各牌靴各策略的輪數，形狀 (shoes, variants)
+
+    @property
+    def shoes(self) -> int:
+        return int(self.net.shape[0])
+
+    def ev(self, variant: int) -> float:
+        """策略的每輪期望值（單位）"""
+        rounds = float(self.rounds[:, variant].sum())
+        return float(self.net[:, variant].sum()) / rounds if rounds else 0.0
+
+    def _residuals(self, variant: int) -> npt.NDArray[np.float64]:
+        """每輪期望值比值估計的每牌靴線性化殘差"""
+        mean_rounds = float(self.rounds[:, variant].mean())
+        residuals: npt.NDArray[np.float64] = (
+            self.net[:, variant] - self.ev(variant) * self.rounds[:, variant]
+        ) / mean_rounds
+        return residuals
+
+    def difference(self, variant: int, baseline: int = 0) -> PairedDifference:
+        """
+        兩個策略的每輪期望值差與配對信賴區間
+
+        Raises:
+            ValueError: 牌靴數少於 2
+        """
+        shoes = self.shoes
+        if shoes < 2:
+            raise ValueError(f"至少需要 2 個牌靴才能估計標準誤：{shoes}")
+        ours = self._residuals(variant)
+        theirs = self._residuals(baseline)
+        stderr = float(np.std(ours - theirs, ddof=1)) / math.sqrt(shoes)
+        independent = math.sqrt(float(np.var(ours, ddof=1) + np.var(theirs, ddof=1)) / shoes)
+        diff = self.ev(variant) - self.ev(baseline)
+        margin = Z_95 * stderr
+        return PairedDifference(
+            self.names[variant],
+            self.names[baseline],
+            diff,
+            stderr,
+            diff - margin,
+            diff + margin,
+            independent,
+        )
+
+    def differences(self, baseline: int = 0) -> List[PairedDifference]:
+        """其他所有策略相對於基準策略的差"""
+        return [
+            self.difference(variant, baseline)
+            for variant in range(len(self.names))
+            if variant != baseline
+        ]
+
+
+# 每個工作行程依設定快取各策略的模擬引擎
+_worker_simulators: Dict[
+    Tuple[SimulationConfig, Tuple[StrategyVariant, ...]], BranchingSimulator
+] = {}
+
+
+def _variant_simulators(
+    config: SimulationConfig, variants: Tuple[StrategyVariant, ...]
+) -> BranchingSimulator:
+    # 下注級距傳到工作行程後是新的物件，不作為快取鍵
+    key = (config._replace(bet_ramp=None), variants)
+    branching = _worker_simulators.get(key)
+    if branching is None:
+        simulators = []
+        for variant in variants:
+            counter = WongHalvesCounter(config.rules.decks, ace_side_count=config.ace_side_count)
+            simulators.append(Simulator(config.rules, build_strategy(config, variant), counter))
+        branching = BranchingSimulator(
+            simulators, WongHalvesCounter(config.rules.decks, ace_side_count=config.ace_side_count)
+        )
+        _worker_simulators[key] = branching
+    branching.counter.set_bet_ramp(config.bet_ramp)
+    for simulator in branching.simulators:
+        simulator.counter.set_bet_ramp(config.bet_ramp)
+    return branching
+
+
+def _compare_chunk(
+    job: Tuple[SimulationConfig, Tuple[StrategyVariant, ...], int, int, bool],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """讓所有策略玩牌靴 [start, stop)，回傳 (每牌靴淨輸贏, 每牌靴輪數, 各策略統計)"""
+    config, variants, start, stop, branch = job
+    branching = _variant_simulators(config, variants)
+    batch = shoe_batch(config, start, stop)
+    net = np.zeros((stop - start, len(variants)))
+    rounds = np.zeros((stop - start, len(variants)))
+    histograms = [ResultHistograms() for _ in variants]
+    recorders = [ResultRecorder() for _ in variants]
+    for shoe, (row, cut) in enumerate(zip(batch.cards.tolist(), batch.cuts.tolist())):
+        if branch:
+            rounds[shoe] = branching.play_shoe(row, batch.burn, cut, recorders)
+        else:
+            for index, simulator in enumerate(branching.simulators):
+                rounds[shoe, index] = simulator.play_shoe(row, batch.burn, cut, recorders[index])
+        for index, recorder in enumerate(recorders):
+            net[shoe, index] = recorder.net()
+            recorder.flush(histograms[index])
+    return net, rounds, np.stack([histogram.data for histogram in histograms])
+
+
+def compare_strategies(
+    config: SimulationConfig,
+    variants: Sequence[StrategyVariant],
+    shoes: int,
+    processes: int = 1,
+    branching: bool = True,
+) -> ComparisonResult:
+    """
+    讓多個策略玩相同的牌靴並配對比較
+
+    Args:
+        config: 模擬設定（牌靴、規則與下注級距；策略由各策略設定決定）
+        variants: 參與比較的策略；第一個為預設的基準
+        shoes: 牌靴數
+        processes: 工作行程數（結果與行程數無關）
+        branching: 以分支模擬共用決策相同的部分；否則每個策略逐一玩每個牌靴
+
+    Raises:
+        ValueError: 策略少於 2 個、名稱重複或牌靴數無效
+    """
+    names = [variant.name for variant in variants]
+    if len(names) < 2 or len(set(names)) != len(names):
+        raise ValueError(f"需要至少兩個名稱不重複的策略：{names}")
+    if shoes < 2 or config.chunk_shoes <= 0:
+        raise ValueError(f"無效的牌靴數或區塊大小：{shoes}, {config.chunk_shoes}")
+
+    config = config._replace(skip_true_counts=(), skip_cards=0.0)
+    chunks = -(-shoes // config.chunk_shoes)
+    jobs = [
+        (config, tuple(variants), *chunk_range(config, chunk, shoes), branching)
+        for chunk in range(chunks)
+    ]
+    if processes <= 1:
+        parts = [_compare_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            parts = list(executor.map(_compare_chunk, jobs))
+
+    # 依區塊順序合併（結果與行程數無關）
+    results = [ResultHistograms() for _ in variants]
+    for _, _, data in parts:
+        for index, histograms in enumerate(results):
+            histograms.merge(ResultHistograms(data[index]))
+    return ComparisonResult(
+        names,
+        results,
+        np.concatenate([part[0] for part in parts]),
+        np.concatenate([part[1] for part in parts]),
+    )
@@ -0,0 +1,334 @@
+"""
+單一玩家對莊家的牌局模擬引擎
+
+依牌靴順序發牌，以 WongHalvesCounter 計數、BasicStrategy 決策（含計數偏移），
+依 StrategyRules 處理加倍、分牌、投降、保險與莊家軟17，結果寫入 ResultRecorder。
+每張牌在亮出時計入計數；莊家暗牌在翻開時計入。
+
+可指定略過的真實計數區間（自適應模擬中已收斂的區間）：在這些區間開始的輪次不實際進行，
+只依平均每輪牌數前進並計數，把計算集中在仍需要樣本的區間。
+
+多策略分支模擬（見 branching）時，一個引擎代表一組狀態相同的策略出牌，
+其他策略的引擎作為跟隨者只在決策點比對決策；決策不同的跟隨者脫離本輪，另行重玩。
+"""
+
+from typing import Callable, Collection, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from src.analytics.shoe_history import CODE_TO_CARD
+from src.core.basic_strategy import BasicStrategy
+from src.core.card_counter import WongHalvesCounter
+from src.core.hand import Hand, HandStatus
+from src.core.strategy_generator import StrategyRules
+
+from .results import (
+    ACTION_INDEX,
+    HAND_CLASSES,
+    ResultRecorder,
+    hand_class_index,
+    tc_bin,
+    upcard_index,
+)
+
+_BLACKJACK = HAND_CLASSES.index("BJ")
+
+
+class Simulator:
+    """以核心策略與計數器逐輪模擬"""
+
+    def __init__(
+        self,
+        rules: StrategyRules,
+        strategy: Optional[BasicStrategy] = None,
+        counter: Optional[WongHalvesCounter] = None,
+    ) -> None:
+        """
+        Args:
+            rules: 牌桌規則
+            strategy: 策略引擎；省略時依規則建立（策略表快取於磁碟）
+            counter: 計數器；設定了下注級距時依真實計數下注，否則固定 1 單位
+        """
+        self.rules = rules
+        self.strategy = strategy if strategy is not None else BasicStrategy.from_rules(rules)
+        self.counter = counter if counter is not None else WongHalvesCounter(rules.decks)
+        self.rounds = 0
+        self.cards_played = 0  # 實際進行的輪次用掉的牌數
+        self.skipped_rounds = 0
+
+        # 略過的真實計數區間（直方圖位置，見 results.tc_bin）與每輪前進的平均牌數
+        self.skip_bins: FrozenSet[int] = frozenset()
+        self.skip_cards = 0.0
+        self._skip_carry = 0.0
+
+        # 分支模擬：決策與本引擎相同的跟隨引擎（共用計數器），與本輪決策不同而脫離的引擎
+        self.followers: List["Simulator"] = []
+        self.diverged: List["Simulator"] = []
+        # 給定 (本引擎, 手牌, 莊家明牌)，回傳決策可能與本引擎不同、需要逐一比對的引擎；
+        # None 表示比對所有跟隨引擎
+        self.suspects: Optional[
+            Callable[["Simulator", List[str], str], Collection["Simulator"]]
+        ] = None
+
+        # get_decision 回傳的動作文字 → 動作代碼
+        self._action_codes: Dict[str, str] = {}
+        for code in ("H", "S", "D", "R", "Y"):
+            action = self.strategy.action_codes.get(code, {}).get("action", "")
+            self._action_codes.setdefault(action, code)
+        self._stand_if_no_double = self.strategy.action_codes.get("Ds", {}).get("description", "")
+
+    def play_shoe(self, codes: Sequence[int], burn: int, cut: int, recorder: ResultRecorder) -> int:
+        """
+        玩完一個牌靴
+
+        Args:
+            codes: 整個牌靴的牌面代碼（CARD_CODES）
+            burn: 開頭燒掉的張數
+            cut: 切牌位置；到達後不再開始新的一輪
+            recorder: 結果紀錄
+
+        Returns:
+            本牌靴實際進行的輪數（不含略過的輪次）
+        """
+        cards = [CODE_TO_CARD[code] for code in codes]
+        counter = self.counter
+        counter.new_shoe()
+        skip_bins = self.skip_bins
+        self._skip_carry = 0.0
+        position = burn
+        rounds = 0
+        while position < cut:
+            if skip_bins and tc_bin(counter.get_true_count()) in skip_bins:
+                position = self._skip_round(cards, position)
+                continue
+            try:
+                end = self._play_round(cards, position, recorder)
+            except IndexError:
+                # 牌靴在一輪中途用盡（只在發牌深度接近 100% 時發生），捨棄該輪
+                break
+            self.cards_played += end - position
+            position = end
+            rounds += 1
+        self.rounds += rounds
+        return rounds
+
+    def set_skip(self, true_counts: Sequence[int], cards_per_round: float) -> None:
+        """
+        設定略過的真實計數區間
+
+        Args:
+            true_counts: 整數真實計數區間（傳入空序列則停用）
+            cards_per_round: 略過一輪時前進的平均牌數
+        """
+        if true_counts and cards_per_round <= 0:
+            raise ValueError(f"每輪牌數必須為正數：{cards_per_round}")
+        self.skip_bins = frozenset(tc_bin(true_count) for true_count in true_counts)
+        self.skip_cards = cards_per_round
+
+    def _skip_round(self, cards: List[str], position: int) -> int:
+        """略過一輪：只計數平均每輪牌數的牌（小數部分累積到下一次）"""
+        self._skip_carry += self.skip_cards
+        count = int(self._skip_carry)
+        self._skip_carry -= count
+        add_card = self.counter.add_card
+        for card in cards[position : position + count]:
+            add_card(card)
+        self.skipped_rounds += 1
+        return position + max(count, 1)
+
+    def _decide(self, hand: Hand, upcard: str, hands: int) -> str:
+        """依策略取得可執行的動作代碼（H/S/D/R/Y），並讓決策不同的跟隨引擎脫離"""
+        code = self._strategy_action(hand, upcard, hands)
+        if self.followers:
+            suspects = self.suspects(self, hand.cards, upcard) if self.suspects else None
+            if suspects is None or suspects:
+                self._check_followers(
+                    code, lambda other: other._strategy_action(hand, upcard, hands), suspects
+                )
+        return code
+
+    def _insurance(self, true_count: float) -> bool:
+        """是否買保險，並讓決定不同的跟隨引擎脫離"""
+        insurance = self.strategy.should_take_insurance(true_count)
+        if self.followers:
+            self._check_followers(
+                insurance, lambda other: other.strategy.should_take_insurance(true_count)
+            )
+        return insurance
+
+    def _check_followers(
+        self,
+        decision: object,
+        decide: Callable[["Simulator"], object],
+        suspects: Optional[Collection["Simulator"]] = None,
+    ) -> None:
+        followers: List[Simulator] = []
+        for follower in self.followers:
+            if (suspects is not None and follower not in suspects) or decide(follower) == decision:
+                followers.append(follower)
+            else:
+                self.diverged.append(follower)
+        self.followers = followers
+
+    def _strategy_action(self, hand: Hand, upcard: str, hands: int) -> str:
+        """依策略取得可執行的動作代碼（H/S/D/R/Y）"""
+        rules = self.rules
+        action, explanation = self.strategy.get_decision(
+            hand.cards, upcard, self.counter.get_playing_true_count()
+        )
+        code = self._action_codes.get(action, "")
+
+        if code == "Y":
+            can_split = hands < rules.max_split_hands and (
+                not hand.split_aces or rules.resplit_aces
+            )
+            if can_split:
+                return "Y"
+            code = self._table_action(hand, upcard)
+        elif not code:
+            # 不分牌的對子（偏移回傳空動作）改查硬牌 / 軟牌表
+            code = self._table_action(hand, upcard)
+
+        if code == "D":
+            if len(hand.cards) == 2 and (not hand.is_split_hand or rules.double_after_split):
+                return "D"
+            return "S" if explanation == self._stand_if_no_double else "H"
+        if code == "R":
+            if rules.late_surrender and hands == 1 and len(hand.cards) == 2:
+                return "R"
+            return "H"
+        return code
+
+    def _table_action(self, hand: Hand, upcard: str) -> str:
+        """不考慮對子時的策略表動作"""
+        strategy = self.strategy
+        value, is_soft = hand.calculate_value()
+        row = (strategy.soft_strategy if is_soft else strategy.hard_strategy).get(value)
+        if row is None:
+            return "S" if value >= 17 else "H"
+        code = row[strategy.dealer_card_index[upcard]]
+        if code == "Ds":
+            return "D" if len(hand.cards) == 2 else "S"
+        return code if code in ("H", "S", "D") else "H"
+
+    def _dealer_total(self, dealer: Hand, cards: List[str], position: int) -> Tuple[int, int]:
+        """莊家補牌，回傳 (點數, 新的牌位置)"""
+        add_card = self.counter.add_card
+        while True:
+            value, is_soft = dealer.calculate_value()
+            if value > 17 or (value == 17 and not (is_soft and self.rules.hit_soft_17)):
+                return value, position
+            card = cards[position]
+            position += 1
+            add_card(card)
+            dealer.add_card(card)
+
+    def _play_round(self, cards: List[str], position: int, recorder: ResultRecorder) -> int:
+        counter = self.counter
+        true_count = counter.get_true_count()
+        units = counter.get_bet_units()
+
+        if len(cards) - position < 4:
+            raise IndexError(position)
+        first, upcard, second, hole = cards[position : position + 4]
+        position += 4
+        for card in (first, upcard, second):
+            counter.add_card(card)
+        hand_index = hand_class_index(first, second)
+        up_index = upcard_index(upcard)
+
+        # 保險（莊家明牌為 A 時，依真實計數決定）
+        insurance = upcard == "A" and self._insurance(counter.get_playing_true_count())
+        dealer = Hand([upcard, hole])
+        dealer_blackjack = dealer.calculate_value()[0] == 21
+        player_blackjack = hand_index == _BLACKJACK
+
+        if dealer_blackjack or player_blackjack:
+            counter.add_card(hole)
+            if dealer_blackjack:
+                net = 0.0 if player_blackjack else -1.0
+                net += 1.0 if insurance else 0.0
+            else:
+                net = 1.5 - (0.5 if insurance else 0.0)
+            recorder.record(net * units, units, true_count, hand_index, up_index, 0)
+            return position
+
+        # 玩家決策
+        player = Hand([first, second])
+        hands = [player]
+        first_action = ""
+        surrendered = False
+        index = 0
+        while index < len(hands):
+            hand = hands[index]
+            if len(hand.cards) == 1:
+                card = cards[position]
+                position += 1
+                counter.add_card(card)
+                hand.add_card(card)
+            while hand.status == HandStatus.ACTIVE:
+                value, _ = hand.calculate_value()
+                if value > 21:
+                    hand.status = HandStatus.BUSTED
+                    break
+                if value == 21:
+                    hand.stand()
+                    break
+                code = self._decide(hand, upcard, len(hands))
+                if hand.split_aces and code != "Y":
+                    # 分A後只補一張牌（可再分A時仍可分牌）
+                    hand.stand()
+                    break
+                if not first_action:
+                    first_action = code
+                if code == "S":
+                    hand.stand()
+                elif code == "R":
+                    surrendered = True
+                    hand.stand()
+                elif code == "Y":
+                    split_card = hand.cards[0]
+                    hand.cards = [split_card]
+                    hand.is_split_hand = True
+                    new_hand = Hand([split_card])
+                    new_hand.is_split_hand = True
+                    if split_card == "A":
+                        hand.split_aces = new_hand.split_aces = True
+                    hands.insert(index + 1, new_hand)
+                    card = cards[position]
+                    position += 1
+                    counter.add_card(card)
+                    hand.add_card(card)
+                else:
+                    if code == "D":
+                        hand.double_down()
+                    card = cards[position]
+                    position += 1
+                    counter.add_card(card)
+                    hand.add_card(card)
+                    if code == "D" and hand.calculate_value()[0] > 21:
+                        hand.status = HandStatus.BUSTED
+            index += 1
+
+        # 莊家翻開暗牌並補牌
+        counter.add_card(hole)
+        live = not surrendered and any(hand.status != HandStatus.BUSTED for hand in hands)
+        dealer_value = 0
+        if live:
+            dealer_value, position = self._dealer_total(dealer, cards, position)
+
+        net = -0.5 if insurance else 0.0
+        if surrendered:
+            net -= 0.5
+        else:
+            for hand in hands:
+                bet = hand.bet_multiplier
+                value, _ = hand.calculate_value()
+                if value > 21:
+                    net -= bet
+                elif dealer_value > 21 or value > dealer_value:
+                    net += bet
+                elif value < dealer_value:
+                    net -= bet
+        recorder.record(
+            net * units, units, true_count, hand_index, up_index, ACTION_INDEX[first_action]
+        )
+        return position
@@ -0,0 +1,319 @@
+"""
+高真實計數的重要性抽樣
+
+Wong Halves 的優勢大多來自少見的高真實計數，一般洗牌很少產生這些狀態。
+傾斜牌靴讓前段（depth 張）的牌依計數值做指數傾斜：每次從剩餘的牌中
+以 exp(tilt × 計數值) 為權重抽出下一張，低牌（正計數值）較早出現，流水計數因而偏高；
+其餘的牌均勻洗牌。抽牌以指數競賽（依 Exp(1) / 權重排序）一次完成，
+順序的分布與逐張加權抽牌相同。
+
+前 k 張牌的似然比（均勻洗牌的機率 ÷ 傾斜洗牌的機率）可以精確計算：
+
+    log(p / q) = Σ_{i<k} [log(剩餘權重和) - log(剩餘張數) - log(第 i 張的權重)]
+
+每一輪以「發到該輪最後一張牌為止」的似然比加權（一輪的結束是停止時間，加權後仍不偏）。
+這個權重約為 exp(-tilt × 流水計數) 乘上與組成有關的常數，同一真實計數區間內的權重相近，
+因此高計數區間用較少的手數就能收斂。
+
+每個統計位置的期望值是比值估計 Σ w × 合計 / Σ w × 次數，分子、分母各自是不偏估計；
+標準誤以牌靴為單位的線性化估計。tilt = 0 時權重皆為 1，結果與一般模擬的平均相同。
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.analytics.shoe_history import CODE_TO_CARD
+from src.core.card_counter import WongHalvesCounter
+
+from .engine import Simulator
+from .results import (
+    BINS,
+    OVERALL_BIN,
+    TC_MAX,
+    TC_MIN,
+    TC_OFFSET,
+    BinStats,
+    ResultRecorder,
+    tc_bin,
+)
+from .runner import SimulationConfig, build_simulator, chunk_range
+from .shoes import SeededShoeSource, ShoeBatch
+
+TC_BUCKETS = TC_MAX - TC_MIN + 1
+# 真實計數區間之後接著「真實計數 ≥ k」的累計位置
+CUMULATIVE_OFFSET = BINS
+WEIGHTED_BINS = BINS + TC_BUCKETS
+
+# 加權統計的欄位：次數、Σ 加權合計、Σ 加權次數，以及每個牌靴加權合計 a 與加權次數 b 的
+# Σ a²、Σ a·b、Σ b²（標準誤用）
+SAMPLES, WEIGHTED_SUM, WEIGHTED_COUNT, SUM_SQUARES, CROSS, COUNT_SQUARES = range(6)
+WEIGHTED_FIELDS = 6
+
+
+class WeightedResults:
+    """以牌靴為獨立單位的加權統計"""
+
+    def __init__(
+        self,
+        data: Optional[npt.NDArray[np.float64]] = None,
+        weights: Optional[npt.NDArray[np.float64]] = None,
+    ) -> None:
+        """
+        Args:
+            data: 形狀 (WEIGHTED_FIELDS, WEIGHTED_BINS) 的統計；省略時建立空的統計
+            weights: 每輪權重的 (輪數, Σ w, Σ w²)
+        """
+        self.data = data if data is not None else np.zeros((WEIGHTED_FIELDS, WEIGHTED_BINS))
+        self.weights = weights if weights is not None else np.zeros(3)
+
+    def add_shoe(
+        self,
+        counts: npt.NDArray[np.float64],
+        weighted_counts: npt.NDArray[np.float64],
+        weighted_sums: npt.NDArray[np.float64],
+    ) -> None:
+        """併入一個牌靴在各位置（BINS）的次數、加權次數與加權合計"""
+        tc = slice(TC_OFFSET, TC_OFFSET + TC_BUCKETS)
+        columns = []
+        for values in (counts, weighted_counts, weighted_sums):
+            columns.append(np.concatenate([values, np.cumsum(values[tc][::-1])[::-1]]))
+        counts, weighted_counts, weighted_sums = columns
+        data = self.data
+        data[SAMPLES] += counts
+        data[WEIGHTED_SUM] += weighted_sums
+        data[WEIGHTED_COUNT] += weighted_counts
+        data[SUM_SQUARES] += weighted_sums * weighted_sums
+        data[CROSS] += weighted_sums * weighted_counts
+        data[COUNT_SQUARES] += weighted_counts * weighted_counts
+
+    def merge(self, other: "WeightedResults") -> None:
+        self.data += other.data
+        self.weights += other.weights
+
+    @property
+    def rounds(self) -> int:
+        return int(self.data[SAMPLES, OVERALL_BIN])
+
+    @property
+    def effective_rounds(self) -> float:
+        """有效輪數 (Σ w)² / Σ w²；權重越不平均越小"""
+        return float(self.weights[1] ** 2 / self.weights[2]) if self.weights[2] else 0.0
+
+    def stats(self, index: int) -> BinStats:
+        """
+        單一位置的比值估計
+
+        sd 為標準誤換算成的每筆標準差（stderr × √次數），只供與一般模擬比較
+        """
+        data = self.data[:, index]
+        samples = int(data[SAMPLES])
+        if samples == 0 or data[WEIGHTED_COUNT] <= 0:
+            return BinStats(0, 0.0, 0.0, 0.0)
+        mean = float(data[WEIGHTED_SUM] / data[WEIGHTED_COUNT])
+        spread = data[SUM_SQUARES] - 2 * mean * data[CROSS] + mean * mean * data[COUNT_SQUARES]
+        stderr = math.sqrt(max(float(spread), 0.0)) / float(data[WEIGHTED_COUNT])
+        return BinStats(samples, mean, stderr * math.sqrt(samples), stderr)
+
+    def overall(self) -> BinStats:
+        """每輪淨輸贏（單位）"""
+        return self.stats(OVERALL_BIN)
+
+    def by_true_count(self) -> Dict[int, BinStats]:
+        """各真實計數區間每單位下注的淨輸贏（只含有樣本的區間）"""
+        result: Dict[int, BinStats] = {}
+        for bucket in range(TC_MIN, TC_MAX + 1):
+            stats = self.stats(tc_bin(bucket))
+            if stats.samples:
+                result[bucket] = stats
+        return result
+
+    def at_least(self, true_count: int) -> BinStats:
+        """真實計數 ≥ true_count（區間下限）的每單位下注淨輸贏"""
+        bucket = min(max(true_count, TC_MIN), TC_MAX)
+        return self.stats(CUMULATIVE_OFFSET + bucket - TC_MIN)
+
+
+class TiltedShoeSource(SeededShoeSource):
+    """前段依計數值傾斜洗牌、附帶累積似然比的牌靴來源"""
+
+    def __init__(
+        self,
+        run_seed: int,
+        decks: int = 8,
+        penetration: float = 0.75,
+        burn: int = 1,
+        cut_jitter: int = 0,
+        batch_size: int = 1024,
+        start: int = 0,
+        stop: Optional[int] = None,
+        tilt: float = 0.1,
+        depth: Optional[int] = None,
+        card_values: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Args:
+            tilt: 傾斜強度（0 表示均勻洗牌；正值讓低牌先出現、真實計數偏高）
+            depth: 傾斜的張數；預設到切牌位置
+            card_values: 各牌面的計數值；預設為 Wong Halves
+            其餘參數同 SeededShoeSource（切牌位置相同）
+        """
+        super().__init__(run_seed, decks, penetration, burn, cut_jitter, batch_size, start, stop)
+        self.tilt = tilt
+        self.depth = depth if depth is not None else self.cut
+        if not 0 <= self.depth <= self.shoe_size:
+            raise ValueError(f"傾斜張數必須介於 0 與 {self.shoe_size} 之間：{self.depth}")
+        if card_values is None:
+            card_values = WongHalvesCounter(decks).card_values
+        values = np.array([card_values[CODE_TO_CARD[int(code)]] for code in self._ordered])
+        self._weights = np.exp(tilt * values)
+
+    def shoes(self, start: int, count: int) -> ShoeBatch:
+        """產生牌靴 [start, start + count)，與目前位置無關"""
+        cards = np.empty((count, self.shoe_size), dtype=np.uint8)
+        log_weights = np.empty((count, self.shoe_size + 1))
+        for row in range(count):
+            cards[row], log_weights[row] = self._tilted_shoe(start + row)
+        return ShoeBatch(cards, self._seeded_cuts(start, count), self.burn, log_weights)
+
+    def _tilted_shoe(
+        self, shoe_index: int
+    ) -> Tuple[npt.NDArray[np.uint8], npt.NDArray[np.float64]]:
+        generator = self.streams.shoe_generator(shoe_index)
+        weights = self._weights
+        order = np.argsort(generator.exponential(size=self.shoe_size) / weights, kind="stable")
+        head, tail = order[: self.depth], order[self.depth :]
+        order = np.concatenate([head, tail[generator.permutation(len(tail))]])
+
+        # 第 i 張的似然比因子：(剩餘權重和 / 剩餘張數) / 抽到的牌的權重
+        drawn = weights[head]
+        remaining = weights.sum() - np.concatenate([[0.0], np.cumsum(drawn)[:-1]])
+        left = self.shoe_size - np.arange(self.depth)
+        log_weights = np.zeros(self.shoe_size + 1)
+        log_weights[1 : self.depth + 1] = np.cumsum(
+            np.log(remaining) - np.log(left) - np.log(drawn)
+        )
+        log_weights[self.depth + 1 :] = log_weights[self.depth]
+        return self._ordered[order], log_weights
+
+
+class _WeightedRecorder(ResultRecorder):
+    """以發到該輪最後一張牌為止的似然比為每輪加權"""
+
+    def __init__(self, counter: WongHalvesCounter) -> None:
+        super().__init__()
+        self.counter = counter
+        self.burn = 0
+        self.log_weights: npt.NDArray[np.float64] = np.zeros(1)
+        self._weights: List[float] = []
+
+    def record(
+        self,
+        net: float,
+        units: int,
+        true_count: float,
+        hand_index: int,
+        up_index: int,
+        action_index: int,
+    ) -> None:
+        super().record(net, units, true_count, hand_index, up_index, action_index)
+        # 每張發出的牌都已計入計數器：目前牌位置 = 燒牌張數 + 已見張數
+        position = self.burn + self.counter.cards_seen
+        self._weights.append(math.exp(self.log_weights[position]))
+
+    def drain_shoe(self, results: WeightedResults) -> None:
+        """把暫存的輪次作為一個牌靴併入加權統計並清空"""
+        weights = np.array(self._weights)
+        bins = np.array(self._bins, dtype=np.intp)
+        values = np.array(self._values, dtype=np.float64)
+        per_bin = np.repeat(weights, 4)
+        results.add_shoe(
+            np.bincount(bins, minlength=BINS).astype(np.float64),
+            np.bincount(bins, per_bin, minlength=BINS).astype(np.float64),
+            np.bincount(bins, per_bin * values, minlength=BINS).astype(np.float64),
+        )
+        results.weights += (len(weights), weights.sum(), np.square(weights).sum())
+        self._bins.clear()
+        self._values.clear()
+        self._weights.clear()
+
+
+# 每個工作行程依設定快取模擬引擎
+_worker_simulators: Dict[SimulationConfig, Simulator] = {}
+
+
+def _importance_chunk(
+    job: Tuple[SimulationConfig, int, int, float, Optional[int]],
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """模擬傾斜牌靴 [start, stop)，回傳加權統計 (data, weights)"""
+    config, start, stop, tilt, depth = job
+    # 下注級距傳到工作行程後是新的物件，不作為快取鍵
+    key = config._replace(bet_ramp=None)
+    simulator = _worker_simulators.get(key)
+    if simulator is None:
+        simulator = build_simulator(key)
+        _worker_simulators[key] = simulator
+    simulator.counter.set_bet_ramp(config.bet_ramp)
+
+    source = TiltedShoeSource(
+        config.run_seed,
+        config.rules.decks,
+        config.penetration,
+        config.burn,
+        config.cut_jitter,
+        tilt=tilt,
+        depth=depth,
+        card_values=simulator.counter.card_values,
+    )
+    batch = source.shoes(start, stop - start)
+    assert batch.log_weights is not None
+    results = WeightedResults()
+    recorder = _WeightedRecorder(simulator.counter)
+    recorder.burn = batch.burn
+    for row, cut, log_weights in zip(batch.cards.tolist(), batch.cuts.tolist(), batch.log_weights):
+        recorder.log_weights = log_weights
+        simulator.play_shoe(row, batch.burn, cut, recorder)
+        recorder.drain_shoe(results)
+    return results.data, results.weights
+
+
+def run_importance(
+    config: SimulationConfig,
+    shoes: int,
+    tilt: float = 0.1,
+    depth: Optional[int] = None,
+    processes: int = 1,
+) -> WeightedResults:
+    """
+    以傾斜牌靴模擬並以似然比加權
+
+    Args:
+        config: 模擬設定（略過設定會被忽略）
+        shoes: 牌靴數
+        tilt: 傾斜強度（見 TiltedShoeSource）
+        depth: 傾斜的張數；預設到切牌位置
+        processes: 工作行程數（結果與行程數無關）
+
+    Raises:
+        ValueError: 牌靴數或區塊大小無效
+    """
+    if shoes <= 0 or config.chunk_shoes <= 0:
+        raise ValueError(f"無效的牌靴數或區塊大小：{shoes}, {config.chunk_shoes}")
+    config = config._replace(skip_true_counts=(), skip_cards=0.0)
+    chunks = -(-shoes // config.chunk_shoes)
+    jobs = [(config, *chunk_range(config, chunk, shoes), tilt, depth) for chunk in range(chunks)]
+    parts: List[Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]]
+    if processes <= 1:
+        parts = [_importance_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            parts = list(executor.map(_importance_chunk, jobs))
+
+    # 依區塊順序合併（結果與行程數無關）
+    results = WeightedResults()
+    for data, weights in parts:
+        results.merge(WeightedResults(data, weights))
+    return results
@@ -0,0 +1,337 @@
+"""
+模擬結果的固定大小直方圖與共享記憶體彙總
+
+每個工作通道（lane）在共享記憶體中有一塊固定大小的統計區，逐牌靴把結果以 Welford /
+Chan 可合併的形式（次數、平均、離差平方和 M2）累加進去；主行程在結束時依通道順序合併。
+行程間傳遞的資料量只與直方圖大小有關，與模擬手數無關。
+
+直方圖區段（同一個一維陣列的連續區段）：
+    OVERALL   每輪淨輸贏（單位），可與 bankroll.round_moments 比較
+    TC        每輪開始時的真實計數區間 [-10, 10]，每單位下注的淨輸贏
+    HAND      起始兩張牌類別 × 莊家明牌，每單位下注的淨輸贏
+    ACTION    起始手牌的第一個動作，每單位下注的淨輸贏
+"""
+
+import math
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+TC_MIN = -10
+TC_MAX = 10
+
+# 起始兩張牌類別：硬牌 5-20、軟牌 13-20、21點、對子（依牌值）
+HAND_CLASSES: List[str] = (
+    [f"H{value}" for value in range(5, 21)]
+    + [f"S{value}" for value in range(13, 21)]
+    + ["BJ"]
+    + [f"P{rank}" for rank in ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")]
+)
+UPCARDS: List[str] = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "A"]
+# 第一個動作；"-" 表示沒有決策（21點或莊家21點）
+ACTIONS: List[str] = ["-", "H", "S", "D", "Y", "R"]
+
+OVERALL_BIN = 0
+TC_OFFSET = 1
+HAND_OFFSET = TC_OFFSET + TC_MAX - TC_MIN + 1
+ACTION_OFFSET = HAND_OFFSET + len(HAND_CLASSES) * len(UPCARDS)
+BINS = ACTION_OFFSET + len(ACTIONS)
+
+# 統計欄位：次數、平均、M2
+FIELDS = 3
+
+_HAND_INDEX: Dict[str, int] = {name: index for index, name in enumerate(HAND_CLASSES)}
+_UPCARD_INDEX: Dict[str, int] = {card: index for index, card in enumerate(UPCARDS)}
+_UPCARD_INDEX.update({card: _UPCARD_INDEX["10"] for card in ("J", "Q", "K")})
+ACTION_INDEX: Dict[str, int] = {code: index for index, code in enumerate(ACTIONS)}
+
+_CARD_POINTS: Dict[str, int] = {"A": 11, "J": 10, "Q": 10, "K": 10}
+
+
+def _points(card: str) -> int:
+    return _CARD_POINTS.get(card) or int(card)
+
+
+def hand_class_index(first: str, second: str) -> int:
+    """起始兩張牌的類別索引（對 HAND_CLASSES）"""
+    if first == second:
+        return _HAND_INDEX["PA" if first == "A" else f"P{_points(first)}"]
+    total = _points(first) + _points(second)
+    if total == 21:
+        return _HAND_INDEX["BJ"]
+    if "A" in (first, second):
+        return _HAND_INDEX[f"S{total}"]
+    return _HAND_INDEX[f"H{total}"]
+
+
+def upcard_index(card: str) -> int:
+    """莊家明牌的索引（對 UPCARDS，J/Q/K 併入 10）"""
+    return _UPCARD_INDEX[card]
+
+
+def tc_bin(true_count: float) -> int:
+    """真實計數對應的直方圖位置（向下取整並截斷於 [TC_MIN, TC_MAX]）"""
+    bucket = min(max(math.floor(true_count), TC_MIN), TC_MAX)
+    return TC_OFFSET + bucket - TC_MIN
+
+
+class BinStats(NamedTuple):
+    """單一直方圖位置的統計"""
+
+    samples: int
+    mean: float
+    sd: float
+    stderr: float
+
+
+class ResultHistograms:
+    """固定大小的可合併統計（次數、平均、M2），資料可位於共享記憶體"""
+
+    def __init__(self, data: Optional[npt.NDArray[np.float64]] = None) -> None:
+        """
+        Args:
+            data: 形狀 (FIELDS, BINS) 的 float64 陣列（例如共享記憶體的視圖）；
+                  省略時配置新的零陣列
+        """
+        if data is None:
+            data = np.zeros((FIELDS, BINS), dtype=np.float64)
+        if data.shape != (FIELDS, BINS):
+            raise ValueError(f"統計陣列形狀錯誤：{data.shape}")
+        self.data = data
+
+    @property
+    def count(self) -> npt.NDArray[np.float64]:
+        row: npt.NDArray[np.float64] = self.data[0]
+        return row
+
+    @property
+    def mean(self) -> npt.NDArray[np.float64]:
+        row: npt.NDArray[np.float64] = self.data[1]
+        return row
+
+    @property
+    def m2(self) -> npt.NDArray[np.float64]:
+        row: npt.NDArray[np.float64] = self.data[2]
+        return row
+
+    def _combine(
+        self,
+        count: npt.NDArray[np.float64],
+        mean: npt.NDArray[np.float64],
+        m2: npt.NDArray[np.float64],
+    ) -> None:
+        """Chan 等人的平行合併公式，就地更新"""
+        total = self.count + count
+        fraction = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        delta = mean - self.mean
+        self.m2[:] += m2 + delta * delta * self.count * fraction
+        self.mean[:] += delta * fraction
+        self.count[:] = total
+
+    def add_batch(self, bins: npt.NDArray[np.intp], values: npt.NDArray[np.float64]) -> None:
+        """加入一批樣本（bins[i] 位置的一個值 values[i]）"""
+        if not len(bins):
+            return
+        count = np.bincount(bins, minlength=BINS).astype(np.float64)
+        sums = np.bincount(bins, weights=values, minlength=BINS)
+        mean = np.divide(sums, count, out=np.zeros(BINS), where=count > 0)
+        deviation = values - mean[bins]
+        m2 = np.asarray(
+            np.bincount(bins, weights=deviation * deviation, minlength=BINS), dtype=np.float64
+        )
+        self._combine(count, mean, m2)
+
+    def merge(self, other: "ResultHistograms") -> None:
+        """合併另一份統計"""
+        self._combine(other.count.copy(), other.mean.copy(), other.m2.copy())
+
+    def copy(self) -> "ResultHistograms":
+        return ResultHistograms(self.data.copy())
+
+    def stats(self, index: int) -> BinStats:
+        """單一位置的次數、平均、標準差與平均的標準誤"""
+        count = int(self.count[index])
+        if count == 0:
+            return BinStats(0, 0.0, 0.0, 0.0)
+        variance = float(self.m2[index]) / (count - 1) if count > 1 else 0.0
+        sd = math.sqrt(max(variance, 0.0))
+        return BinStats(count, float(self.mean[index]), sd, sd / math.sqrt(count))
+
+    @property
+    def rounds(self) -> int:
+        return int(self.count[OVERALL_BIN])
+
+    def overall(self) -> BinStats:
+        """每輪淨輸贏（單位）"""
+        return self.stats(OVERALL_BIN)
+
+    def by_true_count(self) -> Dict[int, BinStats]:
+        """各真實計數區間每單位下注的淨輸贏（只含有樣本的區間）"""
+        result: Dict[int, BinStats] = {}
+        for bucket in range(TC_MIN, TC_MAX + 1):
+            stats = self.stats(TC_OFFSET + bucket - TC_MIN)
+            if stats.samples:
+                result[bucket] = stats
+        return result
+
+    def by_hand(self) -> Dict[Tuple[str, str], BinStats]:
+        """各 (起始手牌類別, 莊家明牌) 每單位下注的淨輸贏（只含有樣本的組合）"""
+        result: Dict[Tuple[str, str], BinStats] = {}
+        for hand_index, hand in enumerate(HAND_CLASSES):
+            for up_index, upcard in enumerate(UPCARDS):
+                stats = self.stats(HAND_OFFSET + hand_index * len(UPCARDS) + up_index)
+                if stats.samples:
+                    result[(hand, upcard)] = stats
+        return result
+
+    def by_action(self) -> Dict[str, BinStats]:
+        """各第一個動作每單位下注的淨輸贏（只含有樣本的動作）"""
+        result: Dict[str, BinStats] = {}
+        for index, action in enumerate(ACTIONS):
+            stats = self.stats(ACTION_OFFSET + index)
+            if stats.samples:
+                result[action] = stats
+        return result
+
+
+class ResultRecorder:
+    """在工作通道內暫存每輪結果，批次寫入直方圖"""
+
+    def __init__(self) -> None:
+        self._bins: List[int] = []
+        self._values: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values) // 4
+
+    def record(
+        self,
+        net: float,
+        units: int,
+        true_count: float,
+        hand_index: int,
+        up_index: int,
+        action_index: int,
+    ) -> None:
+        """
+        記錄一輪結果
+
+        Args:
+            net: 淨輸贏（單位）
+            units: 起始下注單位
+            true_count: 下注時的真實計數
+            hand_index: 起始手牌類別（hand_class_index）
+            up_index: 莊家明牌（upcard_index）
+            action_index: 第一個動作（ACTION_INDEX）
+        """
+        per_unit = net / units
+        self._bins += (
+            OVERALL_BIN,
+            tc_bin(true_count),
+            HAND_OFFSET + hand_index * len(UPCARDS) + up_index,
+            ACTION_OFFSET + action_index,
+        )
+        self._values += (net, per_unit, per_unit, per_unit)
+
+    def net(self) -> float:
+        """暫存輪次的淨輸贏合計（單位）"""
+        return math.fsum(self._values[0::4])
+
+    def flush(self, histograms: ResultHistograms) -> None:
+        """把暫存的結果併入直方圖並清空"""
+        histograms.add_batch(
+            np.array(self._bins, dtype=np.intp), np.array(self._values, dtype=np.float64)
+        )
+        self._bins.clear()
+        self._values.clear()
+
+
+# 每個通道的進度欄位：下一個區塊編號、已完成輪數
+PROGRESS_FIELDS = 2
+
+# 每個通道的即時計數（每個牌靴更新一次、不取鎖，只供監控）
+TELEMETRY_PID = 0  # 處理該通道的行程編號（0 表示尚未開始）
+TELEMETRY_SHOES = 1  # 本次執行完成的牌靴數
+TELEMETRY_ROUNDS = 2  # 本次執行完成的輪數
+TELEMETRY_STARTED = 3  # 開始時間（time.time()）
+TELEMETRY_UPDATED = 4  # 最後更新時間
+TELEMETRY_FIELDS = 5
+
+
+def merge_lanes(stats: npt.NDArray[np.float64]) -> ResultHistograms:
+    """依通道順序合併形狀 (lanes, FIELDS, BINS) 的統計（結果與工作行程數無關）"""
+    total = ResultHistograms()
+    for lane in stats:
+        total.merge(ResultHistograms(lane))
+    return total
+
+
+class SharedResults:
+    """共享記憶體中每個工作通道一份的統計區、進度與即時計數"""
+
+    def __init__(self, lanes: int, name: Optional[str] = None) -> None:
+        """
+        Args:
+            lanes: 工作通道數
+            name: 既有共享記憶體的名稱；省略時建立新的區塊（由建立者負責 unlink）
+        """
+        if lanes <= 0:
+            raise ValueError(f"工作通道數必須為正數：{lanes}")
+        stats_size = lanes * FIELDS * BINS * 8
+        progress_size = lanes * PROGRESS_FIELDS * 8
+        size = stats_size + progress_size + lanes * TELEMETRY_FIELDS * 8
+        self.lanes = lanes
+        self.owner = name is None
+        self._memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self._array: npt.NDArray[np.float64] = np.ndarray(
+            (lanes, FIELDS, BINS), dtype=np.float64, buffer=self._memory.buf
+        )
+        # progress[lane] = (下一個區塊編號, 已完成輪數)
+        self.progress: npt.NDArray[np.int64] = np.ndarray(
+            (lanes, PROGRESS_FIELDS), dtype=np.int64, buffer=self._memory.buf, offset=stats_size
+        )
+        self.telemetry: npt.NDArray[np.float64] = np.ndarray(
+            (lanes, TELEMETRY_FIELDS),
+            dtype=np.float64,
+            buffer=self._memory.buf,
+            offset=stats_size + progress_size,
+        )
+        if self.owner:
+            self._array.fill(0.0)
+            self.telemetry.fill(0.0)
+            self.progress[:, 0] = np.arange(lanes)
+            self.progress[:, 1] = 0
+
+    @property
+    def stats(self) -> npt.NDArray[np.float64]:
+        """所有通道的統計，形狀 (lanes, FIELDS, BINS)"""
+        return self._array
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def lane(self, index: int) -> ResultHistograms:
+        """工作通道的統計（共享記憶體的視圖）"""
+        return ResultHistograms(self._array[index])
+
+    def merged(self) -> ResultHistograms:
+        """依通道順序合併所有通道（結果與工作行程數無關）"""
+        return merge_lanes(self._array)
+
+    def close(self) -> None:
+        """釋放對應；建立者同時刪除共享記憶體"""
+        del self._array
+        del self.progress
+        del self.telemetry
+        self._memory.close()
+        if self.owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> "SharedResults":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
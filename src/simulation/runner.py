@@ -0,0 +1,410 @@
+"""
+多行程模擬執行
+
+牌靴編號 [0, shoes) 切成固定大小的區塊，區塊 c 由工作通道 c % lanes 依序處理；
+每個通道把結果累加到共享記憶體中自己的統計區，工作行程只回傳輪數。
+牌靴內容只由 (執行種子, 牌靴編號) 決定、通道的合併順序固定，
+因此同一組設定不論工作行程數多少，結果都完全相同。
+
+指定檢查點檔案時，每隔固定時間在各通道的鎖內複製統計與進度並寫入檔案；
+下次以相同設定執行時從檢查點繼續。鎖只在每個區塊結束併入統計時取得一次，
+檢查點的成本只有定期複製固定大小的陣列。
+
+指定狀態檔或終端機儀表板時，同樣定期整理各通道的即時計數（見 telemetry）。
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from src.analytics.shoe_history import ShoeHistoryReader
+from src.core.basic_strategy import BasicStrategy
+from src.core.bet_spread import BetRamp
+from src.core.card_counter import WongHalvesCounter
+from src.core.strategy_generator import StrategyRules
+
+from .checkpoint import Checkpoint, config_fingerprint, load_checkpoint, save_checkpoint
+from .engine import Simulator
+from .results import (
+    TELEMETRY_PID,
+    TELEMETRY_ROUNDS,
+    TELEMETRY_SHOES,
+    TELEMETRY_STARTED,
+    TELEMETRY_UPDATED,
+    ResultHistograms,
+    ResultRecorder,
+    SharedResults,
+)
+from .shoes import SeededShoeSource, ShoeBatch
+from .telemetry import Dashboard, collect_status, write_status
+
+
+class SimulationConfig(NamedTuple):
+    """模擬設定（可傳遞到工作行程）"""
+
+    rules: StrategyRules = StrategyRules()
+    run_seed: int = 0
+    penetration: float = 0.75
+    burn: int = 1
+    cut_jitter: int = 0
+    bet_ramp: Optional[BetRamp] = None
+    chunk_shoes: int = 64  # 每個區塊的牌靴數
+    lanes: int = 8  # 工作通道數（決定結果的合併方式，與行程數無關）
+    rules_chart: bool = True  # 依規則產生策略表；否則使用 strategy.yaml
+    composition_dependent: bool = False
+    ace_side_count: bool = False  # 下注與玩牌使用 A 旁計調整的真實計數
+    cache_dir: Optional[str] = None
+    # 略過的真實計數區間與略過時每輪前進的平均牌數（自適應模擬使用）
+    skip_true_counts: Tuple[int, ...] = ()
+    skip_cards: float = 0.0
+
+
+def build_simulator(config: SimulationConfig) -> Simulator:
+    """依設定建立模擬引擎"""
+    rules = config.rules
+    if config.rules_chart:
+        strategy = BasicStrategy.from_rules(
+            rules,
+            cache_dir=config.cache_dir,
+            composition_dependent=config.composition_dependent,
+        )
+    else:
+        strategy = BasicStrategy(allow_surrender=rules.late_surrender)
+    counter = WongHalvesCounter(rules.decks, ace_side_count=config.ace_side_count)
+    counter.set_bet_ramp(config.bet_ramp)
+    simulator = Simulator(rules, strategy, counter)
+    simulator.set_skip(config.skip_true_counts, config.skip_cards)
+    return simulator
+
+
+def chunk_range(config: SimulationConfig, chunk: int, shoes: int) -> Tuple[int, int]:
+    """區塊對應的牌靴編號範圍 [start, stop)"""
+    start = chunk * config.chunk_shoes
+    return start, min(start + config.chunk_shoes, shoes)
+
+
+def shoe_batch(config: SimulationConfig, start: int, stop: int) -> ShoeBatch:
+    """牌靴 [start, stop) 的牌面與切牌位置"""
+    source = SeededShoeSource(
+        config.run_seed,
+        config.rules.decks,
+        config.penetration,
+        config.burn,
+        config.cut_jitter,
+        batch_size=stop - start,
+        start=start,
+        stop=stop,
+    )
+    return source.next_batch()
+
+
+def play_chunk(
+    simulator: Simulator,
+    config: SimulationConfig,
+    start: int,
+    stop: int,
+    recorder: ResultRecorder,
+    telemetry: Optional[npt.NDArray[np.float64]] = None,
+) -> int:
+    """
+    模擬牌靴 [start, stop) 並記錄結果，回傳輪數
+
+    Args:
+        telemetry: 通道的即時計數列；每完成一個牌靴更新一次
+    """
+    batch = shoe_batch(config, start, stop)
+    rounds = 0
+    for row, cut in zip(batch.cards.tolist(), batch.cuts.tolist()):
+        shoe_rounds = simulator.play_shoe(row, batch.burn, cut, recorder)
+        rounds += shoe_rounds
+        if telemetry is not None:
+            telemetry[TELEMETRY_SHOES] += 1
+            telemetry[TELEMETRY_ROUNDS] += shoe_rounds
+            telemetry[TELEMETRY_UPDATED] = time.time()
+    return rounds
+
+
+def replay_history(
+    config: SimulationConfig,
+    reader: ShoeHistoryReader,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> ResultHistograms:
+    """
+    重播模式：以牌靴歷史檔記錄的出牌順序作為牌靴，用設定的策略與下注級距重玩
+
+    記錄中所有角色的牌依原順序組成牌靴，不燒牌、在最後一張牌切牌。
+    策略與記錄的打法不同時，同樣的牌可能被分到不同的手牌，牌靴也可能提前用盡（捨棄該輪）。
+
+    Args:
+        config: 模擬設定（使用其中的規則、策略與下注級距）
+        reader: 牌靴歷史檔
+        start: 第一個牌靴編號
+        stop: 結束牌靴編號（不含；省略時到最後）
+
+    Returns:
+        重播的統計
+    """
+    simulator = build_simulator(config)
+    recorder = ResultRecorder()
+    histograms = ResultHistograms()
+    for shoe in reader.iter_shoes(start, stop):
+        codes = shoe.cards.tolist()
+        simulator.play_shoe(codes, 0, len(codes), recorder)
+        recorder.flush(histograms)
+    return histograms
+
+
+# 每個工作行程依設定快取模擬引擎
+_worker_simulators: Dict[SimulationConfig, Simulator] = {}
+# 各通道的鎖（工作行程啟動時設定；單一行程執行時不需要）
+_lane_locks: List[Any] = []
+
+
+def _init_worker(locks: List[Any]) -> None:
+    global _lane_locks
+    _lane_locks = locks
+
+
+def _worker_simulator(config: SimulationConfig) -> Simulator:
+    # 下注級距與略過設定不影響策略表，不作為快取鍵（下注級距傳到工作行程後是新的物件）
+    key = config._replace(bet_ramp=None, skip_true_counts=(), skip_cards=0.0)
+    simulator = _worker_simulators.get(key)
+    if simulator is None:
+        simulator = build_simulator(key)
+        _worker_simulators[key] = simulator
+    simulator.counter.set_bet_ramp(config.bet_ramp)
+    simulator.set_skip(config.skip_true_counts, config.skip_cards)
+    return simulator
+
+
+def _lane_steps(
+    shared: SharedResults, config: SimulationConfig, shoes: int, lane: int
+) -> Iterator[int]:
+    """從通道目前的進度開始，每完成一個區塊併入統計並產生該區塊的輪數"""
+    simulator = _worker_simulator(config)
+    histograms = shared.lane(lane)
+    progress = shared.progress[lane]
+    telemetry = shared.telemetry[lane]
+    telemetry[TELEMETRY_PID] = os.getpid()
+    telemetry[TELEMETRY_STARTED] = telemetry[TELEMETRY_UPDATED] = time.time()
+    lock: ContextManager[Any] = _lane_locks[lane] if _lane_locks else nullcontext()
+    recorder = ResultRecorder()
+    chunks = -(-shoes // config.chunk_shoes)
+    try:
+        for chunk in range(int(progress[0]), chunks, config.lanes):
+            start, stop = chunk_range(config, chunk, shoes)
+            rounds = play_chunk(simulator, config, start, stop, recorder, telemetry)
+            with lock:
+                recorder.flush(histograms)
+                progress[0] = chunk + config.lanes
+                progress[1] += rounds
+            yield rounds
+    finally:
+        del histograms, progress, telemetry
+
+
+def _run_lane(job: Tuple[str, SimulationConfig, int, int]) -> Tuple[int, int]:
+    """工作通道：依序處理 lane, lane + lanes, ... 中尚未完成的區塊，回傳 (輪數, 用掉的牌數)"""
+    name, config, shoes, lane = job
+    shared = SharedResults(config.lanes, name)
+    simulator = _worker_simulator(config)
+    cards = simulator.cards_played
+    try:
+        rounds = sum(_lane_steps(shared, config, shoes, lane))
+    finally:
+        shared.close()
+    return rounds, simulator.cards_played - cards
+
+
+def _snapshot(shared: SharedResults, fingerprint: str, shoes: int, locks: List[Any]) -> Checkpoint:
+    """在各通道的鎖內複製統計與進度"""
+    stats = np.empty_like(shared.stats)
+    progress = np.empty_like(shared.progress)
+    for lane in range(shared.lanes):
+        lock: ContextManager[Any] = locks[lane] if locks else nullcontext()
+        with lock:
+            stats[lane] = shared.stats[lane]
+            progress[lane] = shared.progress[lane]
+    return Checkpoint(fingerprint, shoes, stats, progress)
+
+
+class _Monitor:
+    """定期寫入檢查點與執行狀態"""
+
+    def __init__(
+        self,
+        shared: SharedResults,
+        config: SimulationConfig,
+        shoes: int,
+        checkpoint: Optional[Union[str, Path]],
+        checkpoint_interval: float,
+        status_file: Optional[Union[str, Path]],
+        dashboard: Optional[IO[str]],
+        status_interval: float,
+    ) -> None:
+        self.shared = shared
+        self.config = config
+        self.shoes = shoes
+        self.fingerprint = config_fingerprint(config)
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.status_file = status_file
+        self.dashboard = Dashboard(dashboard) if dashboard is not None else None
+        self.status_interval = status_interval
+        self.started = time.monotonic()
+        self._last_checkpoint = self._last_status = self.started
+
+    @property
+    def reporting(self) -> bool:
+        return self.status_file is not None or self.dashboard is not None
+
+    def timeout(self) -> Optional[float]:
+        """等待工作行程時的逾時（沒有定期工作時為 None）"""
+        intervals = []
+        if self.checkpoint is not None:
+            intervals.append(self.checkpoint_interval)
+        if self.reporting:
+            intervals.append(self.status_interval)
+        return min(intervals) if intervals else None
+
+    def tick(self, locks: List[Any], final: bool = False) -> None:
+        now = time.monotonic()
+        checkpoint_due = self.checkpoint is not None and (
+            final or now - self._last_checkpoint >= self.checkpoint_interval
+        )
+        status_due = self.reporting and (final or now - self._last_status >= self.status_interval)
+        if not (checkpoint_due or status_due):
+            return
+        snapshot = _snapshot(self.shared, self.fingerprint, self.shoes, locks)
+        if checkpoint_due and self.checkpoint is not None:
+            save_checkpoint(self.checkpoint, snapshot)
+            self._last_checkpoint = now
+        if status_due:
+            status = collect_status(
+                snapshot, self.shared.telemetry.copy(), self.config, now - self.started
+            )
+            if self.status_file is not None:
+                write_status(self.status_file, status)
+            if self.dashboard is not None:
+                self.dashboard.update(status)
+            self._last_status = now
+
+
+def run_lanes(
+    shared: SharedResults,
+    config: SimulationConfig,
+    shoes: int,
+    processes: int = 1,
+    monitor: Optional[_Monitor] = None,
+) -> Tuple[int, int]:
+    """
+    讓所有通道從目前進度繼續，直到完成牌靴 [0, shoes)
+
+    可對同一份 SharedResults 以遞增的牌靴數重複呼叫（牌靴數為區塊大小的倍數時，
+    結果與一次執行相同）。
+
+    Returns:
+        本次呼叫進行的 (輪數, 用掉的牌數)
+    """
+    rounds = cards = 0
+    if processes <= 1:
+        simulator = _worker_simulator(config)
+        cards = simulator.cards_played
+        for lane in range(config.lanes):
+            for chunk_rounds in _lane_steps(shared, config, shoes, lane):
+                rounds += chunk_rounds
+                if monitor is not None:
+                    monitor.tick([])
+        return rounds, simulator.cards_played - cards
+
+    locks = [multiprocessing.Lock() for _ in range(config.lanes)]
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(locks,)
+    ) as executor:
+        pending = {
+            executor.submit(_run_lane, (shared.name, config, shoes, lane))
+            for lane in range(config.lanes)
+        }
+        while pending:
+            timeout = monitor.timeout() if monitor is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_EXCEPTION)
+            for future in done:
+                lane_rounds, lane_cards = future.result()
+                rounds += lane_rounds
+                cards += lane_cards
+            if pending and monitor is not None:
+                monitor.tick(locks)
+    return rounds, cards
+
+
+def run_simulation(
+    config: SimulationConfig,
+    shoes: int,
+    processes: int = 1,
+    checkpoint: Optional[Union[str, Path]] = None,
+    checkpoint_interval: float = 60.0,
+    status_file: Optional[Union[str, Path]] = None,
+    dashboard: Optional[IO[str]] = None,
+    status_interval: float = 2.0,
+) -> ResultHistograms:
+    """
+    模擬指定數量的牌靴
+
+    Args:
+        config: 模擬設定
+        shoes: 牌靴數
+        processes: 工作行程數（1 表示在目前行程執行）
+        checkpoint: 檢查點檔案；存在時從檔案繼續，執行中定期更新，完成時寫入最終狀態
+        checkpoint_interval: 檢查點間隔（秒）
+        status_file: 定期覆寫的執行狀態 JSON 檔
+        dashboard: 顯示即時狀態表格的文字串流（例如 sys.stderr）
+        status_interval: 執行狀態更新間隔（秒）
+
+    Returns:
+        合併後的統計
+
+    Raises:
+        ValueError: 檢查點與設定或牌靴數不符
+    """
+    if shoes < 0 or config.chunk_shoes <= 0:
+        raise ValueError(f"無效的牌靴數或區塊大小：{shoes}, {config.chunk_shoes}")
+    with SharedResults(config.lanes) as shared:
+        if checkpoint is not None and Path(checkpoint).exists():
+            state = load_checkpoint(checkpoint)
+            state.validate(config, shoes)
+            shared.stats[:] = state.stats
+            shared.progress[:] = state.progress
+
+        monitor = _Monitor(
+            shared,
+            config,
+            shoes,
+            checkpoint,
+            checkpoint_interval,
+            status_file,
+            dashboard,
+            status_interval,
+        )
+        run_lanes(shared, config, shoes, processes, monitor)
+
+        monitor.tick([], final=True)
+        return shared.merged()
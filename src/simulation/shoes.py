@@ -0,0 +1,293 @@
+"""
+模擬用牌靴來源：批次洗牌與預先產生的牌靴檔
+
+牌以 uint8 代碼表示（與 analytics.shoe_history 的 CARD_CODES 相同，A = 1 … K = 13），
+一批牌靴為 (批次, 總張數) 的二維陣列。
+
+    RandomShoeSource   以 NumPy Generator 逐列洗牌（Generator.permuted），每次產生一整批
+    MemmapShoeSource   從預先產生的 .npy 檔以記憶體映射讀取，適合可重現的效能測試
+    SeededShoeSource   每個牌靴只由 (執行種子, 牌靴編號) 決定，可定位、可單獨重播，
+                       平行切分牌靴範圍時結果與行程數無關
+
+三種來源都提供切牌位置（發牌深度，可加隨機偏移）與燒牌張數；每個牌靴實際發出的牌為
+cards[burn:cut]。前兩者的切牌偏移依序由來源的亂數產生器抽取，SeededShoeSource 的偏移則與
+洗牌一樣由牌靴編號決定，單獨重播一個牌靴時切牌位置也相同。
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.analytics.shoe_history import CARD_CODES
+
+from .streams import RunStreams
+
+CARDS_PER_DECK = 52
+
+
+class ShoeBatch(NamedTuple):
+    """一批牌靴"""
+
+    cards: npt.NDArray[np.uint8]  # (批次, 總張數)
+    cuts: npt.NDArray[np.int64]  # 每個牌靴的切牌位置（之前的牌會被發出）
+    burn: int  # 每個牌靴開頭燒掉的張數
+    # 重要性抽樣時前 k 張牌的累積對數似然比 log(p / q)，形狀 (批次, 總張數 + 1)；
+    # 一般洗牌為 None（權重皆為 1）
+    log_weights: Optional[npt.NDArray[np.float64]] = None
+
+
+def ordered_shoe(decks: int) -> npt.NDArray[np.uint8]:
+    """未洗牌的牌靴（牌面代碼）"""
+    deck = np.repeat(np.array(sorted(CARD_CODES.values()), dtype=np.uint8), 4)
+    return np.tile(deck, decks)
+
+
+class _ShoeSourceBase(ABC):
+    """切牌位置與燒牌的共用邏輯；子類別實作 next_batch"""
+
+    def __init__(
+        self,
+        shoe_size: int,
+        penetration: float,
+        burn: int,
+        cut_jitter: int,
+        batch_size: int,
+        seed: Optional[int],
+    ) -> None:
+        if not 0 < penetration <= 1:
+            raise ValueError(f"發牌深度必須介於 0 與 1 之間：{penetration}")
+        if burn < 0 or batch_size <= 0 or cut_jitter < 0:
+            raise ValueError("燒牌張數、批次大小與切牌偏移不可為負數")
+        self.shoe_size = shoe_size
+        self.penetration = penetration
+        self.burn = burn
+        self.cut_jitter = cut_jitter
+        self.batch_size = batch_size
+        self.cut = int(shoe_size * penetration)
+        if self.cut <= burn:
+            raise ValueError("切牌位置必須在燒牌之後")
+        self._rng = np.random.default_rng(seed)
+
+    def _cuts(self, size: int) -> npt.NDArray[np.int64]:
+        if not self.cut_jitter:
+            return np.full(size, self.cut, dtype=np.int64)
+        offsets = self._rng.integers(-self.cut_jitter, self.cut_jitter + 1, size=size)
+        cuts: npt.NDArray[np.int64] = np.clip(self.cut + offsets, self.burn + 1, self.shoe_size)
+        return cuts.astype(np.int64)
+
+    @abstractmethod
+    def next_batch(self, size: Optional[int] = None) -> ShoeBatch:
+        """
+        產生下一批牌靴
+
+        Args:
+            size: 批次大小（省略時使用 batch_size）
+
+        Raises:
+            StopIteration: 沒有更多牌靴
+        """
+
+    def __iter__(self) -> Iterator[npt.NDArray[np.uint8]]:
+        """逐一產生每個牌靴實際發出的牌（cards[burn:cut] 的視圖）"""
+        while True:
+            try:
+                batch = self.next_batch()
+            except StopIteration:
+                return
+            for row, cut in zip(batch.cards, batch.cuts):
+                yield row[batch.burn : cut]
+
+
+class RandomShoeSource(_ShoeSourceBase):
+    """以 NumPy Generator 批次洗牌的牌靴來源"""
+
+    def __init__(
+        self,
+        decks: int = 8,
+        penetration: float = 0.75,
+        burn: int = 1,
+        cut_jitter: int = 0,
+        batch_size: int = 1024,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            decks: 牌副數
+            penetration: 發牌深度（切牌位置佔總張數的比例）
+            burn: 每個牌靴開頭燒掉的張數
+            cut_jitter: 切牌位置的隨機偏移範圍（± 張）
+            batch_size: 每批牌靴數
+            seed: 亂數種子
+        """
+        super().__init__(decks * CARDS_PER_DECK, penetration, burn, cut_jitter, batch_size, seed)
+        self.decks = decks
+        self._ordered = ordered_shoe(decks)
+        self._buffer = np.empty((batch_size, self.shoe_size), dtype=np.uint8)
+
+    def next_batch(self, size: Optional[int] = None) -> ShoeBatch:
+        """
+        產生一批新洗好的牌靴
+
+        回傳的陣列在下一次呼叫時會被覆寫；需要保留時請自行複製。
+        """
+        size = self.batch_size if size is None else size
+        if size > len(self._buffer):
+            self._buffer = np.empty((size, self.shoe_size), dtype=np.uint8)
+        cards = self._buffer[:size]
+        cards[:] = self._ordered
+        self._rng.permuted(cards, axis=1, out=cards)
+        return ShoeBatch(cards, self._cuts(size), self.burn)
+
+
+class MemmapShoeSource(_ShoeSourceBase):
+    """從預先產生的牌靴檔（.npy，uint8 二維陣列）以記憶體映射串流讀取"""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        penetration: float = 0.75,
+        burn: int = 1,
+        cut_jitter: int = 0,
+        batch_size: int = 1024,
+        seed: Optional[int] = None,
+        loop: bool = False,
+    ) -> None:
+        """
+        Args:
+            path: write_shoe_file 產生的檔案
+            loop: 讀到檔尾後是否從頭重新開始
+            其餘參數同 RandomShoeSource（seed 只影響切牌偏移）
+        """
+        shoes = np.load(path, mmap_mode="r")
+        if shoes.ndim != 2 or shoes.dtype != np.uint8:
+            raise ValueError(f"牌靴檔格式錯誤：{path}")
+        super().__init__(shoes.shape[1], penetration, burn, cut_jitter, batch_size, seed)
+        self.shoes: npt.NDArray[np.uint8] = shoes
+        self.loop = loop
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.shoes)
+
+    def next_batch(self, size: Optional[int] = None) -> ShoeBatch:
+        """
+        讀取下一批牌靴（記憶體映射的視圖，不複製資料）
+
+        Raises:
+            StopIteration: 已讀完且未設定 loop
+        """
+        size = self.batch_size if size is None else size
+        if self.position >= len(self.shoes):
+            if not self.loop or not len(self.shoes):
+                raise StopIteration
+            self.position = 0
+        cards = self.shoes[self.position : self.position + size]
+        self.position += len(cards)
+        return ShoeBatch(cards, self._cuts(len(cards)), self.burn)
+
+
+class SeededShoeSource(_ShoeSourceBase):
+    """以計數器式亂數產生、可定位的牌靴來源"""
+
+    def __init__(
+        self,
+        run_seed: int,
+        decks: int = 8,
+        penetration: float = 0.75,
+        burn: int = 1,
+        cut_jitter: int = 0,
+        batch_size: int = 1024,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            run_seed: 執行種子
+            start: 第一個牌靴編號
+            stop: 結束的牌靴編號（不含）；省略時無限產生
+            其餘參數同 RandomShoeSource（切牌偏移同樣由牌靴編號決定）
+        """
+        super().__init__(decks * CARDS_PER_DECK, penetration, burn, cut_jitter, batch_size, None)
+        if start < 0 or (stop is not None and stop < start):
+            raise ValueError(f"無效的牌靴範圍：{start} - {stop}")
+        self.decks = decks
+        self.streams = RunStreams(run_seed)
+        self.start = start
+        self.stop = stop
+        self.position = start
+        self._ordered = ordered_shoe(decks)
+
+    def seek(self, shoe_index: int) -> None:
+        """移到指定牌靴編號，下一批從該牌靴開始"""
+        if shoe_index < 0:
+            raise ValueError(f"牌靴編號不可為負數：{shoe_index}")
+        self.position = shoe_index
+
+    def shoes(self, start: int, count: int) -> ShoeBatch:
+        """產生牌靴 [start, start + count)，與目前位置無關"""
+        order = np.argsort(self.streams.shoe_sort_keys(start, count, self.shoe_size), axis=1)
+        cards: npt.NDArray[np.uint8] = self._ordered[order]
+        return ShoeBatch(cards, self._seeded_cuts(start, count), self.burn)
+
+    def shoe(self, shoe_index: int) -> ShoeBatch:
+        """單獨重播一個牌靴"""
+        return self.shoes(shoe_index, 1)
+
+    def _seeded_cuts(self, start: int, count: int) -> npt.NDArray[np.int64]:
+        if not self.cut_jitter:
+            return np.full(count, self.cut, dtype=np.int64)
+        span = 2 * self.cut_jitter + 1
+        offsets = (self.streams.shoe_uniforms(start, count) * span).astype(np.int64)
+        cuts = np.clip(self.cut - self.cut_jitter + offsets, self.burn + 1, self.shoe_size)
+        return cuts.astype(np.int64)
+
+    def next_batch(self, size: Optional[int] = None) -> ShoeBatch:
+        """
+        產生從目前位置開始的下一批牌靴
+
+        Raises:
+            StopIteration: 已到達 stop
+        """
+        size = self.batch_size if size is None else size
+        if self.stop is not None:
+            size = min(size, self.stop - self.position)
+            if size <= 0:
+                raise StopIteration
+        batch = self.shoes(self.position, size)
+        self.position += size
+        return batch
+
+
+def write_shoe_file(
+    path: Union[str, Path],
+    shoes: int,
+    decks: int = 8,
+    seed: Optional[int] = None,
+    batch_size: int = 4096,
+) -> Path:
+    """
+    預先產生洗好的牌靴並寫入 .npy 檔（以記憶體映射逐批寫入）
+
+    Args:
+        path: 輸出檔案
+        shoes: 牌靴數
+        decks: 牌副數
+        seed: 亂數種子（相同種子產生相同檔案）
+        batch_size: 每批洗牌數
+    """
+    target = Path(path)
+    source = RandomShoeSource(decks, penetration=1.0, burn=0, batch_size=batch_size, seed=seed)
+    output = np.lib.format.open_memmap(
+        target, mode="w+", dtype=np.uint8, shape=(shoes, source.shoe_size)
+    )
+    done = 0
+    while done < shoes:
+        size = min(batch_size, shoes - done)
+        output[done : done + size] = source.next_batch(size).cards
+        done += size
+    output.flush()
+    del output
+    return target
@@ -0,0 +1,81 @@
+"""
+可定位的決定性亂數串流
+
+模擬結果必須能單獨重現任一牌靴，且與行程池大小無關，因此每個牌靴的亂數只由
+(執行種子, 牌靴編號) 決定，不依賴先前產生過多少亂數：
+
+    牌靴洗牌   SplitMix64 計數器式雜湊：第 i 個牌靴第 j 張牌的排序鍵為
+               splitmix64(種子鍵, i·2¹⁶ + j)，整批牌靴可向量化計算後逐列 argsort
+    牌靴輔助   Philox 計數器式產生器，計數器高位為牌靴編號（例如模擬中的隨機決策）
+    工作行程   SeedSequence 以 (串流類別, 工作編號) 衍生，只用於不影響結果的用途
+
+工作編號不參與牌靴亂數的推導；同一牌靴交給哪個工作行程處理都得到相同結果。
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+# 牌靴內的位置使用計數器低 16 位元；最後一格保留給切牌偏移
+POSITION_BITS = 16
+CUT_SLOT = (1 << POSITION_BITS) - 1
+
+# 串流類別（SeedSequence spawn_key 與 Philox 計數器的最低位）
+STREAM_AUX = 1
+STREAM_WORKER = 2
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def splitmix64(state: np.uint64, counters: npt.NDArray[np.uint64]) -> npt.NDArray[np.uint64]:
+    """SplitMix64 在計數器位置的輸出（向量化，可任意定位）"""
+    with np.errstate(over="ignore"):
+        x: npt.NDArray[np.uint64] = state + (counters + np.uint64(1)) * _GOLDEN
+        x ^= x >> np.uint64(30)
+        x *= _MIX1
+        x ^= x >> np.uint64(27)
+        x *= _MIX2
+        x ^= x >> np.uint64(31)
+    return x
+
+
+class RunStreams:
+    """單次執行的亂數串流，由執行種子決定"""
+
+    def __init__(self, run_seed: int) -> None:
+        self.run_seed = run_seed
+        keys = np.random.SeedSequence(run_seed).generate_state(3, np.uint64)
+        self._shoe_key = np.uint64(keys[0])
+        self._philox_key = keys[1:]
+
+    def shoe_sort_keys(self, start: int, count: int, shoe_size: int) -> npt.NDArray[np.uint64]:
+        """牌靴 [start, start + count) 每張牌的排序鍵，形狀 (count, shoe_size)"""
+        if shoe_size >= CUT_SLOT:
+            raise ValueError(f"牌靴張數過多：{shoe_size}")
+        shoes = np.arange(start, start + count, dtype=np.uint64)
+        positions = np.arange(shoe_size, dtype=np.uint64)
+        counters = (shoes[:, None] << np.uint64(POSITION_BITS)) | positions[None, :]
+        return splitmix64(self._shoe_key, counters)
+
+    def shoe_uniforms(
+        self, start: int, count: int, slot: int = CUT_SLOT
+    ) -> npt.NDArray[np.float64]:
+        """每個牌靴一個 [0, 1) 均勻亂數（預設為切牌偏移使用的保留位置）"""
+        shoes = np.arange(start, start + count, dtype=np.uint64)
+        counters = (shoes << np.uint64(POSITION_BITS)) | np.uint64(slot)
+        values = splitmix64(self._shoe_key, counters) >> np.uint64(11)
+        result: npt.NDArray[np.float64] = values * (1.0 / (1 << 53))
+        return result
+
+    def shoe_generator(self, shoe_index: int) -> np.random.Generator:
+        """牌靴專屬的輔助產生器（Philox，計數器直接定位到該牌靴）"""
+        bit_generator = np.random.Philox(
+            key=self._philox_key, counter=[STREAM_AUX, 0, shoe_index, 0]
+        )
+        return np.random.Generator(bit_generator)
+
+    def worker_generator(self, worker_id: int) -> np.random.Generator:
+        """工作行程專屬的產生器（不可用於影響模擬結果的用途）"""
+        sequence = np.random.SeedSequence(self.run_seed, spawn_key=(STREAM_WORKER, worker_id))
+        return np.random.Generator(np.random.PCG64(sequence))
@@ -0,0 +1,183 @@
+"""
+模擬執行的即時監控
+
+工作通道每完成一個牌靴就更新共享記憶體中的即時計數（行程編號、牌靴數、輪數、時間），
+不取鎖、不影響呼叫 get_decision 與 add_card 的熱迴圈。主行程定期讀取計數與檢查點快照，
+整理成執行狀態：
+
+    - 各通道（工作行程）的每秒手數、完成牌靴數
+    - 佇列深度（尚未完成的區塊數）
+    - 目前每輪期望值與 95% 信賴區間、預估剩餘時間
+
+狀態可寫成定期覆寫的 JSON 檔（原子寫入，方便其他程式讀取），
+也可在終端機顯示為原地重繪的表格。
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from src.utils.atomic_write import atomic_write
+
+from .checkpoint import Checkpoint
+from .results import (
+    TELEMETRY_PID,
+    TELEMETRY_ROUNDS,
+    TELEMETRY_SHOES,
+    TELEMETRY_STARTED,
+    TELEMETRY_UPDATED,
+    merge_lanes,
+)
+
+if TYPE_CHECKING:
+    from .runner import SimulationConfig
+
+# 95% 信賴區間的 z 值
+Z_95 = 1.959964
+
+
+class LaneStatus(NamedTuple):
+    """單一工作通道的狀態"""
+
+    lane: int
+    pid: int
+    state: str  # "waiting" / "running" / "done"
+    shoes: int
+    rounds: int
+    hands_per_second: float
+
+
+class RunStatus(NamedTuple):
+    """整次執行的狀態"""
+
+    elapsed: float
+    shoes_total: int
+    shoes_done: int
+    rounds: int
+    hands_per_second: float
+    queue_depth: int
+    ev: float
+    ev_low: float
+    ev_high: float
+    eta: Optional[float]
+    lanes: List[LaneStatus]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self._asdict()
+        data["lanes"] = [lane._asdict() for lane in self.lanes]
+        return data
+
+
+def collect_status(
+    snapshot: Checkpoint,
+    telemetry: npt.NDArray[np.float64],
+    config: "SimulationConfig",
+    elapsed: float,
+) -> RunStatus:
+    """
+    由檢查點快照與即時計數整理執行狀態
+
+    Args:
+        snapshot: 各通道統計與進度的一致快照
+        telemetry: 各通道即時計數的複本，形狀 (lanes, TELEMETRY_FIELDS)
+        config: 模擬設定
+        elapsed: 本次執行已經過的秒數
+    """
+    lanes = config.lanes
+    chunks = -(-snapshot.shoes // config.chunk_shoes)
+    lane_states: List[LaneStatus] = []
+    queue_depth = 0
+    for lane in range(lanes):
+        remaining = len(range(int(snapshot.progress[lane, 0]), chunks, lanes))
+        queue_depth += remaining
+        row = telemetry[lane]
+        pid = int(row[TELEMETRY_PID])
+        busy = row[TELEMETRY_UPDATED] - row[TELEMETRY_STARTED]
+        rounds = int(row[TELEMETRY_ROUNDS])
+        state = "done" if remaining == 0 else ("running" if pid else "waiting")
+        rate = rounds / busy if busy > 0 else 0.0
+        lane_states.append(LaneStatus(lane, pid, state, int(row[TELEMETRY_SHOES]), rounds, rate))
+
+    shoes_done = sum(stop - start for start, stop in snapshot.completed_ranges(config))
+    overall = merge_lanes(snapshot.stats).overall()
+    margin = Z_95 * overall.stderr
+    session_shoes = int(telemetry[:, TELEMETRY_SHOES].sum())
+    session_rounds = int(telemetry[:, TELEMETRY_ROUNDS].sum())
+    shoes_left = snapshot.shoes - shoes_done
+    eta: Optional[float] = None
+    if shoes_left == 0:
+        eta = 0.0
+    elif session_shoes and elapsed > 0:
+        eta = shoes_left * elapsed / session_shoes
+    return RunStatus(
+        elapsed,
+        snapshot.shoes,
+        shoes_done,
+        snapshot.rounds,
+        session_rounds / elapsed if elapsed > 0 else 0.0,
+        queue_depth,
+        overall.mean,
+        overall.mean - margin,
+        overall.mean + margin,
+        eta,
+        lane_states,
+    )
+
+
+def write_status(path: Union[str, Path], status: RunStatus) -> None:
+    """覆寫狀態 JSON 檔（先寫暫存檔再改名，讀取端不會看到寫到一半的內容）"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    data = status.to_dict()
+    data["updated"] = time.time()
+    with atomic_write(target) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _duration(seconds: Optional[float]) -> str:
+    if seconds is None or math.isinf(seconds):
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def render_dashboard(status: RunStatus) -> str:
+    """終端機顯示用的狀態表格"""
+    percent = status.shoes_done / status.shoes_total if status.shoes_total else 1.0
+    lines = [
+        f"牌靴 {status.shoes_done}/{status.shoes_total} ({percent:.1%})  "
+        f"輪數 {status.rounds:,}  每秒 {status.hands_per_second:,.0f} 手  "
+        f"佇列 {status.queue_depth} 區塊",
+        f"每輪期望值 {status.ev:+.4f} 單位  95% 信賴區間 "
+        f"[{status.ev_low:+.4f}, {status.ev_high:+.4f}]  "
+        f"已執行 {_duration(status.elapsed)}  剩餘 {_duration(status.eta)}",
+        f"{'通道':>4} {'行程':>8} {'狀態':>8} {'牌靴':>8} {'輪數':>10} {'每秒手數':>10}",
+    ]
+    for lane in status.lanes:
+        lines.append(
+            f"{lane.lane:>4} {lane.pid or '-':>8} {lane.state:>8} {lane.shoes:>8} "
+            f"{lane.rounds:>10} {lane.hands_per_second:>10.0f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class Dashboard:
+    """在終端機原地重繪狀態表格（非終端機時逐次附加輸出）"""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self._lines = 0
+
+    def update(self, status: RunStatus) -> None:
+        text = render_dashboard(status)
+        if self._lines and self.stream.isatty():
+            # 游標移回上次輸出的開頭並清除到畫面結尾
+            self.stream.write(f"\x1b[{self._lines}F\x1b[J")
+        self.stream.write(text)
+        self.stream.flush()
+        self._lines = text.count("\n")
@@ -0,0 +1,36 @@
+"""
+Atomic file replacement helper.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator, Union
+
+
+@contextmanager
+def atomic_write(path: Union[str, Path], mode: str = "w") -> Iterator[IO[Any]]:
+    """
+    Open a temporary file next to path and move it over path once the block succeeds.
+
+    Readers (and other processes writing the same cache entry) never see a partially
+    written file; if the block raises, the temporary file is removed and path is untouched.
+
+    Args:
+        path: Destination file; its directory must already exist
+        mode: "w" for UTF-8 text or "wb" for bytes
+
+    Yields:
+        The open temporary file
+    """
+    target = Path(path)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+        os.replace(temp_name, target)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
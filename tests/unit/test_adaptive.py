@@ -0,0 +1,101 @@
+"""Unit tests for confidence-driven adaptive stopping."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.core.basic_strategy import BasicStrategy  # noqa: E402
+from src.core.strategy_generator import StrategyRules  # noqa: E402
+from src.simulation.adaptive import (  # noqa: E402
+    StoppingRule,
+    pending_buckets,
+    plan_shoes,
+    run_until_converged,
+)
+from src.simulation.engine import Simulator  # noqa: E402
+from src.simulation.results import ResultHistograms, tc_bin  # noqa: E402
+from src.simulation.runner import SimulationConfig  # noqa: E402
+
+CONFIG = SimulationConfig(rules_chart=False, chunk_shoes=8, lanes=4, run_seed=3)
+RULE = StoppingRule(0.05, true_counts=(-1, 0, 1, 2), min_samples=200)
+
+
+def histograms_with(true_count, samples, sd):
+    """Build histograms holding one true-count bucket with the given moments."""
+    histograms = ResultHistograms()
+    index = tc_bin(true_count)
+    histograms.data[0, index] = samples
+    histograms.data[2, index] = sd**2 * (samples - 1)
+    return histograms
+
+
+class TestPlanning:
+    """Test the stopping test and the wave sizing."""
+
+    def test_pending_until_target_and_min_samples(self):
+        """Test a bucket is pending while noisy or short of samples."""
+        rule = StoppingRule(0.1, true_counts=(0,), min_samples=100)
+        assert pending_buckets(histograms_with(0, 50, 0.1), rule) == [0]
+        assert pending_buckets(histograms_with(0, 100, 2.0), rule) == [0]
+        assert pending_buckets(histograms_with(0, 400, 1.0), rule) == []
+
+    def test_wave_sized_from_noisiest_bucket(self):
+        """Test the next wave covers the missing samples in whole blocks."""
+        rule = StoppingRule(0.1, true_counts=(0,), min_samples=100)
+        # sd 1.0 needs 100 samples; 50 samples over 10 shoes leaves 10 shoes to go
+        assert plan_shoes(histograms_with(0, 50, 1.0), rule, 10, 4) == 12
+
+    def test_wave_capped_at_doubling_and_max_shoes(self):
+        """Test a wave never more than doubles the run or passes the shoe limit."""
+        rule = StoppingRule(0.01, true_counts=(0,), min_samples=100, max_shoes=60)
+        assert plan_shoes(histograms_with(0, 50, 1.0), rule, 16, 4) == 16
+        assert plan_shoes(histograms_with(0, 50, 1.0), rule, 48, 4) == 12
+
+    def test_invalid_rule(self):
+        """Test a non-positive target is rejected."""
+        with pytest.raises(ValueError):
+            run_until_converged(CONFIG, StoppingRule(0.0))
+
+
+class TestRunUntilConverged:
+    """Test adaptive runs end to end."""
+
+    def test_stops_when_all_buckets_converge(self):
+        """Test every targeted bucket ends below the target error."""
+        result = run_until_converged(CONFIG, RULE)
+        assert result.converged
+        assert all(stderr <= RULE.target_stderr for stderr in result.stderr.values())
+        assert result.shoes % (CONFIG.chunk_shoes * CONFIG.lanes) == 0
+
+    def test_shoe_limit_stops_unconverged(self):
+        """Test the run stops at the shoe limit without converging."""
+        rule = RULE._replace(target_stderr=0.001, max_shoes=64)
+        result = run_until_converged(CONFIG, rule)
+        assert not result.converged
+        assert result.shoes == 64
+
+    def test_focus_skips_converged_buckets(self):
+        """Test focusing converges on fewer played rounds."""
+        plain = run_until_converged(CONFIG, RULE)
+        focused = run_until_converged(CONFIG, RULE, focus=True)
+        assert focused.converged
+        assert focused.results.rounds < plain.results.rounds
+
+    def test_focus_independent_of_process_count(self):
+        """Test focused runs are identical in-process and in a pool."""
+        single = run_until_converged(CONFIG, RULE, focus=True)
+        pooled = run_until_converged(CONFIG, RULE, processes=2, focus=True)
+        assert single.shoes == pooled.shoes
+        assert np.array_equal(single.results.data, pooled.results.data)
+
+
+class TestSkip:
+    """Test skipping true-count buckets in the simulator."""
+
+    def test_skip_requires_positive_cards(self):
+        """Test skipping without a card advance is rejected."""
+        simulator = Simulator(StrategyRules(), BasicStrategy())
+        with pytest.raises(ValueError):
+            simulator.set_skip([0], 0.0)
+        simulator.set_skip([], 0.0)
+        assert not simulator.skip_bins
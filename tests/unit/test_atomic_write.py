@@ -0,0 +1,35 @@
+"""Unit tests for the atomic file replacement helper."""
+
+import pytest
+
+from src.utils.atomic_write import atomic_write
+
+
+class TestAtomicWrite:
+    """Write-then-rename behaviour."""
+
+    def test_replaces_file(self, tmp_path):
+        target = tmp_path / "data.json"
+        target.write_text("old", encoding="utf-8")
+        with atomic_write(target) as f:
+            f.write("新內容")
+            assert target.read_text(encoding="utf-8") == "old"
+        assert target.read_text(encoding="utf-8") == "新內容"
+        assert list(tmp_path.iterdir()) == [target]
+
+    def test_binary_mode(self, tmp_path):
+        target = tmp_path / "data.bin"
+        with atomic_write(target, "wb") as f:
+            f.write(b"\x00\x01")
+        assert target.read_bytes() == b"\x00\x01"
+
+    def test_failure_keeps_original(self, tmp_path):
+        """An exception leaves the old file in place and no temporary file behind."""
+        target = tmp_path / "data.json"
+        target.write_text("old", encoding="utf-8")
+        with pytest.raises(RuntimeError):
+            with atomic_write(target) as f:
+                f.write("partial")
+                raise RuntimeError("interrupted")
+        assert target.read_text(encoding="utf-8") == "old"
+        assert list(tmp_path.iterdir()) == [target]
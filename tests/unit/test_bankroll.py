@@ -0,0 +1,102 @@
+"""Unit tests for bankroll risk analytics."""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.bankroll import (  # noqa: E402
+    analyze,
+    ramp_from_thresholds,
+    round_moments,
+    simulate,
+    trip_risk_of_ruin,
+)
+from src.core.bet_spread import BetRamp, CountBucket, count_profile, optimize_bet_ramp  # noqa: E402
+from src.core.card_counter import WongHalvesCounter  # noqa: E402
+from src.core.strategy_generator import StrategyRules  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def profile():
+    """Count profile for the default 8-deck rules."""
+    return count_profile(StrategyRules(), WongHalvesCounter().card_values)
+
+
+@pytest.fixture(scope="module")
+def ramp(profile):
+    """Optimized 1-40 ramp for a 2000-unit bankroll."""
+    return optimize_bet_ramp(profile, 25, 1000, 50000)
+
+
+class TestAnalytic:
+    """Test the closed-form bankroll metrics."""
+
+    def test_flat_bet_moments(self):
+        """Test a flat one-unit bet reproduces the bucket edge and variance."""
+        flat = BetRamp(0, [1], [0.01], 0.0, 0.0, 0.0, 0.0)
+        ev, sd = round_moments(flat, [CountBucket(0, 1.0, 0.01, 1.3)])
+        assert ev == pytest.approx(0.01)
+        assert sd == pytest.approx(math.sqrt(1.3 - 0.0001))
+
+    def test_n0_and_score(self, ramp, profile):
+        """Test N0 and SCORE are consistent with the per-round moments."""
+        metrics = analyze(ramp, profile, 2000)
+        assert metrics.n0 == pytest.approx((metrics.sd_per_round / metrics.ev_per_round) ** 2)
+        assert metrics.score == pytest.approx(1e6 / metrics.n0)
+        assert metrics.hourly_ev == pytest.approx(metrics.ev_per_round * 80)
+        assert metrics.risk_of_ruin == pytest.approx(ramp.risk_of_ruin)
+
+    def test_trip_risk_grows_with_horizon(self, ramp, profile):
+        """Test finite-horizon risk approaches the infinite-horizon value."""
+        ev, sd = round_moments(ramp, profile)
+        short = trip_risk_of_ruin(ev, sd, 1000, 1000)
+        long = trip_risk_of_ruin(ev, sd, 1000, 1000000)
+        ultimate = math.exp(-2 * ev * 1000 / (sd * sd))
+        assert short < long
+        assert long == pytest.approx(ultimate, rel=1e-3)
+
+    def test_negative_edge_is_certain_ruin(self):
+        """Test a losing game has risk of ruin 1 and infinite N0."""
+        flat = BetRamp(0, [1], [-0.005], 0.0, 0.0, 0.0, 0.0)
+        metrics = analyze(flat, [CountBucket(0, 1.0, -0.005, 1.3)], 500)
+        assert metrics.risk_of_ruin == 1.0
+        assert math.isinf(metrics.n0)
+        assert metrics.score == 0.0
+
+
+class TestSimulation:
+    """Test the vectorized bankroll path simulation."""
+
+    def test_matches_analytic_trip_risk(self, ramp, profile):
+        """Test simulated ruin agrees with the Brownian approximation."""
+        expected = analyze(ramp, profile, 300, trip_rounds=500).trip_risk_of_ruin
+        result = simulate(ramp, profile, 300, 500, paths=40000, seed=7)
+        assert result.paths == 40000
+        assert result.risk_of_ruin == pytest.approx(expected, abs=0.02)
+
+    def test_reproducible_with_seed(self, ramp, profile):
+        """Test the same seed gives the same result."""
+        first = simulate(ramp, profile, 500, 200, paths=5000, seed=3)
+        second = simulate(ramp, profile, 500, 200, paths=5000, seed=3)
+        assert first == second
+
+    def test_ruin_loses_whole_bankroll(self):
+        """Test ruined paths count as losing the starting bankroll."""
+        losing = BetRamp(0, [1], [-1.0], 0.0, 0.0, 0.0, 0.0)
+        result = simulate(losing, [CountBucket(0, 1.0, -1.0, 0.0001)], 5, 100, paths=100, seed=1)
+        assert result.risk_of_ruin == 1.0
+        assert result.mean_result == pytest.approx(-5.0)
+
+
+class TestThresholdRamp:
+    """Test ramps built from the wong_halves.yaml betting thresholds."""
+
+    def test_thresholds_shape_ramp(self, profile):
+        """Test the ramp steps up between increase_bet and max_bet."""
+        ramp = ramp_from_thresholds({"increase_bet": 2.0, "max_bet": 4.0}, 12)
+        assert ramp.units_for(1.9) == 1
+        assert 1 < ramp.units_for(2.0) < ramp.units_for(3.0) < 12
+        assert ramp.units_for(4.0) == ramp.units_for(9.0) == 12
+        assert analyze(ramp, profile, 1000).ev_per_round > 0
@@ -150,3 +150,45 @@ class TestBasicStrategyDeviations:
         action, desc = strategy.get_decision(["10", "6"], "10", true_count=2.0)
         assert action == "要牌"
         assert "(計數偏移)" not in desc
+
+
+class TestDecisionCurves:
+    """Test precomputed piecewise decision curves over true count."""
+
+    def test_curve_matches_step_by_step_evaluation(self):
+        """Test bisecting the curve gives the same answer as evaluating every rule."""
+        strategy = BasicStrategy()
+        hands = [["10", "2"], ["10", "3"], ["10", "6"], ["A", "7"], ["8", "8"], ["10", "10"]]
+        hands += [["5", "5", "2"], ["4", "4", "4", "4"], ["A", "2", "5"]]
+        for dealer_card in ["2", "4", "6", "9", "10", "K", "A"]:
+            for cards in hands:
+                for true_count in [None, -3.0, -1.0, -0.5, 0.0, 0.5, 1.0, 3.0, 4.0, 6.0]:
+                    assert strategy.get_decision(
+                        cards, dealer_card, true_count
+                    ) == strategy._evaluate_decision(cards, dealer_card, true_count)
+
+    def test_breakpoints_and_hint(self):
+        """Test 12 vs 4 changes from stand to hit at true count 0."""
+        strategy = BasicStrategy(allow_surrender=False)
+        curve = strategy.decision_curve(["10", "2"], "4")
+        assert curve is not None
+        assert curve.breakpoints() == [(0.0, False, "停牌")]
+        assert strategy.decision_hint(["10", "2"], "4", 1.0) == "真實計數 ≤ +0 時改為要牌"
+        assert strategy.decision_hint(["10", "2"], "4", None) == ""
+
+    def test_curves_shared_by_equivalent_hands(self):
+        """Test hands of the same class, total and card-count bucket share one curve."""
+        strategy = BasicStrategy()
+        assert strategy.decision_curve(["10", "6"], "9") is strategy.decision_curve(["9", "7"], "9")
+        assert strategy.decision_curve(["10", "6"], "9") is not strategy.decision_curve(
+            ["10", "4", "2"], "9"
+        )
+        assert strategy.decision_curve(["10", "K", "5"], "9") is None
+
+    def test_precompute_and_surrender_toggle(self):
+        """Test precomputing all curves and invalidating them when surrender changes."""
+        strategy = BasicStrategy()
+        curves = strategy.precompute_decision_curves()
+        assert len(curves) > 500
+        strategy.set_allow_surrender(False)
+        assert strategy._decision_curves == {}
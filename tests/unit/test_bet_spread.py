@@ -0,0 +1,187 @@
+"""Unit tests for the bet-spread optimizer."""
+
+from typing import NamedTuple
+
+import pytest
+
+from src.core.bet_spread import (
+    BetRamp,
+    CountBucket,
+    cached_bet_ramp,
+    count_profile,
+    optimize_bet_ramp,
+    rule_base_edge,
+    true_count_frequencies,
+)
+from src.core.card_counter import WongHalvesCounter
+from src.core.strategy_generator import StrategyRules
+
+
+class _Result(NamedTuple):
+    """Stand-in for the simulator's per-bucket BinStats."""
+
+    mean: float
+    sd: float
+
+
+class _Sampled(NamedTuple):
+    """Stand-in for BinStats including the sample count."""
+
+    samples: int
+    mean: float
+    sd: float
+
+
+@pytest.fixture(scope="module")
+def card_values():
+    """Wong Halves card values from the default config."""
+    return WongHalvesCounter().card_values
+
+
+class TestCountProfile:
+    """Test the computed count frequencies and edges."""
+
+    def test_frequencies_sum_to_one(self, card_values):
+        """Test bucket frequencies form a distribution centred near zero."""
+        frequencies = true_count_frequencies(8, 0.75, card_values)
+        assert sum(frequencies.values()) == pytest.approx(1.0)
+        assert frequencies[0] > frequencies[3] > frequencies[6]
+
+    def test_deeper_penetration_spreads_counts(self, card_values):
+        """Test deeper penetration produces more high counts."""
+        shallow = true_count_frequencies(6, 0.5, card_values)
+        deep = true_count_frequencies(6, 0.85, card_values)
+        assert deep[4] > shallow[4]
+
+    def test_rule_effects(self):
+        """Test H17 and more decks lower the base edge."""
+        assert rule_base_edge(StrategyRules(hit_soft_17=True)) < rule_base_edge(StrategyRules())
+        assert rule_base_edge(StrategyRules(decks=8)) < rule_base_edge(StrategyRules(decks=2))
+
+    def test_edge_grows_with_count(self, card_values):
+        """Test the edge increases with the true count."""
+        profile = count_profile(StrategyRules(), card_values)
+        edges = [bucket.edge for bucket in profile]
+        assert edges == sorted(edges)
+
+    def test_measured_results_override_linear_model(self, card_values):
+        """Test per-bucket results replace the linear model only where given."""
+        linear = {
+            bucket.true_count: bucket for bucket in count_profile(StrategyRules(), card_values)
+        }
+        results = {2: _Result(0.012, 1.2), 3: _Result(0.02, 1.25)}
+        profile = count_profile(StrategyRules(), card_values, results=results)
+        by_count = {bucket.true_count: bucket for bucket in profile}
+        assert by_count[2].edge == 0.012
+        assert by_count[3].variance == pytest.approx(1.25**2)
+        assert by_count[0] == linear[0]
+
+    def test_unusable_results_fall_back(self, card_values):
+        """Test single-sample or zero-variance buckets use the linear model."""
+        linear = {
+            bucket.true_count: bucket for bucket in count_profile(StrategyRules(), card_values)
+        }
+        results = {
+            1: _Sampled(1, 1.0, 0.0),
+            2: _Result(0.5, 0.0),
+            3: _Sampled(5000, 0.02, 1.2),
+        }
+        profile = count_profile(StrategyRules(), card_values, results=results)
+        by_count = {bucket.true_count: bucket for bucket in profile}
+        assert by_count[1] == linear[1]
+        assert by_count[2] == linear[2]
+        assert by_count[3].edge == 0.02
+        ramp = optimize_bet_ramp(profile, 25, 1000, 50000)
+        assert ramp.units_for(1) == ramp.units_for(1.5)
+
+
+class TestOptimizer:
+    """Test the Kelly-proportional, risk-constrained ramp."""
+
+    def test_ramp_is_monotonic_and_bounded(self, card_values):
+        """Test bets rise with the count and respect the table limits."""
+        profile = count_profile(StrategyRules(), card_values)
+        ramp = optimize_bet_ramp(profile, 25, 1000, 50000)
+        assert ramp.units == sorted(ramp.units)
+        assert min(ramp.units) == 1
+        assert max(ramp.units) <= 40
+        assert ramp.risk_of_ruin <= 0.05
+        assert ramp.ev_per_round > 0
+
+    def test_risk_constraint_limits_kelly_fraction(self, card_values):
+        """Test a tighter risk limit yields a smaller Kelly fraction."""
+        profile = count_profile(StrategyRules(), card_values)
+        loose = optimize_bet_ramp(profile, 25, 1000, 50000, max_risk_of_ruin=0.2)
+        tight = optimize_bet_ramp(profile, 25, 1000, 50000, max_risk_of_ruin=0.02)
+        assert tight.kelly_fraction < loose.kelly_fraction
+
+    def test_lookup_clamps_to_range(self):
+        """Test counts outside the ramp use the end buckets."""
+        profile = [CountBucket(tc, 1 / 3, 0.01 * tc, 1.3) for tc in (-1, 0, 1)]
+        ramp = optimize_bet_ramp(profile, 10, 100, 100000)
+        assert ramp.units_for(-8.0) == ramp.units[0] == 1
+        assert ramp.units_for(1.5) == ramp.units_for(9.0) == ramp.units[-1]
+
+    def test_lookup_with_gaps(self):
+        """Test non-contiguous buckets map counts in a gap to the lower bucket."""
+        profile = [CountBucket(tc, 1 / 3, 0.01 * tc, 1.3) for tc in (-1, 0, 3)]
+        ramp = optimize_bet_ramp(profile, 10, 100, 100000)
+        assert ramp.true_counts == [-1, 0, 3]
+        assert ramp.units_for(2.5) == ramp.units_for(0.0) == ramp.units[1]
+        assert ramp.units_for(3.0) == ramp.units[2]
+        assert ramp.edge_for(1.0) == 0.0
+        restored = BetRamp.from_dict(ramp.to_dict())
+        assert restored.true_counts == [-1, 0, 3]
+        assert restored.units_for(2.5) == ramp.units[1]
+
+    def test_invalid_limits(self, card_values):
+        """Test invalid table limits and bankrolls are rejected."""
+        profile = count_profile(StrategyRules(), card_values)
+        with pytest.raises(ValueError):
+            optimize_bet_ramp(profile, 100, 50, 10000)
+        with pytest.raises(ValueError):
+            optimize_bet_ramp(profile, 25, 1000, 10)
+
+
+class TestCachedRamp:
+    """Test the on-disk ramp cache and counter integration."""
+
+    def test_cache_round_trip(self, card_values, tmp_path, monkeypatch):
+        """Test the second call loads the cached ramp."""
+        ramp = cached_bet_ramp(StrategyRules(), card_values, 25, 1000, 50000, cache_dir=tmp_path)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("ramp recomputed")
+
+        monkeypatch.setattr("src.core.bet_spread.optimize_bet_ramp", fail)
+        cached = cached_bet_ramp(StrategyRules(), card_values, 25, 1000, 50000, cache_dir=tmp_path)
+        assert isinstance(cached, BetRamp)
+        assert cached.to_dict() == ramp.to_dict()
+
+    def test_results_change_cache_key(self, card_values, tmp_path):
+        """Test a ramp built from measured results is cached separately."""
+        results = {tc: _Result(0.01 * tc, 1.15) for tc in range(-10, 11)}
+        linear = cached_bet_ramp(StrategyRules(), card_values, 25, 1000, 50000, cache_dir=tmp_path)
+        measured = cached_bet_ramp(
+            StrategyRules(), card_values, 25, 1000, 50000, cache_dir=tmp_path, results=results
+        )
+        assert measured.edges[-1] == pytest.approx(0.1)
+        assert measured.to_dict() != linear.to_dict()
+        assert len(list(tmp_path.glob("ramp-*.json"))) == 2
+
+    def test_counter_suggests_units(self, card_values, tmp_path):
+        """Test the counter returns concrete bet units once a ramp is set."""
+        counter = WongHalvesCounter()
+        assert counter.get_bet_units() == 1
+        ramp = cached_bet_ramp(StrategyRules(), card_values, 25, 1000, 50000, cache_dir=tmp_path)
+        counter.set_bet_ramp(ramp)
+
+        counter.running_count = 32.0  # true count 4
+        units = counter.get_bet_units()
+        assert units == ramp.units_for(4.0) > 1
+        suggestion, description = counter.get_betting_suggestion()
+        assert suggestion == f"下注 {units} 單位"
+        assert "真實計數 4.0" in description
+
+        counter.set_bet_ramp(None)
+        assert counter.get_betting_suggestion()[0] == "最大下注"
@@ -0,0 +1,78 @@
+"""Unit tests for single-pass multi-strategy simulation with divergence branching."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.core.strategy_generator import StrategyRules  # noqa: E402
+from src.simulation.branching import BranchingSimulator  # noqa: E402
+from src.simulation.compare import StrategyVariant, build_strategy  # noqa: E402
+from src.simulation.engine import Simulator  # noqa: E402
+from src.simulation.results import ResultHistograms, ResultRecorder  # noqa: E402
+from src.simulation.runner import SimulationConfig, shoe_batch  # noqa: E402
+
+CONFIG = SimulationConfig(rules_chart=False, run_seed=6)
+VARIANTS = [
+    StrategyVariant("full"),
+    StrategyVariant("copy"),
+    StrategyVariant("no-hard", without=("hard_hands",)),
+    StrategyVariant("no-insurance", without=("insurance",)),
+    StrategyVariant("no-surrender", allow_surrender=False),
+]
+
+
+def simulators():
+    """Build one simulator per variant."""
+    return [Simulator(CONFIG.rules, build_strategy(CONFIG, variant)) for variant in VARIANTS]
+
+
+def play(shoes, branching):
+    """Play the shoes branched or one variant at a time and return the histograms."""
+    batch = shoe_batch(CONFIG, 0, shoes)
+    engines = simulators()
+    brancher = BranchingSimulator(engines)
+    recorders = [ResultRecorder() for _ in engines]
+    rounds = []
+    for row, cut in zip(batch.cards.tolist(), batch.cuts.tolist()):
+        if branching:
+            rounds.append(brancher.play_shoe(row, batch.burn, cut, recorders))
+        else:
+            rounds.append(
+                [
+                    engine.play_shoe(row, batch.burn, cut, recorder)
+                    for engine, recorder in zip(engines, recorders)
+                ]
+            )
+    histograms = []
+    for recorder in recorders:
+        histograms.append(ResultHistograms())
+        recorder.flush(histograms[-1])
+    return histograms, rounds, brancher
+
+
+class TestBranchingSimulator:
+    """Test branched play against playing each strategy separately."""
+
+    def test_matches_separate_play(self):
+        """Test every strategy gets bit-identical results and round counts."""
+        branched, branched_rounds, brancher = play(6, True)
+        separate, separate_rounds, _ = play(6, False)
+        assert branched_rounds == separate_rounds
+        for ours, theirs in zip(branched, separate):
+            assert np.array_equal(ours.data, theirs.data)
+        assert brancher.replays > 0
+
+    def test_identical_strategies_never_diverge(self):
+        """Test copies of one strategy need no per-follower decisions."""
+        engines = simulators()
+        brancher = BranchingSimulator(engines)
+        # 12 vs 2 has hard-hand deviations; 16 vs 10 differs only in surrender
+        assert brancher.suspects(engines[0], ["10", "2"], "2") == {engines[2]}
+        assert brancher.suspects(engines[0], ["10", "6"], "10") == {engines[4]}
+        assert brancher.suspects(engines[0], ["10", "7"], "5") == set()
+
+    def test_rejects_mixed_rules(self):
+        """Test all strategies must play under the same rules."""
+        other = Simulator(StrategyRules(decks=6), build_strategy(CONFIG, VARIANTS[0]))
+        with pytest.raises(ValueError):
+            BranchingSimulator([simulators()[0], other])
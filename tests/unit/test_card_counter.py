@@ -246,3 +246,60 @@ class TestWongHalvesCounter:
         with patch("builtins.open", mock_open(read_data=mock_yaml)):
             with pytest.raises(ValueError, match="計數系統檔案缺少牌值對照表"):
                 WongHalvesCounter()
+
+
+class TestAceSideCount:
+    """Test cases for the optional ace side count."""
+
+    DECK = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"] * 4
+
+    def test_disabled_counts_match_true_count(self):
+        """Without the side count both adjusted counts are the plain true count."""
+        counter = WongHalvesCounter(num_decks=1)
+        for card in ["5", "5", "A", "3"]:
+            counter.add_card(card)
+        assert counter.get_betting_true_count() == counter.get_true_count()
+        assert counter.get_playing_true_count() == counter.get_true_count()
+        assert counter.betting_count == 0.0
+
+    def test_adjusted_running_counts(self):
+        """Adjusted counts add weight x (expected aces seen - aces seen)."""
+        counter = WongHalvesCounter(num_decks=1, ace_side_count=True)
+        cards = ["A", "A", "5", "K", "3", "A", "9"]
+        for card in cards:
+            counter.add_card(card)
+        surplus = len(cards) / 13 - 3
+        assert counter.betting_count == pytest.approx(counter.running_count + 0.2 * surplus)
+        assert counter.playing_count == pytest.approx(counter.running_count - surplus)
+        assert counter.get_playing_true_count() == pytest.approx(
+            counter.playing_count / (45 / 52), abs=0.01
+        )
+
+    def test_playing_count_treats_aces_as_neutral(self):
+        """Seeing aces moves the playing count only by the rebalancing share."""
+        counter = WongHalvesCounter(num_decks=1, ace_side_count=True)
+        for _ in range(4):
+            counter.add_card("A")
+        assert counter.running_count == -4
+        assert counter.playing_count == pytest.approx(-4 / 13)
+
+    def test_adjusted_counts_are_balanced(self):
+        """A full deck brings the adjusted counts back to zero."""
+        counter = WongHalvesCounter(num_decks=1, ace_side_count=True)
+        for card in self.DECK:
+            counter.add_card(card)
+        assert counter.betting_count == pytest.approx(0.0, abs=1e-9)
+        assert counter.playing_count == pytest.approx(0.0, abs=1e-9)
+
+    def test_remove_card_and_reset(self):
+        """Removing a card reverts the adjusted counts; reset clears them."""
+        counter = WongHalvesCounter(num_decks=1, ace_side_count=True)
+        counter.add_card("5")
+        betting, playing = counter.betting_count, counter.playing_count
+        counter.add_card("A")
+        counter.remove_card("A")
+        assert counter.betting_count == pytest.approx(betting)
+        assert counter.playing_count == pytest.approx(playing)
+        counter.reset()
+        assert counter.betting_count == 0.0
+        assert counter.playing_count == 0.0
@@ -0,0 +1,80 @@
+"""Unit tests for common-random-numbers strategy comparison."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.simulation.compare import (  # noqa: E402
+    StrategyVariant,
+    build_strategy,
+    compare_strategies,
+)
+from src.simulation.runner import SimulationConfig, run_simulation  # noqa: E402
+
+CONFIG = SimulationConfig(rules_chart=False, chunk_shoes=8, run_seed=4)
+
+
+class TestBuildStrategy:
+    """Test variant strategies are built from the simulation settings."""
+
+    def test_without_sections(self):
+        """Test deviation sections and insurance can be switched off."""
+        strategy = build_strategy(CONFIG, StrategyVariant("x", without=("surrender", "insurance")))
+        assert strategy.surrender_deviations == {}
+        assert not strategy.should_take_insurance(10.0)
+        assert build_strategy(CONFIG, StrategyVariant("y")).surrender_deviations
+
+    def test_unknown_section(self):
+        """Test an unknown deviation section is rejected."""
+        with pytest.raises(ValueError):
+            build_strategy(CONFIG, StrategyVariant("x", without=("doubles",)))
+
+
+class TestCompareStrategies:
+    """Test paired comparisons over shared shoes."""
+
+    def test_identical_variants_have_zero_difference(self):
+        """Test two copies of one strategy play identically on shared shoes."""
+        result = compare_strategies(CONFIG, [StrategyVariant("a"), StrategyVariant("b")], 16)
+        assert np.array_equal(result.net[:, 0], result.net[:, 1])
+        difference = result.difference(1)
+        assert difference.ev_diff == 0.0
+        assert difference.stderr == 0.0
+        assert difference.independent_stderr > 0.0
+
+    def test_matches_plain_run(self):
+        """Test each variant sees the same shoes as an ordinary simulation."""
+        result = compare_strategies(CONFIG, [StrategyVariant("a"), StrategyVariant("b")], 16)
+        plain = run_simulation(CONFIG._replace(lanes=1), 16)
+        assert result.results[0].rounds == plain.rounds
+        assert result.ev(0) == pytest.approx(plain.overall().mean)
+
+    def test_paired_interval_tighter_than_independent(self):
+        """Test pairing shrinks the error of a small strategy difference."""
+        variants = [StrategyVariant("full"), StrategyVariant("plain", without=("hard_hands",))]
+        result = compare_strategies(CONFIG, variants, 48)
+        difference = result.differences()[0]
+        assert difference.variant == "plain" and difference.baseline == "full"
+        assert difference.stderr < difference.independent_stderr
+        assert difference.low <= difference.ev_diff <= difference.high
+
+    def test_independent_of_process_count(self):
+        """Test pooled comparisons reproduce the in-process result."""
+        variants = [StrategyVariant("a"), StrategyVariant("b", allow_surrender=False)]
+        single = compare_strategies(CONFIG, variants, 24)
+        pooled = compare_strategies(CONFIG, variants, 24, processes=2)
+        assert np.array_equal(single.net, pooled.net)
+        assert np.array_equal(single.results[1].data, pooled.results[1].data)
+
+    def test_rejects_duplicate_names(self):
+        """Test variant names must be unique."""
+        with pytest.raises(ValueError):
+            compare_strategies(CONFIG, [StrategyVariant("a"), StrategyVariant("a")], 4)
+
+    def test_branching_matches_separate_play(self):
+        """Test the branched comparison reproduces playing each variant alone."""
+        variants = [StrategyVariant("a"), StrategyVariant("b", without=("pairs", "insurance"))]
+        branched = compare_strategies(CONFIG, variants, 16)
+        separate = compare_strategies(CONFIG, variants, 16, branching=False)
+        assert np.array_equal(branched.net, separate.net)
+        assert np.array_equal(branched.rounds, separate.rounds)
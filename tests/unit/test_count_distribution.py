@@ -0,0 +1,101 @@
+"""Unit tests for true-count distribution precomputation."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.count_distribution import (  # noqa: E402
+    TrueCountHistogram,
+    cached_histogram,
+    depth_labels,
+    exact_histogram,
+    simulated_histogram,
+)
+from src.core.bet_spread import count_profile  # noqa: E402
+from src.core.card_counter import WongHalvesCounter  # noqa: E402
+from src.core.strategy_generator import StrategyRules  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def card_values():
+    """Wong Halves card values from the default config."""
+    return WongHalvesCounter().card_values
+
+
+@pytest.fixture(scope="module")
+def exact(card_values):
+    """Exact 8-deck histogram at 75% penetration."""
+    return exact_histogram(8, 0.75, card_values, "Wong Halves")
+
+
+class TestExactHistogram:
+    """Test the dynamic-programming distribution."""
+
+    def test_shape_and_total(self, exact):
+        """Test rows cover the dealt cards and the mass sums to one."""
+        assert exact.histogram.shape == (24, 40)
+        assert exact.depth_edges[-1] == 312
+        assert exact.histogram.sum() == pytest.approx(1.0)
+
+    def test_first_card_is_zero_count(self, exact):
+        """Test the top of the shoe starts at true count zero."""
+        first = exact.at_depth(0)
+        assert first.sum() == pytest.approx(1.0)
+        assert first[np.searchsorted(exact.tc_edges, 0.0, side="right") - 1] > 0.5
+
+    def test_spread_grows_with_depth(self, exact):
+        """Test counts spread out as the shoe is dealt."""
+        centre = np.searchsorted(exact.tc_edges, 0.0, side="right") - 1
+        assert exact.at_depth(20)[centre] > exact.at_depth(300)[centre]
+
+    def test_symmetry_of_balanced_count(self, exact):
+        """Test a balanced count is roughly symmetric around zero."""
+        buckets = exact.integer_buckets()
+        assert sum(buckets.values()) == pytest.approx(1.0)
+        assert buckets[3] == pytest.approx(buckets[-4], rel=0.05)
+
+    def test_single_deck_exact_probabilities(self):
+        """Test one card from a single deck matches the card-value frequencies."""
+        values = {card: 0.0 for card in "2 3 4 5 6 7 8 9 10 J Q K A".split()}
+        values["5"] = 1.0
+        histogram = exact_histogram(1, 0.5, values, depth_bin=1, tc_limit=2.0, tc_step=1.0)
+        # 發第二張牌前，已發一張 5 的機率為 4/52，真實計數 = 1 / (51/52)
+        assert histogram.at_depth(1)[3] == pytest.approx(4 / 52)
+
+
+class TestMonteCarlo:
+    """Test the simulated distribution against the exact one."""
+
+    def test_agrees_with_exact(self, exact, card_values):
+        """Test the simulated marginal matches the exact marginal."""
+        simulated = simulated_histogram(8, 0.75, card_values, shoes=4000, seed=1)
+        assert simulated.histogram.sum() == pytest.approx(1.0)
+        assert np.abs(simulated.marginal() - exact.marginal()).max() < 0.005
+
+
+class TestCache:
+    """Test the on-disk histogram cache."""
+
+    def test_round_trip_and_reuse(self, card_values, tmp_path, monkeypatch):
+        """Test the cached histogram is reloaded instead of recomputed."""
+        first = cached_histogram(6, 0.8, card_values, cache_dir=tmp_path)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("histogram recomputed")
+
+        monkeypatch.setattr("src.analytics.count_distribution.exact_histogram", fail)
+        second = cached_histogram(6, 0.8, card_values, cache_dir=tmp_path)
+        assert isinstance(second, TrueCountHistogram)
+        assert np.array_equal(first.histogram, second.histogram)
+        assert (second.decks, second.penetration, second.method) == (6, 0.8, "exact")
+        assert len(depth_labels(second)) == len(second.histogram)
+
+    def test_invalid_method(self, card_values, tmp_path):
+        """Test unknown estimation methods are rejected."""
+        with pytest.raises(ValueError):
+            cached_histogram(8, 0.75, card_values, method="guess", cache_dir=tmp_path)
+
+    def test_feeds_bet_profile(self, exact, card_values):
+        """Test the histogram buckets can weight the bet-spread profile."""
+        profile = count_profile(StrategyRules(), card_values, frequencies=exact.integer_buckets())
+        assert sum(bucket.frequency for bucket in profile) == pytest.approx(1.0)
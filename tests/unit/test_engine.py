@@ -0,0 +1,139 @@
+"""Unit tests for the round simulator, the multi-process runner and checkpoints."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.shoe_history import (  # noqa: E402
+    CARD_CODES,
+    ShoeHistoryReader,
+    ShoeHistoryWriter,
+)
+from src.core.basic_strategy import BasicStrategy  # noqa: E402
+from src.core.strategy_generator import StrategyRules  # noqa: E402
+from src.simulation import runner  # noqa: E402
+from src.simulation.checkpoint import load_checkpoint  # noqa: E402
+from src.simulation.engine import Simulator  # noqa: E402
+from src.simulation.results import ResultHistograms, ResultRecorder  # noqa: E402
+from src.simulation.runner import SimulationConfig, replay_history, run_simulation  # noqa: E402
+
+
+def play(cards):
+    """Play one scripted round (after a burn card) and return the histograms."""
+    simulator = Simulator(StrategyRules(), BasicStrategy())
+    codes = [CARD_CODES["2"]] + [CARD_CODES[card] for card in cards]
+    recorder = ResultRecorder()
+    assert simulator.play_shoe(codes, 1, 2, recorder) == 1
+    histograms = ResultHistograms()
+    recorder.flush(histograms)
+    return histograms
+
+
+class TestSimulator:
+    """Test scripted rounds against hand-computed results."""
+
+    def test_stand_and_lose(self):
+        """Test hard 20 stands and loses to a dealer drawing to 21."""
+        histograms = play(["10", "6", "K", "10", "5"])
+        assert histograms.overall().mean == -1.0
+        assert list(histograms.by_action()) == ["S"]
+
+    def test_blackjack_pays_three_to_two(self):
+        """Test a natural is paid immediately without a decision."""
+        histograms = play(["A", "9", "K", "7"])
+        assert histograms.overall().mean == 1.5
+        assert list(histograms.by_action()) == ["-"]
+
+    def test_double_down(self):
+        """Test 11 doubles and wins twice the bet when the dealer busts."""
+        histograms = play(["6", "6", "5", "10", "10", "10"])
+        assert histograms.overall().mean == 2.0
+        assert list(histograms.by_action()) == ["D"]
+
+    def test_split_eights(self):
+        """Test 8,8 splits into two hands that each win against a dealer bust."""
+        histograms = play(["8", "6", "8", "10", "10", "10", "10"])
+        assert histograms.overall().mean == 2.0
+        assert list(histograms.by_action()) == ["Y"]
+
+    def test_dealer_blackjack(self):
+        """Test a dealer natural takes the bet before the player acts."""
+        histograms = play(["10", "A", "9", "K"])
+        assert histograms.overall().mean == -1.0
+
+
+class TestRunner:
+    """Test multi-process aggregation."""
+
+    def test_results_independent_of_process_count(self):
+        """Test one and two processes produce bit-identical histograms."""
+        config = SimulationConfig(rules_chart=False, chunk_shoes=4, lanes=3, run_seed=5)
+        single = run_simulation(config, 10)
+        pooled = run_simulation(config, 10, processes=2)
+        assert np.array_equal(single.data, pooled.data)
+        assert single.rounds > 500
+        total = sum(stats.samples for stats in single.by_true_count().values())
+        assert total == single.rounds
+
+    def test_seed_changes_results(self):
+        """Test a different run seed plays different shoes."""
+        config = SimulationConfig(rules_chart=False, chunk_shoes=4, lanes=2)
+        first = run_simulation(config, 4)
+        second = run_simulation(config._replace(run_seed=1), 4)
+        assert not np.array_equal(first.data, second.data)
+
+    def test_replay_history_plays_recorded_card_order(self, tmp_path):
+        """Test each recorded shoe is replayed as a shoe in its dealt order."""
+        path = tmp_path / "history.bjsh"
+        with ShoeHistoryWriter(path) as writer:
+            writer.add_round(["10", "6", "K", "10", "5"])
+            writer.end_shoe()
+            writer.add_round(["A", "9", "K", "7"])
+        config = SimulationConfig(rules_chart=False)
+        with ShoeHistoryReader(path) as reader:
+            histograms = replay_history(config, reader)
+            assert histograms.rounds == 2
+            assert histograms.overall().mean == 0.25
+            assert replay_history(config, reader, start=1).overall().mean == 1.5
+
+
+class TestCheckpoint:
+    """Test checkpoint and resume."""
+
+    def test_resume_matches_uninterrupted_run(self, tmp_path, monkeypatch):
+        """Test a run interrupted mid-way resumes to bit-identical results."""
+        config = SimulationConfig(rules_chart=False, chunk_shoes=2, lanes=3, run_seed=8)
+        expected = run_simulation(config, 12)
+
+        path = tmp_path / "run.ckpt.npz"
+        original = runner.play_chunk
+        calls = []
+
+        def interrupted(*args):
+            calls.append(args)
+            if len(calls) == 4:
+                raise KeyboardInterrupt
+            return original(*args)
+
+        monkeypatch.setattr(runner, "play_chunk", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run_simulation(config, 12, checkpoint=path, checkpoint_interval=0.0)
+        monkeypatch.setattr(runner, "play_chunk", original)
+
+        state = load_checkpoint(path)
+        assert state.completed_ranges(config) == [(0, 2), (2, 4), (6, 8)]
+        assert 0 < state.rounds < expected.rounds
+
+        resumed = run_simulation(config, 12, processes=2, checkpoint=path)
+        assert np.array_equal(resumed.data, expected.data)
+        assert load_checkpoint(path).rounds == expected.rounds
+
+    def test_rejects_mismatched_checkpoint(self, tmp_path):
+        """Test a checkpoint from different settings is not resumed."""
+        config = SimulationConfig(rules_chart=False, chunk_shoes=2, lanes=2)
+        path = tmp_path / "run.ckpt.npz"
+        run_simulation(config, 2, checkpoint=path)
+        with pytest.raises(ValueError):
+            run_simulation(config._replace(run_seed=3), 2, checkpoint=path)
+        with pytest.raises(ValueError):
+            run_simulation(config, 4, checkpoint=path)
@@ -2,8 +2,13 @@
 測試 GameState 手牌管理功能
 """
 
+import tracemalloc
+from typing import Any, Callable, List
+
+import pytest
+
 from src.core.game_state import GameState
-from src.core.hand import Hand
+from src.core.hand import Hand, HandStatus
 
 
 class TestGameStateHandManagement:
@@ -121,3 +126,113 @@ class TestGameStateHandManagement:
         # 最後處理第二個手牌
         assert game_state.set_current_hand_index(1) is True
         assert game_state.current_hand.cards == ["5", "2"]
+
+
+def _bytes_per_object(factory: Callable[[], Any], count: int = 20000) -> float:
+    """以 tracemalloc 量測每個物件平均占用的位元組數"""
+    tracemalloc.start()
+    try:
+        objects: List[Any] = [factory() for _ in range(count)]
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(objects) == count
+    return size / count
+
+
+class _DictHand:
+    """以實例字典與字串列表儲存的手牌（對照組，與改為 __slots__ 之前的配置相同）"""
+
+    def __init__(self, cards: List[str]) -> None:
+        self.cards = list(cards)
+        self.status = HandStatus.ACTIVE
+        self.bet_multiplier = 1.0
+        self.is_split_hand = False
+        self.split_aces = False
+
+
+class TestCompactStorage:
+    """測試以 __slots__ 與 bytes 儲存的手牌"""
+
+    def test_no_instance_dict(self):
+        """測試手牌與遊戲狀態沒有實例字典"""
+        assert not hasattr(Hand(), "__dict__")
+        assert not hasattr(GameState(), "__dict__")
+
+    def test_cards_round_trip(self):
+        """測試牌張轉換後保持原本的牌面（J/Q/K 不合併）"""
+        hand = Hand(["J", "Q"])
+        hand.add_card("K")
+        assert hand.cards == ["J", "Q", "K"]
+        assert not hand.can_be_split()
+        hand.cards = ["10", "10"]
+        assert hand.cards == ["10", "10"]
+        assert hand.remove_last_card() == "10"
+        assert hand.cards == ["10"]
+
+    def test_invalid_card_raises(self):
+        """測試無效的牌面拋出 ValueError，且不改動原本的牌"""
+        with pytest.raises(ValueError):
+            Hand(["1"])
+        with pytest.raises(ValueError):
+            Hand().add_card("X")
+        hand = Hand(["8"])
+        with pytest.raises(ValueError):
+            hand.add_card("k")
+        with pytest.raises(ValueError):
+            hand.cards = ["8", "11"]
+        assert hand.cards == ["8"]
+        with pytest.raises(ValueError):
+            GameState().add_dealer_card("a")
+
+    def test_card_views_are_read_only(self):
+        """測試 cards 與 dealer_cards 就地修改時拋出 TypeError，而不是默默失效"""
+        hand = Hand(["8", "3"])
+        game_state = GameState()
+        game_state.set_dealer_card("A")
+        for cards in (hand.cards, game_state.dealer_cards):
+            with pytest.raises(TypeError):
+                cards.append("2")
+            with pytest.raises(TypeError):
+                cards[0] = "5"
+            with pytest.raises(TypeError):
+                del cards[0]
+            with pytest.raises(TypeError):
+                cards += ["2"]
+        assert hand.cards == ["8", "3"]
+        assert game_state.dealer_cards == ["A"]
+        copy = hand.cards.copy()
+        copy.append("2")
+        assert copy == ["8", "3", "2"]
+
+    def test_long_hand_value(self):
+        """測試超過預先計算長度的手牌點數"""
+        hand = Hand(["A", "2", "A", "3", "A"])
+        assert hand.calculate_value() == (18, True)
+        hand.add_card("9")
+        assert hand.calculate_value() == (17, False)
+
+    def test_clone_is_independent(self):
+        """測試複製的手牌不受原手牌影響"""
+        hand = Hand(["8", "8"])
+        hand.is_split_hand = True
+        copy = hand.clone()
+        hand.add_card("3")
+        assert copy.cards == ["8", "8"]
+        assert copy.is_split_hand
+
+    def test_dealer_cards(self):
+        """測試莊家牌的讀取與移除"""
+        game_state = GameState()
+        game_state.set_dealer_card("A")
+        game_state.add_dealer_card("K")
+        assert game_state.dealer_cards == ["A", "K"]
+        assert game_state.dealer_card == "A"
+        assert game_state.remove_last_dealer_card() == "K"
+        assert game_state.get_dealer_card_string() == "A"
+
+    def test_memory_benchmark(self):
+        """量測每手牌的記憶體：__slots__ 與 bytes 牌張至少省下兩成"""
+        compact = _bytes_per_object(lambda: Hand(["10", "6"]))
+        baseline = _bytes_per_object(lambda: _DictHand(["10", "6"]))
+        assert compact < 0.8 * baseline
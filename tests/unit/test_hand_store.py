@@ -0,0 +1,188 @@
+"""Unit tests for the columnar hand store."""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.hand_store import STATUS_CODES, HandStore  # noqa: E402
+from src.analytics.shoe_history import CARD_CODES, CODE_TO_CARD  # noqa: E402
+from src.core.hand import Hand, HandStatus  # noqa: E402
+
+CARDS = list(CARD_CODES)
+
+
+def _codes(cards):
+    return np.array([CARD_CODES[card] for card in cards], dtype=np.uint8)
+
+
+class TestAppend:
+    """Bulk appends."""
+
+    def test_totals_match_hand(self):
+        """Totals and soft flags agree with Hand.calculate_value."""
+        rng = random.Random(3)
+        hands = [[rng.choice(CARDS) for _ in range(rng.randint(0, 6))] for _ in range(500)]
+        store = HandStore(capacity=8)
+        rows = store.append(hands)
+        assert list(rows) == list(range(500))
+        for index, cards in enumerate(hands):
+            value, soft = Hand(cards).calculate_value()
+            assert store.totals[index] == value
+            assert store.soft[index] == soft
+            assert store.card_counts[index] == len(cards)
+            assert [CODE_TO_CARD[code] for code in store.cards(index)] == cards
+
+    def test_blackjack_status(self):
+        store = HandStore()
+        store.append([["A", "K"], ["10", "5", "6"]])
+        assert store.status[0] == STATUS_CODES[HandStatus.BLACKJACK]
+        assert store.status[1] == STATUS_CODES[HandStatus.ACTIVE]
+
+    def test_invalid_input(self):
+        store = HandStore()
+        with pytest.raises(ValueError):
+            store.append([["X"]])
+        with pytest.raises(ValueError):
+            store.append_codes(_codes(["5", "6"]), np.array([3]))
+        with pytest.raises(ValueError):
+            store.append_codes(np.array([0], dtype=np.uint8), np.array([1]))
+
+
+class TestPlay:
+    """Dealing, splitting, doubling and standing in bulk."""
+
+    def test_deal_relocates_and_updates(self):
+        store = HandStore(capacity=2)
+        store.append([["5", "6"], ["10", "6"], ["A", "2"]])
+        store.deal([2, 0, 1], _codes(["9", "A", "K"]))
+        assert [CODE_TO_CARD[code] for code in store.cards(0)] == ["5", "6", "A"]
+        assert [CODE_TO_CARD[code] for code in store.cards(2)] == ["A", "2", "9"]
+        assert list(store.totals) == [12, 26, 12]
+        assert list(store.soft) == [False, False, False]
+        assert store.status[1] == STATUS_CODES[HandStatus.BUSTED]
+
+    def test_deal_rejects_duplicate_indices(self):
+        store = HandStore()
+        store.append([["5"]])
+        with pytest.raises(ValueError):
+            store.deal([0, 0], _codes(["2", "3"]))
+        with pytest.raises(IndexError):
+            store.deal([1], _codes(["2"]))
+
+    def test_split_rejects_duplicate_indices(self):
+        store = HandStore()
+        store.append([["8", "8"]])
+        with pytest.raises(ValueError):
+            store.split_hands([0, 0])
+        assert store.size == 1
+        assert list(store.card_counts) == [2]
+
+    def test_split_hands(self):
+        store = HandStore()
+        store.append([["8", "8"], ["A", "A"]])
+        store._bets[0] = 2.0
+        new_rows = store.split_hands([0, 1])
+        assert list(new_rows) == [2, 3]
+        assert list(store.card_counts) == [1, 1, 1, 1]
+        assert list(store.split) == [True] * 4
+        assert list(store.split_aces) == [False, True, False, True]
+        assert list(store.bets) == [2.0, 1.0, 2.0, 1.0]
+        assert list(store.status) == [STATUS_CODES[HandStatus.ACTIVE]] * 4
+        store.deal([0, 1, 2, 3], _codes(["3", "K", "3", "Q"]))
+        assert list(store.totals) == [11, 21, 11, 21]
+        # 21 after splitting is not a blackjack
+        assert store.status[1] == STATUS_CODES[HandStatus.ACTIVE]
+        with pytest.raises(ValueError):
+            store.split_hands([0])
+
+    def test_split_requires_active_hands(self):
+        """Doubled or standing pairs cannot be split back into active hands."""
+        store = HandStore()
+        store.append([["8", "8"], ["9", "9"], ["7", "7"]])
+        store.double_down([0])
+        store.stand([1])
+        for row in (0, 1):
+            with pytest.raises(ValueError):
+                store.split_hands([row, 2])
+        assert store.size == 3
+        assert list(store.card_counts) == [2, 2, 2]
+        assert list(store.bets) == [2.0, 1.0, 1.0]
+        assert store.status[0] == STATUS_CODES[HandStatus.DOUBLED]
+
+    def test_compact(self):
+        """Relocated cards are reclaimed instead of growing the buffer without bound."""
+        store = HandStore(capacity=4)
+        store.append([["2"], ["3"], ["4"], ["5"]])
+        expected = [["2"], ["3"], ["4"], ["5"]]
+        rng = random.Random(5)
+        for _ in range(200):
+            row = rng.randrange(4)
+            if len(expected[row]) == 8:
+                continue
+            store.deal([row], _codes(["2"]))
+            expected[row].append("2")
+        live = int(store.card_counts.sum())
+        assert len(store._card_buffer) <= 4 * live
+        store.compact()
+        assert len(store.card_buffer) == live
+        assert list(store.offsets) == list(np.cumsum(store.card_counts) - store.card_counts)
+        for row, cards in enumerate(expected):
+            assert [CODE_TO_CARD[code] for code in store.cards(row)] == cards
+        store.deal([0], _codes(["A"]))
+        assert [CODE_TO_CARD[code] for code in store.cards(0)] == expected[0] + ["A"]
+
+    def test_double_and_stand_only_affect_active_hands(self):
+        store = HandStore()
+        store.append([["5", "6"], ["5", "6", "2"], ["A", "K"]])
+        store.double_down([0, 1, 2])
+        assert list(store.bets) == [2.0, 1.0, 1.0]
+        assert store.status[0] == STATUS_CODES[HandStatus.DOUBLED]
+        store.stand([0, 1, 2])
+        assert store.status[0] == STATUS_CODES[HandStatus.DOUBLED]
+        assert store.status[1] == STATUS_CODES[HandStatus.STANDING]
+        assert store.status[2] == STATUS_CODES[HandStatus.BLACKJACK]
+
+
+class TestSettle:
+    """Bulk settlement."""
+
+    def test_outcomes(self):
+        store = HandStore()
+        store.append([["10", "8"], ["10", "7"], ["10", "9"], ["A", "K"], ["10", "6", "9"]])
+        store.append([["5", "6"]])
+        store.double_down([5])
+        store.deal([5], _codes(["9"]))
+        net = store.settle(18)
+        assert list(net) == [0.0, -1.0, 1.0, 1.5, -1.0, 2.0]
+
+    def test_dealer_bust_and_blackjack(self):
+        store = HandStore()
+        store.append([["10", "2"], ["A", "K"], ["10", "6", "9"]])
+        assert list(store.settle(22)) == [1.0, 1.5, -1.0]
+        assert list(store.settle(21, dealer_blackjack=True)) == [-1.0, 0.0, -1.0]
+
+    def test_per_hand_dealer_totals_and_subset(self):
+        store = HandStore()
+        store.append([["10", "8"], ["10", "8"], ["10", "8"]])
+        assert list(store.settle([17, 19], indices=[0, 2])) == [1.0, -1.0]
+
+
+class TestConversion:
+    """Round trips with Hand."""
+
+    def test_round_trip(self):
+        first = Hand(["8", "3"])
+        first.double_down()
+        second = Hand(["A"])
+        second.is_split_hand = True
+        second.split_aces = True
+        store = HandStore.from_hands([first, second, Hand()])
+        hands = store.to_hands()
+        assert [hand.cards for hand in hands] == [["8", "3"], ["A"], []]
+        assert hands[0].status == HandStatus.DOUBLED
+        assert hands[0].bet_multiplier == 2.0
+        assert hands[1].is_split_hand and hands[1].split_aces
+        with pytest.raises(IndexError):
+            store.to_hand(3)
@@ -0,0 +1,145 @@
+"""Unit tests for the headless JSON-lines decision engine."""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.core.basic_strategy import BasicStrategy
+from src.service.headless import HeadlessEngine
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+def _run(engine, events):
+    """Feed events through run() and return parsed output lines."""
+    data = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+    out = io.BytesIO()
+    engine.run(io.BytesIO(data), out)
+    return [json.loads(line) for line in out.getvalue().decode("utf-8").splitlines()]
+
+
+@pytest.fixture
+def engine():
+    """Engine with surrender disabled for predictable decisions."""
+    return HeadlessEngine(BasicStrategy(allow_surrender=False))
+
+
+class TestHeadlessEngine:
+    """Test event handling and output format."""
+
+    def test_one_line_per_event(self, engine):
+        """Test each input event produces exactly one output line."""
+        events = [
+            {"event": "card", "role": "player", "card": "10"},
+            {"event": "upcard", "card": "6"},
+            {"event": "card", "role": "player", "card": "6"},
+        ]
+        output = _run(engine, events)
+        assert len(output) == 3
+        assert output[0]["action"] is None
+        assert output[2]["action"] == "停牌"
+        assert output[2]["cards_remaining"] == 413
+
+    def test_counts_reported(self, engine):
+        """Test running and true counts follow the counter."""
+        output = _run(engine, [{"event": "card", "role": "other", "card": "5"}])
+        assert output[0]["rc"] == 1.5
+        assert output[0]["tc"] == engine.counter.get_true_count()
+
+    def test_split_and_stand(self, engine):
+        """Test split and stand events move between hands."""
+        events = [
+            {"event": "card", "role": "player", "card": "8"},
+            {"event": "card", "role": "player", "card": "8"},
+            {"event": "upcard", "card": "6"},
+            {"event": "split"},
+            {"event": "card", "role": "player", "card": "3"},
+            {"event": "stand"},
+        ]
+        output = _run(engine, events)
+        assert output[2]["action"] == "分牌"
+        assert output[5]["hand"] == 1
+        assert engine.game_state.current_hand.cards == ["8"]
+
+    def test_round_keeps_count_shoe_resets(self, engine):
+        """Test round clears hands but keeps the count; shoe resets both."""
+        output = _run(
+            engine,
+            [
+                {"event": "card", "role": "player", "card": "5"},
+                {"event": "round"},
+                {"event": "shoe"},
+            ],
+        )
+        assert output[1]["rc"] == 1.5
+        assert engine.game_state.current_hand.cards == []
+        assert output[2]["rc"] == 0.0
+
+    def test_invalid_events_report_errors(self, engine):
+        """Test invalid events produce an error line and are not counted."""
+        data = b'{"event": "bogus"}\nnot json\n{"event": "card", "card": "X"}\n'
+        out = io.BytesIO()
+        processed = engine.run(io.BytesIO(data), out)
+        lines = [json.loads(line) for line in out.getvalue().decode("utf-8").splitlines()]
+        assert processed == 0
+        assert len(lines) == 3
+        assert all("error" in line for line in lines)
+
+    def test_rejected_events_leave_state_unchanged(self, engine):
+        """Test an invalid card, role or split changes neither the count nor the hands."""
+        _run(engine, [{"event": "card", "role": "player", "card": "9"}])
+        before = (engine.counter.running_count, engine.counter.cards_seen)
+        output = _run(
+            engine,
+            [
+                {"event": "card", "role": "seat3", "card": "5"},
+                {"event": "upcard", "card": "X"},
+                {"event": "split"},
+            ],
+        )
+        assert all("error" in line for line in output)
+        assert (engine.counter.running_count, engine.counter.cards_seen) == before
+        assert engine.game_state.current_hand.cards == ["9"]
+        assert engine.game_state.get_dealer_upcard() is None
+        assert len(engine.game_state.player_hands) == 1
+
+    def test_other_cards_update_decision_count(self, engine):
+        """Test cards for other seats change the true count used by the cached decision."""
+        events = [
+            {"event": "card", "role": "player", "card": "10"},
+            {"event": "card", "role": "player", "card": "2"},
+            {"event": "upcard", "card": "3"},
+        ]
+        events += [{"event": "card", "role": "other", "card": "2"}] * 40
+        output = _run(engine, events)
+        assert output[2]["action"] == "要牌"
+        assert output[-1]["tc"] >= 2
+        assert output[-1]["action"] == "停牌"
+
+    def test_blank_lines_skipped(self, engine):
+        """Test blank lines produce no output."""
+        out = io.BytesIO()
+        engine.run(io.BytesIO(b'\n\n{"event": "round"}\n\n'), out)
+        assert len(out.getvalue().splitlines()) == 1
+
+    def test_handle_dict(self, engine):
+        """Test the in-process dict API."""
+        result = engine.handle({"event": "card", "role": "player", "card": "A"})
+        assert result["rc"] == -1.0
+
+    def test_command_line(self):
+        """Test the module runs as a pipe filter without PyQt6."""
+        result = subprocess.run(
+            [sys.executable, "-m", "src.service.headless", "--no-surrender"],
+            input=b'{"event": "card", "role": "player", "card": "10"}\n',
+            capture_output=True,
+            cwd=PROJECT_ROOT,
+            check=True,
+        )
+        lines = result.stdout.decode("utf-8").splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["rc"] == -1.0
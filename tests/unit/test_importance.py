@@ -0,0 +1,121 @@
+"""Unit tests for importance sampling of high-count shoes."""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.shoe_history import CODE_TO_CARD  # noqa: E402
+from src.core.card_counter import WongHalvesCounter  # noqa: E402
+from src.simulation.importance import (  # noqa: E402
+    TiltedShoeSource,
+    WeightedResults,
+    run_importance,
+)
+from src.simulation.results import BINS, OVERALL_BIN, tc_bin  # noqa: E402
+from src.simulation.runner import SimulationConfig, run_simulation  # noqa: E402
+from src.simulation.shoes import ordered_shoe  # noqa: E402
+
+CONFIG = SimulationConfig(rules_chart=False, chunk_shoes=20, run_seed=12)
+
+
+def running_count(codes):
+    """Wong Halves running count of a sequence of card codes."""
+    values = WongHalvesCounter(1).card_values
+    return sum(values[CODE_TO_CARD[int(code)]] for code in codes)
+
+
+class TestTiltedShoeSource:
+    """Test tilted shoes and their likelihood ratios."""
+
+    def test_shoes_are_seekable_permutations(self):
+        """Test every shoe is a full shuffle and depends only on its index."""
+        source = TiltedShoeSource(3, decks=2, tilt=0.3)
+        batch = source.shoes(0, 4)
+        for row in batch.cards:
+            assert np.array_equal(np.sort(row), np.sort(ordered_shoe(2)))
+        assert np.array_equal(source.shoe(2).cards[0], batch.cards[2])
+        assert np.array_equal(source.shoe(2).log_weights[0], batch.log_weights[2])
+
+    def test_zero_tilt_has_unit_weights(self):
+        """Test an untilted shoe carries no likelihood ratio."""
+        batch = TiltedShoeSource(3, decks=2, tilt=0.0).shoes(0, 3)
+        assert np.allclose(batch.log_weights, 0.0)
+
+    def test_tilt_raises_the_count(self):
+        """Test a positive tilt deals low cards early."""
+        plain = TiltedShoeSource(5, decks=2, tilt=0.0).shoes(0, 200).cards
+        tilted = TiltedShoeSource(5, decks=2, tilt=0.3).shoes(0, 200).cards
+        assert np.mean([running_count(row[:30]) for row in tilted]) > 2.0
+        assert abs(np.mean([running_count(row[:30]) for row in plain])) < 1.0
+
+    def test_likelihood_ratio_has_unit_mean(self):
+        """Test the ratio of any prefix averages to one under the tilted shuffle."""
+        batch = TiltedShoeSource(8, decks=1, tilt=0.3).shoes(0, 4000)
+        for prefix in (1, 5, 15):
+            assert np.exp(batch.log_weights[:, prefix]).mean() == pytest.approx(1.0, abs=0.05)
+
+    def test_weights_constant_after_depth(self):
+        """Test cards past the tilted depth are uniform and add no ratio."""
+        batch = TiltedShoeSource(3, decks=1, tilt=0.3, depth=10).shoes(0, 2)
+        assert np.all(batch.log_weights[:, 10:] == batch.log_weights[:, 10:11])
+
+    def test_invalid_depth(self):
+        """Test a depth beyond the shoe is rejected."""
+        with pytest.raises(ValueError):
+            TiltedShoeSource(3, decks=1, depth=60)
+
+
+class TestWeightedResults:
+    """Test the weighted ratio estimates."""
+
+    def test_unit_weights_match_plain_mean(self):
+        """Test unit weights reproduce the plain per-bin mean."""
+        results = WeightedResults()
+        for nets in ([1.0, -1.0, 1.5], [-1.0, 0.0]):
+            counts = np.zeros(BINS)
+            sums = np.zeros(BINS)
+            for index in (OVERALL_BIN, tc_bin(4.2)):
+                counts[index] = len(nets)
+                sums[index] = sum(nets)
+            results.add_shoe(counts, counts, sums)
+        assert results.rounds == 5
+        assert results.overall().mean == pytest.approx(0.1)
+        assert results.by_true_count()[4].mean == pytest.approx(0.1)
+        assert results.at_least(3).samples == 5
+        assert results.at_least(5).samples == 0
+
+    def test_weights_shift_the_estimate(self):
+        """Test heavier shoes count for more in the ratio estimate."""
+        results = WeightedResults()
+        for weight, net in ((3.0, 1.0), (1.0, -1.0)):
+            counts = np.zeros(BINS)
+            sums = np.zeros(BINS)
+            counts[OVERALL_BIN] = 1
+            sums[OVERALL_BIN] = net
+            results.add_shoe(counts, weight * counts, weight * sums)
+        assert results.overall().mean == pytest.approx(0.5)
+        assert results.overall().stderr > 0
+
+
+class TestRunImportance:
+    """Test weighted simulation runs."""
+
+    def test_more_high_count_hands_and_agreement_with_plain(self):
+        """Test tilting samples more high counts and agrees with plain simulation."""
+        tilted = run_importance(CONFIG, 200)
+        plain = run_simulation(CONFIG._replace(run_seed=13), 200)
+        assert tilted.at_least(4).samples > 2 * sum(
+            stats.samples for bucket, stats in plain.by_true_count().items() if bucket >= 4
+        )
+        error = math.hypot(tilted.overall().stderr, plain.overall().stderr)
+        assert abs(tilted.overall().mean - plain.overall().mean) < 4 * error
+        assert 0 < tilted.effective_rounds < tilted.rounds
+
+    def test_independent_of_process_count(self):
+        """Test pooled runs reproduce the in-process result."""
+        single = run_importance(CONFIG, 40)
+        pooled = run_importance(CONFIG, 40, processes=2)
+        assert np.array_equal(single.data, pooled.data)
+        assert np.array_equal(single.weights, pooled.weights)
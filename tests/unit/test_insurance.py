@@ -0,0 +1,81 @@
+"""Unit tests for the composition-based insurance analyzer."""
+
+import pytest
+
+from src.core.card_counter import WongHalvesCounter
+from src.core.insurance import analyze_insurance
+
+
+class TestRankTracking:
+    """Per-rank tracking in WongHalvesCounter."""
+
+    def test_face_cards_count_as_tens(self):
+        counter = WongHalvesCounter(num_decks=1)
+        for card in ["10", "J", "Q", "K"]:
+            counter.add_card(card)
+        assert counter.get_rank_remaining("10") == 12
+        assert counter.get_rank_remaining("K") == 12
+        assert counter.get_rank_remaining("A") == 4
+
+    def test_remove_and_reset(self):
+        counter = WongHalvesCounter(num_decks=2)
+        counter.add_card("A")
+        counter.add_card("A")
+        counter.remove_card("A")
+        assert counter.get_rank_remaining("A") == 7
+        counter.reset()
+        assert counter.get_rank_remaining("A") == 8
+
+    def test_clone_does_not_share_rank_state(self):
+        counter = WongHalvesCounter(num_decks=1)
+        counter.add_card("5")
+        copy = counter.clone()
+        copy.add_card("5")
+        assert counter.get_rank_remaining("5") == 3
+        assert copy.get_rank_remaining("5") == 2
+
+
+class TestAnalyzeInsurance:
+    """Exact insurance EV from the remaining shoe."""
+
+    def test_full_shoe_after_dealer_ace(self):
+        counter = WongHalvesCounter(num_decks=1)
+        counter.add_card("A")
+        advice = analyze_insurance(counter)
+        assert advice is not None
+        assert advice.ten_probability == pytest.approx(16 / 51)
+        assert advice.insurance_ev == pytest.approx(3 * 16 / 51 - 1)
+        assert advice.even_money_gain == pytest.approx(1 - 1.5 * (1 - 16 / 51))
+        assert not advice.take
+
+    def test_ten_rich_shoe_takes_insurance(self):
+        counter = WongHalvesCounter(num_decks=1)
+        for card in ["A", "2", "3", "4", "5", "6", "2", "3"]:
+            counter.add_card(card)
+        advice = analyze_insurance(counter)
+        assert advice is not None
+        assert advice.ten_probability == pytest.approx(16 / 44)
+        assert advice.take
+
+    def test_high_count_without_tens_declines(self):
+        """A high true count driven by small cards does not help when tens are gone."""
+        counter = WongHalvesCounter(num_decks=1)
+        for card in ["A"] + ["3", "4", "5", "6"] * 4 + ["10"] * 7:
+            counter.add_card(card)
+        assert counter.get_true_count() >= 3
+        advice = analyze_insurance(counter)
+        assert advice is not None
+        assert advice.ten_probability == pytest.approx(9 / 28)
+        assert not advice.take
+
+    def test_inconsistent_composition_is_unavailable(self):
+        counter = WongHalvesCounter(num_decks=1)
+        for _ in range(5):
+            counter.add_card("A")
+        assert analyze_insurance(counter) is None
+
+    def test_empty_shoe_is_unavailable(self):
+        counter = WongHalvesCounter(num_decks=1)
+        for card in ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"] * 4:
+            counter.add_card(card)
+        assert analyze_insurance(counter) is None
@@ -0,0 +1,241 @@
+"""Unit tests for the shoe-replay audit pipeline."""
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.analytics.replay import (  # noqa: E402
+    EVENT_ACTION,
+    EVENT_CARD,
+    EVENT_ROUND,
+    EVENT_SHOE,
+    ReplayAuditor,
+    ReplayEvent,
+    ReplayStats,
+    audit_parallel,
+    iter_csv_events,
+    iter_history_events,
+    iter_journal_events,
+    recommend_history,
+    split_shoes,
+)
+from src.analytics.shoe_history import (  # noqa: E402
+    ACTION_CODES,
+    ROLE_DEALER,
+    ROLE_PLAYER,
+    ShoeHistoryReader,
+    ShoeHistoryWriter,
+)
+from src.core.basic_strategy import BasicStrategy  # noqa: E402
+from src.core.hand import HandStatus  # noqa: E402
+
+
+def _round(player, dealer, actions):
+    """Build events for one round: two player cards, dealer upcard, then actions."""
+    events = [ReplayEvent(EVENT_ROUND)]
+    events += [ReplayEvent(EVENT_CARD, card, ROLE_PLAYER) for card in player]
+    events.append(ReplayEvent(EVENT_CARD, dealer, ROLE_DEALER))
+    events += [ReplayEvent(EVENT_ACTION, action) for action in actions]
+    return events
+
+
+@pytest.fixture
+def auditor():
+    """Auditor with surrender disabled for predictable decisions."""
+    return ReplayAuditor(BasicStrategy(allow_surrender=False))
+
+
+class TestReplayAuditor:
+    """Test event-by-event reconstruction and divergence detection."""
+
+    def test_matching_action_not_flagged(self, auditor):
+        """Test standing on hard 20 is not flagged."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["10", "K"], "6", ["S"])
+        assert list(auditor.process(events)) == []
+        assert auditor.stats.decisions == 1
+        assert auditor.stats.events == len(events)
+
+    def test_divergent_action_flagged(self, auditor):
+        """Test hitting hard 20 is flagged with the recommendation."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["10", "K"], "6", ["H"])
+        divergences = list(auditor.process(events))
+        assert len(divergences) == 1
+        divergence = divergences[0]
+        assert divergence.logged_action == "要牌"
+        assert divergence.recommended_action == "停牌"
+        assert divergence.player_cards == ("10", "K")
+        assert divergence.dealer_card == "6"
+        assert (divergence.shoe, divergence.round) == (0, 0)
+
+    def test_count_carries_across_rounds(self, auditor):
+        """Test the running count persists across rounds and resets on new shoe."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["5", "5"], "5", [])
+        list(auditor.process(events))
+        assert auditor.counter.running_count == 4.5
+        list(auditor.process(_round(["2", "2"], "2", [])))
+        assert auditor.counter.running_count == 6.0
+        list(auditor.process([ReplayEvent(EVENT_SHOE)]))
+        assert auditor.counter.running_count == 0.0
+
+    def test_split_reconstructs_hands(self, auditor):
+        """Test a logged split is applied to the reconstructed game state."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["8", "8"], "6", ["Y"])
+        events.append(ReplayEvent(EVENT_CARD, "3", ROLE_PLAYER))
+        list(auditor.process(events))
+        assert len(auditor.game_state.player_hands) == 2
+        assert auditor.game_state.current_hand.cards == ["8", "3"]
+
+    def test_bust_after_split_moves_to_next_hand(self, auditor):
+        """Test a busted split hand is closed and play continues on the second hand."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["8", "8"], "10", ["Y"])
+        events += [ReplayEvent(EVENT_CARD, "5", ROLE_PLAYER), ReplayEvent(EVENT_ACTION, "H")]
+        events.append(ReplayEvent(EVENT_CARD, "10", ROLE_PLAYER))
+        events += [ReplayEvent(EVENT_CARD, "10", ROLE_PLAYER), ReplayEvent(EVENT_ACTION, "S")]
+        assert list(auditor.process(events)) == []
+        first, second = auditor.game_state.player_hands
+        assert first.cards == ["8", "5", "10"]
+        assert first.status == HandStatus.BUSTED
+        assert second.cards == ["8", "10"]
+        assert second.status == HandStatus.STANDING
+
+    def test_doubled_bust_keeps_hand_order(self, auditor):
+        """Test busting a doubled split hand moves on exactly once."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["8", "8"], "10", ["Y"])
+        events += [ReplayEvent(EVENT_CARD, "5", ROLE_PLAYER), ReplayEvent(EVENT_ACTION, "D")]
+        events.append(ReplayEvent(EVENT_CARD, "K", ROLE_PLAYER))
+        events.append(ReplayEvent(EVENT_CARD, "2", ROLE_PLAYER))
+        list(auditor.process(events))
+        first, second = auditor.game_state.player_hands
+        assert first.cards == ["8", "5", "K"]
+        assert first.status == HandStatus.BUSTED
+        assert second.cards == ["8", "2"]
+        assert auditor.game_state.current_hand is second
+
+
+class TestReplaySources:
+    """Test reading journal, CSV and binary history sources."""
+
+    def test_journal_events(self, tmp_path):
+        """Test JSON-lines journal parsing."""
+        path = tmp_path / "session.jsonl"
+        lines = [
+            {"event": "shoe"},
+            {"event": "round"},
+            {"event": "card", "role": "player", "card": "10"},
+            {"event": "card", "role": "dealer", "card": "6"},
+            {"event": "action", "action": "S"},
+        ]
+        path.write_text("\n".join(json.dumps(line) for line in lines), encoding="utf-8")
+        events = list(iter_journal_events(path))
+        assert [event.kind for event in events] == ["shoe", "round", "card", "card", "action"]
+        assert events[3].role == ROLE_DEALER
+
+    def test_journal_invalid_event(self, tmp_path):
+        """Test unknown journal events raise ValueError."""
+        path = tmp_path / "bad.jsonl"
+        path.write_text('{"event": "bogus"}\n', encoding="utf-8")
+        with pytest.raises(ValueError):
+            list(iter_journal_events(path))
+
+    def test_csv_events(self, tmp_path):
+        """Test CSV rows produce shoe and round boundaries."""
+        path = tmp_path / "session.csv"
+        path.write_text(
+            "shoe,round,role,card,action\n"
+            "1,1,player,10,\n"
+            "1,1,dealer,6,\n"
+            "1,1,,,S\n"
+            "1,2,player,9,\n"
+            "2,1,player,A,\n",
+            encoding="utf-8",
+        )
+        kinds = [event.kind for event in iter_csv_events(path)]
+        assert kinds == [
+            "shoe", "round", "card", "card", "action",
+            "round", "card",
+            "shoe", "round", "card",
+        ]  # fmt: skip
+
+    def test_history_events_interleave_actions(self, tmp_path):
+        """Test binary history actions are placed at their recorded positions."""
+        path = tmp_path / "history.bjsh"
+        with ShoeHistoryWriter(path) as writer:
+            writer.add_round(
+                ["10", "6", "9", "5"],
+                roles=[ROLE_PLAYER, ROLE_PLAYER, ROLE_DEALER, ROLE_PLAYER],
+                actions=[("H", 3), ("S", 4)],
+            )
+        with ShoeHistoryReader(path) as reader:
+            events = list(iter_history_events(reader))
+        assert [(event.kind, event.value) for event in events] == [
+            ("shoe", ""),
+            ("round", ""),
+            ("card", "10"),
+            ("card", "6"),
+            ("card", "9"),
+            ("action", "H"),
+            ("card", "5"),
+            ("action", "S"),
+        ]
+
+    def test_split_shoes(self):
+        """Test splitting a stream into per-shoe batches."""
+        events = [ReplayEvent(EVENT_SHOE)] + _round(["2", "3"], "4", [])
+        events += [ReplayEvent(EVENT_SHOE)] + _round(["5", "6"], "7", [])
+        batches = list(split_shoes(events))
+        assert len(batches) == 2
+        assert all(batch[0].kind == EVENT_SHOE for batch in batches)
+
+
+class TestBatchDecisions:
+    """Test batch recommendations over a shoe history file."""
+
+    def test_recommendations_align_with_recorded_actions(self, tmp_path):
+        """Test one recommended code per recorded action, in file order."""
+        path = tmp_path / "history.bjsh"
+        player_dealer = [ROLE_PLAYER, ROLE_PLAYER, ROLE_DEALER]
+        with ShoeHistoryWriter(path) as writer:
+            writer.add_round(
+                ["10", "6", "9", "5"],
+                roles=player_dealer + [ROLE_PLAYER],
+                actions=[("H", 3), ("S", 4)],
+            )
+            writer.end_shoe()
+            writer.add_round(["10", "K", "A"], roles=player_dealer, actions=[("I", 3), ("H", 3)])
+        strategy = BasicStrategy(allow_surrender=False)
+        with ShoeHistoryReader(path) as reader:
+            codes = recommend_history(reader, strategy)
+            assert len(codes) == len(reader.actions)
+            assert list(codes) == [ACTION_CODES["H"], ACTION_CODES["S"], 0, ACTION_CODES["S"]]
+
+            first = int(reader.action_offsets[reader.shoe_offsets[1]])
+            tail = recommend_history(reader, strategy, start=1)
+            assert list(tail) == list(codes[first:])
+
+
+class TestParallelAudit:
+    """Test fanning out the audit across processes."""
+
+    def test_parallel_matches_serial(self):
+        """Test parallel audit yields the same divergences in shoe order."""
+        events = []
+        for _ in range(4):
+            events.append(ReplayEvent(EVENT_SHOE))
+            events += _round(["10", "K"], "6", ["H"])
+            events += _round(["10", "6"], "7", ["S"])
+
+        serial = list(ReplayAuditor(BasicStrategy(allow_surrender=False)).process(events))
+        stats = ReplayStats()
+        parallel = list(
+            audit_parallel(
+                events, processes=2, strategy_kwargs={"allow_surrender": False}, stats=stats
+            )
+        )
+
+        assert parallel == serial
+        assert [d.shoe for d in parallel] == [0, 0, 1, 1, 2, 2, 3, 3]
+        assert stats.shoes == 4
+        assert stats.events == len(events)
+        assert stats.events_per_second > 0
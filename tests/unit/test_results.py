@@ -0,0 +1,95 @@
+"""Unit tests for mergeable simulation result histograms."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.simulation.results import (  # noqa: E402
+    ACTION_INDEX,
+    BINS,
+    HAND_CLASSES,
+    ResultHistograms,
+    ResultRecorder,
+    SharedResults,
+    hand_class_index,
+    tc_bin,
+    upcard_index,
+)
+
+
+class TestResultHistograms:
+    """Test Welford-style batch accumulation and merging."""
+
+    def test_batches_match_direct_moments(self):
+        """Test accumulating several batches equals the moments of all samples."""
+        rng = np.random.default_rng(0)
+        bins = rng.integers(0, 5, size=3000)
+        values = rng.normal(size=3000)
+        histograms = ResultHistograms()
+        for part in np.array_split(np.arange(3000), 7):
+            histograms.add_batch(bins[part], values[part])
+        for index in range(5):
+            selected = values[bins == index]
+            stats = histograms.stats(index)
+            assert stats.samples == len(selected)
+            assert stats.mean == pytest.approx(selected.mean())
+            assert stats.sd == pytest.approx(selected.std(ddof=1))
+
+    def test_merge_equals_single_accumulation(self):
+        """Test merging two partial histograms equals accumulating everything once."""
+        rng = np.random.default_rng(1)
+        bins = rng.integers(0, BINS, size=5000)
+        values = rng.normal(size=5000)
+        whole = ResultHistograms()
+        whole.add_batch(bins, values)
+        first, second = ResultHistograms(), ResultHistograms()
+        first.add_batch(bins[:1200], values[:1200])
+        second.add_batch(bins[1200:], values[1200:])
+        first.merge(second)
+        assert np.array_equal(first.count, whole.count)
+        assert np.allclose(first.mean, whole.mean)
+        assert np.allclose(first.m2, whole.m2)
+
+    def test_recorder_fills_every_section(self):
+        """Test one recorded round lands in the overall, count, hand and action bins."""
+        recorder = ResultRecorder()
+        hand = hand_class_index("10", "6")
+        recorder.record(-2.0, 2, 1.4, hand, upcard_index("K"), ACTION_INDEX["H"])
+        histograms = ResultHistograms()
+        recorder.flush(histograms)
+        assert len(recorder) == 0
+        assert histograms.overall().mean == -2.0
+        assert histograms.by_true_count() == {1: histograms.stats(tc_bin(1.4))}
+        assert histograms.by_true_count()[1].mean == -1.0
+        assert list(histograms.by_hand()) == [("H16", "10")]
+        assert list(histograms.by_action()) == ["H"]
+
+
+class TestHandClasses:
+    """Test starting-hand classification."""
+
+    def test_classes(self):
+        """Test hard, soft, blackjack and pair classification."""
+        assert HAND_CLASSES[hand_class_index("J", "Q")] == "H20"
+        assert HAND_CLASSES[hand_class_index("A", "7")] == "S18"
+        assert HAND_CLASSES[hand_class_index("K", "A")] == "BJ"
+        assert HAND_CLASSES[hand_class_index("A", "A")] == "PA"
+        assert HAND_CLASSES[hand_class_index("Q", "Q")] == "P10"
+        assert tc_bin(-25.0) == tc_bin(-10.0) and tc_bin(25.0) == tc_bin(10.0)
+
+
+class TestSharedResults:
+    """Test per-lane shared-memory slots."""
+
+    def test_attach_and_merge(self):
+        """Test a second handle writes into the creator's lanes."""
+        with SharedResults(2) as shared:
+            attached = SharedResults(2, shared.name)
+            lane = attached.lane(1)
+            lane.add_batch(np.array([0, 0]), np.array([1.0, 3.0]))
+            del lane
+            attached.close()
+            merged = shared.merged()
+            assert merged.rounds == 2 and merged.overall().mean == 2.0
+        with pytest.raises(ValueError):
+            SharedResults(0)
@@ -0,0 +1,193 @@
+"""Unit tests for the SQLite session store."""
+
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.analytics.session_store import (
+    DecisionRecord,
+    HandRecord,
+    SessionStore,
+    hand_record,
+    true_count_bucket,
+)
+from src.core.hand import Hand
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Session store backed by a temporary database."""
+    with SessionStore(tmp_path / "sessions.db") as session_store:
+        yield session_store
+
+
+def _fill(store):
+    """Record a few rounds at different true counts."""
+    session_id = store.start_session(num_decks=8)
+    shoe_id = store.start_shoe(session_id)
+    store.record_round(
+        shoe_id,
+        2.4,
+        ["10", "7"],
+        [HandRecord(["10", "K"], 20, False, 1.0)],
+        [DecisionRecord(0, 20, False, "10", "停牌", "停牌")],
+    )
+    store.record_round(
+        shoe_id,
+        2.9,
+        ["6", "10", "5"],
+        [HandRecord(["10", "6"], 16, False, -1.0)],
+        [DecisionRecord(0, 16, False, "10", "停牌", "要牌", is_deviation=True)],
+    )
+    store.record_round(
+        shoe_id,
+        -1.2,
+        ["9", "9"],
+        [HandRecord(["9", "9"], 18, False, 0.0)],
+        [DecisionRecord(0, 18, False, "9", "停牌", "停牌")],
+    )
+    store.flush()
+    return session_id, shoe_id
+
+
+class TestSessionStore:
+    """Test persistence and analytics queries."""
+
+    def test_wal_mode_enabled(self, store):
+        """Test the database uses write-ahead logging."""
+        conn = sqlite3.connect(store.path)
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            conn.close()
+
+    def test_indexes_created(self, store):
+        """Test analytics indexes exist."""
+        conn = sqlite3.connect(store.path)
+        try:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        finally:
+            conn.close()
+        assert {"idx_rounds_bucket", "idx_decisions_hand", "idx_rounds_played"} <= names
+
+    def test_ids_unique_across_stores(self, tmp_path):
+        """Test two stores on one database get distinct ids from the database."""
+        path = tmp_path / "sessions.db"
+        with SessionStore(path) as first, SessionStore(path) as second:
+            ids = [first.start_session(), second.start_session(), first.start_session()]
+            shoes = [first.start_shoe(ids[0]), second.start_shoe(ids[1])]
+            first.record_round(shoes[0], 0.0, ["10"], [HandRecord(["9", "9"], 18, False, 0.0)])
+            second.record_round(shoes[1], 0.0, ["10"], [HandRecord(["9", "8"], 17, False, 0.0)])
+        assert ids == [1, 2, 3]
+        assert shoes == [1, 2]
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute(
+                "SELECT r.shoe_id, h.total FROM hands h JOIN rounds r ON r.id = h.round_id "
+                "ORDER BY r.shoe_id"
+            ).fetchall()
+        finally:
+            conn.close()
+        assert rows == [(1, 18), (2, 17)]
+
+    def test_failed_rounds_kept_and_reported(self, store):
+        """Test a failing round does not drop the rest of its batch."""
+        shoe_id = store.start_shoe(store.start_session())
+        good = [HandRecord(["10", "8"], 18, False, 1.0)]
+        bad = [HandRecord(["10", "8"], None, False, 1.0)]
+        store.record_round(shoe_id, 0.0, ["10"], good)
+        store.record_round(shoe_id, 0.0, ["10"], bad)
+        store.record_round(shoe_id, 0.0, ["10"], bad)
+        store.record_round(shoe_id, 0.0, ["10"], good)
+        with pytest.raises(RuntimeError, match="2 個錯誤"):
+            store.flush()
+        assert len(store.failed_rounds) == 2
+        assert store.failed_rounds[0].hands[0][2] is None
+        assert store.win_rate_by_true_count()[0].hands == 2
+        store.flush()
+
+        store.retry_failed()
+        with pytest.raises(RuntimeError, match="2 輪待重試"):
+            store.flush()
+        assert len(store.failed_rounds) == 2
+
+    def test_pending_rounds_written_at_exit(self, tmp_path):
+        """Test rounds queued by a store that is never closed are written at exit."""
+        path = tmp_path / "sessions.db"
+        script = (
+            "from src.analytics.session_store import SessionStore\n"
+            f"store = SessionStore({str(path)!r})\n"
+            "shoe_id = store.start_shoe(store.start_session())\n"
+            "for _ in range(100):\n"
+            "    store.record_round(shoe_id, 0.0, ['10', '7'], [])\n"
+        )
+        root = Path(__file__).resolve().parents[2]
+        subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+        conn = sqlite3.connect(path)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0] == 100
+        finally:
+            conn.close()
+
+    def test_win_rate_by_true_count(self, store):
+        """Test win rate grouped by true count bucket."""
+        _fill(store)
+        rows = {row.tc_bucket: row for row in store.win_rate_by_true_count()}
+        assert set(rows) == {-2, 2}
+        assert rows[2].hands == 2
+        assert rows[2].wins == 1
+        assert rows[2].losses == 1
+        assert rows[2].win_rate == pytest.approx(0.5)
+        assert rows[-2].pushes == 1
+
+    def test_deviation_frequency(self, store):
+        """Test deviation frequency by hand and upcard."""
+        _fill(store)
+        rows = {(r.player_total, r.dealer_card): r for r in store.deviation_frequency()}
+        assert rows[(16, "10")].deviations == 1
+        assert rows[(16, "10")].frequency == pytest.approx(1.0)
+        assert rows[(20, "10")].frequency == pytest.approx(0.0)
+
+    def test_decision_accuracy(self, store):
+        """Test agreement between recommended and taken actions."""
+        _fill(store)
+        accuracy = store.decision_accuracy_by_true_count()
+        assert accuracy[2] == pytest.approx(0.5)
+        assert accuracy[-2] == pytest.approx(1.0)
+
+    def test_date_filter(self, store):
+        """Test date range filters exclude rows outside the range."""
+        _fill(store)
+        assert store.win_rate_by_true_count(since="2999-01-01") == []
+        assert len(store.win_rate_by_true_count(until="2999-01-01")) == 2
+
+    def test_reopen_continues_ids(self, tmp_path):
+        """Test ids continue after reopening an existing database."""
+        path = tmp_path / "sessions.db"
+        with SessionStore(path) as first:
+            first.start_session()
+        with SessionStore(path) as second:
+            assert second.start_session() == 2
+
+    def test_write_after_close(self, tmp_path):
+        """Test writing after close raises ValueError."""
+        store = SessionStore(tmp_path / "sessions.db")
+        store.close()
+        with pytest.raises(ValueError):
+            store.start_session()
+
+    def test_hand_record_from_hand(self):
+        """Test building a record from a Hand object."""
+        hand = Hand(["A", "6"])
+        record = hand_record(hand, 1.5)
+        assert record.total == 17
+        assert record.is_soft
+        assert record.result == 1.5
+
+    def test_true_count_bucket(self):
+        """Test buckets floor the true count."""
+        assert true_count_bucket(2.9) == 2
+        assert true_count_bucket(-0.1) == -1
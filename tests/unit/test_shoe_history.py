@@ -0,0 +1,123 @@
+"""Unit tests for the binary shoe-history format."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analytics.shoe_history import (  # noqa: E402
+    CODE_TO_ACTION,
+    ROLE_DEALER,
+    ROLE_PLAYER,
+    ShoeHistoryReader,
+    ShoeHistoryWriter,
+    decode_cards,
+    encode_cards,
+)
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    """Write a small two-shoe history file."""
+    path = tmp_path / "history.bjsh"
+    with ShoeHistoryWriter(path) as writer:
+        writer.begin_shoe()
+        writer.add_round(
+            ["10", "6", "9", "K"],
+            roles=[ROLE_PLAYER, ROLE_PLAYER, ROLE_DEALER, ROLE_DEALER],
+            actions=[("S", 3)],
+        )
+        writer.add_round(["A", "Q", "5"], roles=[ROLE_PLAYER, ROLE_PLAYER, ROLE_DEALER])
+        writer.begin_shoe()
+        writer.add_round(
+            ["8", "8", "7", "3", "J"],
+            roles=[ROLE_PLAYER, ROLE_PLAYER, ROLE_DEALER, ROLE_PLAYER, ROLE_PLAYER],
+            actions=[("Y", 3), ("S", 4), ("S", 5)],
+        )
+    return path
+
+
+class TestShoeHistory:
+    """Test writing and memory-mapped reading of shoe histories."""
+
+    def test_encode_decode_roundtrip(self):
+        """Test card codes round-trip through one byte per card."""
+        cards = ["A", "2", "10", "J", "Q", "K"]
+        codes = np.frombuffer(encode_cards(cards), dtype=np.uint8)
+        assert len(codes) == len(cards)
+        assert decode_cards(codes) == cards
+
+    def test_encode_invalid_card(self):
+        """Test invalid card labels are rejected."""
+        with pytest.raises(ValueError):
+            encode_cards(["X"])
+
+    def test_header_counts(self, history_file):
+        """Test header counts match what was written."""
+        with ShoeHistoryReader(history_file) as reader:
+            assert len(reader) == 2
+            assert reader.n_rounds == 3
+            assert reader.n_cards == 12
+            assert reader.n_actions == 4
+
+    def test_shoe_views(self, history_file):
+        """Test per-shoe views contain the shoe's cards without copying."""
+        with ShoeHistoryReader(history_file) as reader:
+            shoe = reader.shoe(0)
+            assert decode_cards(shoe.cards) == ["10", "6", "9", "K", "A", "Q", "5"]
+            assert shoe.cards.base is not None
+            assert not shoe.cards.flags.writeable
+
+            second = reader.shoe(1)
+            assert decode_cards(second.cards) == ["8", "8", "7", "3", "J"]
+
+    def test_iter_rounds(self, history_file):
+        """Test iterating rounds of a shoe yields roles and actions."""
+        with ShoeHistoryReader(history_file) as reader:
+            rounds = list(reader.iter_rounds(1))
+            assert len(rounds) == 1
+            record = rounds[0]
+            assert record.roles.tolist() == [0, 0, 1, 0, 0]
+            assert [CODE_TO_ACTION[a] for a in record.actions.tolist()] == ["Y", "S", "S"]
+            assert record.action_positions.tolist() == [3, 4, 5]
+
+    def test_iter_shoes_range(self, history_file):
+        """Test iterating a sub-range of shoes."""
+        with ShoeHistoryReader(history_file) as reader:
+            assert [shoe.shoe_index for shoe in reader.iter_shoes(1)] == [1]
+
+    def test_index_out_of_range(self, history_file):
+        """Test out-of-range shoe index raises IndexError."""
+        with ShoeHistoryReader(history_file) as reader:
+            with pytest.raises(IndexError):
+                reader.shoe(2)
+
+    def test_mismatched_roles(self, tmp_path):
+        """Test role/card length mismatch is rejected."""
+        with ShoeHistoryWriter(tmp_path / "bad.bjsh") as writer:
+            with pytest.raises(ValueError):
+                writer.add_round(["2", "3"], roles=[ROLE_PLAYER])
+
+    def test_invalid_file(self, tmp_path):
+        """Test non-history files are rejected."""
+        path = tmp_path / "bad.bjsh"
+        path.write_bytes(b"NOPE" + b"\0" * 100)
+        with pytest.raises(ValueError):
+            ShoeHistoryReader(path)
+
+    def test_missing_file(self, tmp_path):
+        """Test missing file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            ShoeHistoryReader(tmp_path / "missing.bjsh")
+
+    def test_streaming_flush(self, tmp_path):
+        """Test many rounds survive internal buffer flushes."""
+        path = tmp_path / "large.bjsh"
+        with ShoeHistoryWriter(path) as writer:
+            for _ in range(50):
+                writer.begin_shoe()
+                for _ in range(400):
+                    writer.add_round(["2", "3", "4", "5"])
+        with ShoeHistoryReader(path) as reader:
+            assert len(reader) == 50
+            assert reader.n_cards == 50 * 400 * 4
+            assert decode_cards(reader.shoe(49).cards[:4]) == ["2", "3", "4", "5"]
@@ -0,0 +1,98 @@
+"""Unit tests for batched and memory-mapped shoe sources."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.simulation.shoes import (  # noqa: E402
+    MemmapShoeSource,
+    RandomShoeSource,
+    _ShoeSourceBase,
+    ordered_shoe,
+    write_shoe_file,
+)
+
+
+class TestRandomShoeSource:
+    """Test batched row-wise shuffling."""
+
+    def test_each_row_is_a_full_shoe(self):
+        """Test every shuffled row is a permutation of an 8-deck shoe."""
+        batch = RandomShoeSource(seed=1, batch_size=64).next_batch()
+        assert batch.cards.shape == (64, 416)
+        expected = np.sort(ordered_shoe(8))
+        assert all(np.array_equal(np.sort(row), expected) for row in batch.cards)
+        assert not np.array_equal(batch.cards[0], batch.cards[1])
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed yields the same shoes."""
+        first = RandomShoeSource(seed=5, batch_size=8).next_batch().cards.copy()
+        second = RandomShoeSource(seed=5, batch_size=8).next_batch().cards
+        assert np.array_equal(first, second)
+
+    def test_cut_and_burn(self):
+        """Test dealt cards stop at the cut card and skip the burn cards."""
+        source = RandomShoeSource(decks=6, penetration=0.8, burn=3, batch_size=4, seed=2)
+        batch = source.next_batch()
+        assert set(batch.cuts) == {int(312 * 0.8)}
+        dealt = next(iter(source))
+        assert len(dealt) == int(312 * 0.8) - 3
+
+    def test_cut_jitter_stays_in_range(self):
+        """Test randomized cut positions stay within the jitter window."""
+        source = RandomShoeSource(penetration=0.75, cut_jitter=26, batch_size=500, seed=3)
+        cuts = source.next_batch().cuts
+        assert cuts.min() >= 312 - 26 and cuts.max() <= 312 + 26
+        assert len(set(cuts.tolist())) > 1
+
+    def test_invalid_arguments(self):
+        """Test impossible penetration and burn settings are rejected."""
+        with pytest.raises(ValueError):
+            RandomShoeSource(penetration=0.0)
+        with pytest.raises(ValueError):
+            RandomShoeSource(decks=1, penetration=0.01, burn=5)
+
+    def test_base_requires_next_batch(self):
+        """Test a shoe source without next_batch cannot be instantiated."""
+
+        class Incomplete(_ShoeSourceBase):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete(52, 0.75, 1, 0, 1, None)
+
+
+class TestMemmapShoeSource:
+    """Test streaming pre-generated shoes from disk."""
+
+    def test_round_trip(self, tmp_path):
+        """Test shoes written to disk stream back in order and stop at the end."""
+        path = write_shoe_file(tmp_path / "shoes.npy", 10, decks=2, seed=9)
+        source = MemmapShoeSource(path, penetration=0.5, burn=0, batch_size=4)
+        assert len(source) == 10
+        sizes = []
+        while True:
+            try:
+                sizes.append(len(source.next_batch().cards))
+            except StopIteration:
+                break
+        assert sizes == [4, 4, 2]
+
+        regenerated = write_shoe_file(tmp_path / "again.npy", 10, decks=2, seed=9)
+        assert np.array_equal(np.load(path), np.load(regenerated))
+
+    def test_iteration_and_loop(self, tmp_path):
+        """Test iteration yields dealt slices and looping restarts the file."""
+        path = write_shoe_file(tmp_path / "shoes.npy", 3, decks=1, seed=1)
+        shoes = list(MemmapShoeSource(path, penetration=0.5, burn=1))
+        assert len(shoes) == 3 and all(len(shoe) == 25 for shoe in shoes)
+
+        looping = MemmapShoeSource(path, batch_size=2, loop=True)
+        assert sum(len(looping.next_batch().cards) for _ in range(4)) == 6
+
+    def test_rejects_wrong_format(self, tmp_path):
+        """Test files that are not uint8 shoe matrices are rejected."""
+        path = tmp_path / "bad.npy"
+        np.save(path, np.zeros(10, dtype=np.int32))
+        with pytest.raises(ValueError):
+            MemmapShoeSource(path)
@@ -0,0 +1,173 @@
+"""Unit tests for the rule-configurable basic strategy generator."""
+
+import pytest
+
+from src.core.basic_strategy import BasicStrategy
+from src.core.strategy_generator import (
+    StrategyRules,
+    build_composition_index,
+    cached_strategy_file,
+    card_composition_key,
+    dealer_distribution,
+    evaluate_hand,
+    full_shoe,
+    generate_strategy,
+)
+
+COLUMNS = {
+    card: index for index, card in enumerate(["2", "3", "4", "5", "6", "7", "8", "9", "10", "A"])
+}
+
+
+@pytest.fixture(scope="module")
+def shoe_chart():
+    """8-deck S17 DAS late-surrender chart."""
+    return generate_strategy(StrategyRules())
+
+
+@pytest.fixture(scope="module")
+def single_deck_index():
+    """Composition index for single-deck S17, limited to three-card hands."""
+    rules = StrategyRules(decks=1)
+    return build_composition_index(rules, generate_strategy(rules), max_cards=3)
+
+
+@pytest.fixture(scope="module")
+def single_deck_h17_chart():
+    """Single-deck H17 chart."""
+    return generate_strategy(StrategyRules(decks=1, hit_soft_17=True))
+
+
+def cell(chart, table, key, dealer):
+    section = chart[table]
+    rows = section["pairs"] if table == "pair_strategy" else section["hands"]
+    return rows[key][COLUMNS[dealer]]
+
+
+class TestDealerDistribution:
+    """Test the exact dealer outcome probabilities."""
+
+    def test_probabilities_sum_to_one(self):
+        """Test every upcard yields a complete distribution."""
+        counts = full_shoe(8)
+        for upcard in range(1, 11):
+            shoe = list(counts)
+            shoe[upcard] -= 1
+            assert sum(dealer_distribution(shoe, upcard, False)) == pytest.approx(1.0)
+
+    def test_six_busts_more_than_ten(self):
+        """Test a 6 upcard busts far more often than a 10."""
+        counts = full_shoe(8)
+        six = dealer_distribution(counts, 6, False)
+        ten = dealer_distribution(counts, 10, False)
+        assert six[5] > 0.4 > ten[5]
+
+
+class TestGeneratedChart:
+    """Test generated charts against well-known basic strategy plays."""
+
+    @pytest.mark.parametrize(
+        "table, key, dealer, expected",
+        [
+            ("hard_strategy", 16, "10", "H"),
+            ("hard_strategy", 12, "2", "H"),
+            ("hard_strategy", 12, "4", "S"),
+            ("hard_strategy", 11, "6", "D"),
+            ("hard_strategy", 11, "A", "H"),
+            ("hard_strategy", 9, "2", "H"),
+            ("hard_strategy", 9, "3", "D"),
+            ("soft_strategy", 18, "3", "Ds"),
+            ("soft_strategy", 18, "9", "H"),
+            ("soft_strategy", 19, "6", "S"),
+            ("pair_strategy", "A,A", "A", "Y"),
+            ("pair_strategy", "8,8", "10", "Y"),
+            ("pair_strategy", "9,9", "7", "N"),
+            ("pair_strategy", "10,10", "6", "N"),
+            ("surrender_strategy", 16, "10", "Y"),
+            ("surrender_strategy", 17, "A", "N"),
+        ],
+    )
+    def test_shoe_chart(self, shoe_chart, table, key, dealer, expected):
+        """Test the 8-deck chart matches published basic strategy."""
+        assert cell(shoe_chart, table, key, dealer) == expected
+
+    def test_h17_changes_expected_cells(self, single_deck_h17_chart):
+        """Test H17 single-deck rules double 11 vs A and soft 19 vs 6."""
+        assert cell(single_deck_h17_chart, "hard_strategy", 11, "A") == "D"
+        assert cell(single_deck_h17_chart, "soft_strategy", 19, "6") == "Ds"
+        assert cell(single_deck_h17_chart, "surrender_strategy", 17, "A") == "Y"
+
+    def test_no_surrender_table_without_rule(self):
+        """Test surrender is omitted when late surrender is not offered."""
+        chart = generate_strategy(StrategyRules(decks=2, late_surrender=False))
+        assert "surrender_strategy" not in chart
+
+    def test_das_affects_split(self):
+        """Test 4,4 vs 5 is only split when doubling after split is allowed."""
+        counts = full_shoe(8)
+        das = evaluate_hand(counts, 4, 4, 5, StrategyRules())
+        no_das = evaluate_hand(counts, 4, 4, 5, StrategyRules(double_after_split=False))
+        assert das.split > no_das.split
+
+    def test_invalid_rules(self):
+        """Test deck counts outside 1-8 are rejected."""
+        with pytest.raises(ValueError):
+            generate_strategy(StrategyRules(decks=9))
+
+
+class TestStrategyCache:
+    """Test the on-disk strategy cache."""
+
+    def test_cache_reused(self, tmp_path, monkeypatch):
+        """Test the second request loads the cached file instead of recomputing."""
+        rules = StrategyRules(decks=6)
+        path = cached_strategy_file(rules, tmp_path)
+        assert path.exists()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("strategy recomputed")
+
+        monkeypatch.setattr("src.core.strategy_generator.generate_strategy", fail)
+        assert cached_strategy_file(rules, tmp_path) == path
+        assert cached_strategy_file(StrategyRules(decks=6), tmp_path) == path
+
+    def test_from_rules(self, tmp_path):
+        """Test BasicStrategy loads a generated chart and uses it for decisions."""
+        strategy = BasicStrategy.from_rules(StrategyRules(decks=8), cache_dir=tmp_path)
+        assert strategy.settings["decks"] == 8
+        assert strategy.allow_surrender
+        action, _ = strategy.get_decision(["5", "6"], "6")
+        assert action == strategy.action_codes["D"]["action"]
+
+    def test_env_cache_dir(self, tmp_path, monkeypatch):
+        """Test the cache directory can be set through the environment."""
+        monkeypatch.setenv("BLACKJACK_COUNTER_CACHE", str(tmp_path))
+        path = cached_strategy_file(StrategyRules(decks=4, late_surrender=False))
+        assert path.parent == tmp_path / "strategies"
+
+
+class TestCompositionIndex:
+    """Test composition-dependent overrides for multi-card hands."""
+
+    def test_three_card_sixteen_stands(self, single_deck_index):
+        """Test 10-2-4 vs 10 stands in single deck while the total chart hits."""
+        key = card_composition_key(["10", "2", "4"], "10")
+        assert single_deck_index[key] == "S"
+        assert card_composition_key(["4", "K", "2"], "10") == key
+
+    def test_index_only_stores_differences(self, single_deck_index):
+        """Test the index is compact and holds only hit/stand overrides."""
+        assert 0 < len(single_deck_index) < 200
+        assert set(single_deck_index.values()) <= {"H", "S"}
+
+    def test_get_decision_uses_overrides(self, tmp_path):
+        """Test get_decision consults the index only for hands of three or more cards."""
+        strategy = BasicStrategy.from_rules(StrategyRules(decks=8), cache_dir=tmp_path)
+        hit = strategy.action_codes["H"]["action"]
+        stand = strategy.action_codes["S"]["action"]
+        assert strategy.get_decision(["4", "4", "4", "4"], "10")[0] == hit
+
+        strategy.set_composition_overrides({card_composition_key(["4", "4", "4", "4"], "10"): "S"})
+        assert strategy.get_decision(["4", "4", "4", "4"], "10") == (stand, "依手牌組合調整")
+        assert strategy.get_decision(["4", "4", "8"], "10")[0] == hit
+        assert strategy.get_decision(["10", "6"], "10")[0] != stand
@@ -0,0 +1,92 @@
+"""Unit tests for deterministic, seekable random streams."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.simulation.shoes import SeededShoeSource, ordered_shoe  # noqa: E402
+from src.simulation.streams import RunStreams  # noqa: E402
+
+
+class TestRunStreams:
+    """Test counter-based stream derivation."""
+
+    def test_sort_keys_are_seekable(self):
+        """Test keys for a sub-range equal the matching rows of a larger range."""
+        streams = RunStreams(42)
+        full = streams.shoe_sort_keys(0, 10, 52)
+        assert np.array_equal(streams.shoe_sort_keys(7, 2, 52), full[7:9])
+
+    def test_shoe_generator_is_independent_of_call_order(self):
+        """Test each shoe's auxiliary generator depends only on its index."""
+        streams = RunStreams(3)
+        first = streams.shoe_generator(5).random(4)
+        streams.shoe_generator(4).random(100)
+        assert np.array_equal(RunStreams(3).shoe_generator(5).random(4), first)
+        assert not np.array_equal(streams.shoe_generator(6).random(4), first)
+
+    def test_worker_generators_differ(self):
+        """Test worker streams are distinct per worker."""
+        streams = RunStreams(3)
+        assert streams.worker_generator(0).random() != streams.worker_generator(1).random()
+
+
+class TestSeededShoeSource:
+    """Test replayable shoes independent of batching and worker layout."""
+
+    def test_rows_are_valid_shoes(self):
+        """Test every generated shoe is a permutation of the full shoe."""
+        batch = SeededShoeSource(1, decks=6, batch_size=32).next_batch()
+        expected = np.sort(ordered_shoe(6))
+        assert all(np.array_equal(np.sort(row), expected) for row in batch.cards)
+        assert not np.array_equal(batch.cards[0], batch.cards[1])
+
+    def test_replay_single_shoe(self):
+        """Test replaying shoe N in isolation reproduces batch row N."""
+        source = SeededShoeSource(7, cut_jitter=20, batch_size=16)
+        batch = source.next_batch()
+        replay = SeededShoeSource(7, cut_jitter=20).shoe(11)
+        assert np.array_equal(replay.cards[0], batch.cards[11])
+        assert replay.cuts[0] == batch.cuts[11]
+
+    def test_partitioning_does_not_change_shoes(self):
+        """Test splitting the shoe range across workers yields identical shoes."""
+        whole = SeededShoeSource(9, decks=2, batch_size=12, stop=12).next_batch().cards
+        parts = [
+            SeededShoeSource(9, decks=2, batch_size=5, start=start, stop=stop)
+            for start, stop in [(0, 4), (4, 12)]
+        ]
+        rows = [row.copy() for part in parts for row in iter_batches(part)]
+        assert np.array_equal(np.array(rows), whole)
+
+    def test_seek_and_stop(self):
+        """Test seeking repositions the source and stop ends iteration."""
+        source = SeededShoeSource(2, decks=1, batch_size=4, stop=6)
+        source.seek(3)
+        assert len(source.next_batch().cards) == 3
+        with pytest.raises(StopIteration):
+            source.next_batch()
+        with pytest.raises(ValueError):
+            SeededShoeSource(2, start=5, stop=4)
+
+    def test_seeds_differ(self):
+        """Test different run seeds produce different shoes."""
+        first = SeededShoeSource(1, batch_size=1).next_batch().cards
+        second = SeededShoeSource(2, batch_size=1).next_batch().cards
+        assert not np.array_equal(first, second)
+
+    def test_cut_jitter_stays_in_range(self):
+        """Test seeded cut positions stay within the jitter window."""
+        cuts = SeededShoeSource(4, cut_jitter=26, batch_size=500).next_batch().cuts
+        assert cuts.min() >= 312 - 26 and cuts.max() <= 312 + 26
+        assert len(set(cuts.tolist())) > 1
+
+
+def iter_batches(source):
+    """Yield every shoe row until the source is exhausted."""
+    while True:
+        try:
+            batch = source.next_batch()
+        except StopIteration:
+            return
+        yield from batch.cards
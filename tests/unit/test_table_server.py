@@ -0,0 +1,169 @@
+"""Unit tests for the asyncio multi-table counting server."""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from src.core.basic_strategy import BasicStrategy
+from src.core.card_counter import WongHalvesCounter
+from src.service.table_server import TableServer
+
+
+async def _send(writer, request):
+    writer.write(json.dumps(request).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def _recv(reader):
+    return json.loads(await asyncio.wait_for(reader.readline(), timeout=5))
+
+
+@pytest.fixture(scope="module")
+def shared_strategy():
+    """Strategy loaded once for all server tests."""
+    return BasicStrategy(allow_surrender=False)
+
+
+class TestTableServer:
+    """Test table isolation, subscriptions and the socket protocol."""
+
+    def test_tables_are_independent(self, shared_strategy):
+        """Test each table keeps its own count and shares the strategy."""
+
+        async def scenario():
+            server = TableServer(shared_strategy)
+            listener = await server.start_tcp()
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            await _send(writer, {"op": "event", "table": "a", "event": "card", "card": "5"})
+            first = await _recv(reader)
+            await _send(writer, {"op": "event", "table": "b", "event": "card", "card": "K"})
+            second = await _recv(reader)
+
+            writer.close()
+            await server.close()
+            return server, first, second
+
+        server, first, second = asyncio.run(scenario())
+        assert first["table"] == "a" and first["rc"] == 1.5
+        assert second["table"] == "b" and second["rc"] == -1.0
+        assert server.tables["a"].engine.strategy is server.tables["b"].engine.strategy
+        assert server.tables["a"].engine.counter is not server.tables["b"].engine.counter
+
+    def test_subscribers_receive_updates(self, shared_strategy):
+        """Test updates are pushed to every subscriber of a table."""
+
+        async def scenario():
+            server = TableServer(shared_strategy)
+            listener = await server.start_tcp()
+            port = listener.sockets[0].getsockname()[1]
+            sub_reader, sub_writer = await asyncio.open_connection("127.0.0.1", port)
+            pub_reader, pub_writer = await asyncio.open_connection("127.0.0.1", port)
+
+            await _send(sub_writer, {"op": "subscribe", "table": "t1"})
+            ack = await _recv(sub_reader)
+            await _send(
+                pub_writer,
+                {"op": "event", "table": "t1", "event": "card", "role": "player", "card": "10"},
+            )
+            reply = await _recv(pub_reader)
+            pushed = await _recv(sub_reader)
+
+            sub_writer.close()
+            pub_writer.close()
+            await server.close()
+            return ack, reply, pushed
+
+        ack, reply, pushed = asyncio.run(scenario())
+        assert ack == {"table": "t1", "subscribed": True}
+        assert reply == pushed
+        assert pushed["cards_remaining"] == 415
+
+    def test_errors_reported(self, shared_strategy):
+        """Test invalid requests return an error line and keep the connection open."""
+
+        async def scenario():
+            server = TableServer(shared_strategy)
+            listener = await server.start_tcp()
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            writer.write(b"not json\n")
+            await _send(writer, {"op": "event", "event": "card", "card": "5"})
+            await _send(writer, {"op": "tables"})
+            replies = [await _recv(reader) for _ in range(3)]
+
+            writer.close()
+            await server.close()
+            return replies
+
+        replies = asyncio.run(scenario())
+        assert "error" in replies[0]
+        assert "error" in replies[1]
+        assert replies[2] == {"tables": []}
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets only")
+    def test_unix_socket(self, shared_strategy, tmp_path):
+        """Test the server over a Unix socket."""
+
+        async def scenario():
+            server = TableServer(shared_strategy)
+            path = str(tmp_path / "tables.sock")
+            await server.start_unix(path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            await _send(writer, {"op": "event", "table": "x", "event": "shoe"})
+            reply = await _recv(reader)
+            writer.close()
+            await server.close()
+            return reply
+
+        assert asyncio.run(scenario())["rc"] == 0.0
+
+    def test_many_tables_bounded(self, shared_strategy):
+        """Test hundreds of tables and the table limit."""
+        server = TableServer(shared_strategy, WongHalvesCounter(), max_tables=300)
+        for index in range(300):
+            server.get_table(f"t{index}").apply("card", "5", "other")
+        assert len(server.tables) == 300
+        with pytest.raises(ValueError):
+            server.get_table("overflow")
+
+    def test_invalid_first_event_does_not_create_table(self, shared_strategy):
+        """Test a rejected event neither keeps a new table nor counts against the limit."""
+        server = TableServer(shared_strategy, WongHalvesCounter(), max_tables=1)
+        for index in range(3):
+            with pytest.raises(ValueError):
+                server.handle_request(
+                    {"table": f"bad{index}", "event": "card", "card": "X"}, connection=None
+                )
+        assert server.tables == {}
+        server.handle_request({"table": "good", "event": "card", "card": "5"}, connection=None)
+        with pytest.raises(ValueError):
+            server.handle_request({"table": "good", "event": "bogus"}, connection=None)
+        assert list(server.tables) == ["good"]
+        assert server.tables["good"].engine.counter.running_count == 1.5
+
+    def test_close_table(self, shared_strategy):
+        """Test closing a table removes its state."""
+        server = TableServer(shared_strategy)
+        server.get_table("t1")
+        assert server.close_table("t1")
+        assert not server.close_table("t1")
+        assert server.tables == {}
+
+
+class TestCounterClone:
+    """Test WongHalvesCounter.clone used to spawn per-table counters."""
+
+    def test_clone_is_independent(self):
+        """Test cloned counters share config but not counting state."""
+        counter = WongHalvesCounter()
+        counter.add_card("5")
+        copy = counter.clone()
+        assert copy.running_count == 1.5
+        copy.add_card("5")
+        assert counter.running_count == 1.5
+        assert copy.card_values is counter.card_values
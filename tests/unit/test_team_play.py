@@ -0,0 +1,226 @@
+"""Unit tests for team-play count aggregation."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.core.card_counter import WongHalvesCounter
+from src.service.team_play import (
+    AggregatorServer,
+    LoopbackTransport,
+    Observation,
+    SocketTransport,
+    SpotterClient,
+    TeamAggregator,
+)
+
+
+@pytest.fixture
+def aggregator():
+    """Aggregator built from the default Wong Halves config."""
+    return TeamAggregator(WongHalvesCounter())
+
+
+class TestTeamAggregator:
+    """Test merging, de-duplication and shoe handling."""
+
+    def test_spotters_merge_into_one_count(self, aggregator):
+        """Test cards from two spotters at different tables stay separate."""
+        transport = LoopbackTransport(aggregator)
+        first = SpotterClient("t1", "alice", transport)
+        second = SpotterClient("t2", "bob", transport)
+        first.see("5")
+        first.see("6")
+        second.see("K")
+
+        assert aggregator.table_count("t1").running_count == 2.5
+        assert aggregator.table_count("t2").running_count == -1.0
+
+    def test_duplicate_sequence_counted_once(self, aggregator):
+        """Test two spotters reporting the same card position count once."""
+        transport = LoopbackTransport(aggregator)
+        first = SpotterClient("t1", "alice", transport)
+        second = SpotterClient("t1", "bob", transport)
+        first.see("5", seq=0)
+        second.see("5", seq=0)
+        second.see("2", seq=1)
+
+        count = aggregator.table_count("t1")
+        assert count.running_count == 2.0
+        assert count.cards_seen == 2
+        assert aggregator.duplicates == 1
+
+    def test_local_sequences_kept_per_spotter(self, aggregator):
+        """Test spotters without a shared sequence do not collide on local numbers."""
+        transport = LoopbackTransport(aggregator)
+        first = SpotterClient("t1", "alice", transport)
+        second = SpotterClient("t1", "bob", transport)
+        first.see("5")
+        second.see("6")
+        transport.send(first.see("2"))
+
+        count = aggregator.table_count("t1")
+        assert count.cards_seen == 3
+        assert aggregator.duplicates == 1
+
+    def test_restarted_spotter_maps_to_current_shoe(self, aggregator):
+        """Test a restarted spotter is not rejected as stale and shoe changes reset once."""
+        transport = LoopbackTransport(aggregator)
+        alice = SpotterClient("t1", "alice", transport)
+        bob = SpotterClient("t1", "bob", transport)
+        for _ in range(3):
+            alice.new_shoe()
+            bob.new_shoe()
+        alice.see("5")
+        assert aggregator.table_count("t1").shoe == 3
+
+        restarted = SpotterClient("t1", "alice", transport)
+        restarted.see("5")
+        count = aggregator.table_count("t1")
+        assert (count.shoe, count.cards_seen, aggregator.stale) == (3, 2, 0)
+
+        restarted.new_shoe()
+        restarted.see("K")
+        bob.new_shoe()
+        bob.see("K")
+        count = aggregator.table_count("t1")
+        assert (count.shoe, count.running_count) == (4, -2.0)
+
+    def test_new_shoe_resets_and_rejects_stale(self, aggregator):
+        """Test a newer shoe resets the table and older observations are ignored."""
+        aggregator.observe(Observation("t1", 0, 0, "5"))
+        aggregator.observe(Observation("t1", 1, 0, "K"))
+        assert aggregator.observe(Observation("t1", 0, 1, "5")) is None
+
+        count = aggregator.table_count("t1")
+        assert count.shoe == 1
+        assert count.running_count == -1.0
+        assert aggregator.stale == 1
+
+    def test_subscribers_notified(self, aggregator):
+        """Test subscribers receive the merged count after each new card."""
+        updates = []
+        aggregator.subscribers.append(updates.append)
+        aggregator.observe(Observation("t1", 0, 0, "5"))
+        aggregator.observe(Observation("t1", 0, 0, "5"))
+        assert len(updates) == 1
+        assert updates[0].true_count == aggregator.table_count("t1").true_count
+
+    def test_invalid_card(self, aggregator):
+        """Test invalid cards are rejected."""
+        with pytest.raises(ValueError):
+            aggregator.observe(Observation("t1", 0, 0, "X"))
+
+    def test_spotter_local_count(self, aggregator):
+        """Test each spotter keeps its own lightweight count."""
+        spotter = SpotterClient("t1", "alice", LoopbackTransport(aggregator))
+        spotter.see("5")
+        spotter.new_shoe()
+        assert spotter.counter.running_count == 0.0
+        assert spotter.next_seq == 0
+
+
+class TestAggregatorServer:
+    """Test spotters streaming to the aggregator over a local socket."""
+
+    def test_socket_round_trip_latency(self, aggregator):
+        """Test socket spotters reach a subscribed big player with low latency."""
+        loop = asyncio.new_event_loop()
+        server = AggregatorServer(aggregator)
+        listener = loop.run_until_complete(server.start_tcp())
+        address = listener.sockets[0].getsockname()[:2]
+
+        async def big_player():
+            reader, writer = await asyncio.open_connection(*address)
+            writer.write(json.dumps({"op": "subscribe", "table": "t1"}).encode() + b"\n")
+            await writer.drain()
+            snapshot = json.loads(await reader.readline())
+            started.set()
+            updates = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in range(3)]
+            writer.close()
+            return snapshot, updates
+
+        started = threading.Event()
+
+        def spotters():
+            started.wait(5)
+            transport = SocketTransport(address)
+            spotter = SpotterClient("t1", "alice", transport)
+            for card, seq in [("5", 0), ("5", 1), ("K", 1), ("5", 2)]:
+                spotter.see(card, seq=seq)
+            transport.close()
+
+        thread = threading.Thread(target=spotters)
+        thread.start()
+        snapshot, updates = loop.run_until_complete(big_player())
+        thread.join()
+        loop.run_until_complete(server.close())
+        loop.close()
+
+        assert snapshot["cards_seen"] == 0
+        assert server.dropped_subscribers == 0
+        assert [update["running_count"] for update in updates] == [1.5, 3.0, 4.5]
+        assert aggregator.duplicates == 1
+        assert max(update["latency_ms"] for update in updates) < 1000
+
+    def test_non_object_request_rejected(self, aggregator):
+        """Test a JSON line that is not an object gets an error reply, not a dropped link."""
+        loop = asyncio.new_event_loop()
+        server = AggregatorServer(aggregator)
+        listener = loop.run_until_complete(server.start_tcp())
+        address = listener.sockets[0].getsockname()[:2]
+
+        async def spotter():
+            reader, writer = await asyncio.open_connection(*address)
+            replies = []
+            for line in ["[1]", '"x"', json.dumps({"op": "subscribe", "table": "t1"})]:
+                writer.write(line.encode() + b"\n")
+                await writer.drain()
+                replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+            writer.close()
+            return replies
+
+        replies = loop.run_until_complete(spotter())
+        loop.run_until_complete(server.close())
+        loop.close()
+
+        assert "error" in replies[0] and "error" in replies[1]
+        assert replies[2]["cards_seen"] == 0
+
+    def test_slow_subscriber_dropped(self, aggregator):
+        """Test a subscriber with a full write buffer is disconnected instead of buffered."""
+
+        class _Transport:
+            def __init__(self, buffered):
+                self.buffered = buffered
+
+            def get_write_buffer_size(self):
+                return self.buffered
+
+        class _Writer:
+            def __init__(self, buffered):
+                self.transport = _Transport(buffered)
+                self.lines = []
+                self.closed = False
+
+            def is_closing(self):
+                return self.closed
+
+            def write(self, line):
+                self.lines.append(line)
+
+            def close(self):
+                self.closed = True
+
+        server = AggregatorServer(aggregator)
+        fast, slow = _Writer(0), _Writer(1 << 30)
+        server._subscribers["t1"] = {fast, slow}
+        aggregator.observe(Observation("t1", 0, 0, "5"))
+        aggregator.observe(Observation("t1", 0, 1, "5"))
+
+        assert len(fast.lines) == 2
+        assert slow.lines == [] and slow.closed
+        assert server.dropped_subscribers == 1
+        assert server._subscribers["t1"] == {fast}
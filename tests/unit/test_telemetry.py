@@ -0,0 +1,81 @@
+"""Unit tests for simulation telemetry."""
+
+import io
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.simulation.checkpoint import Checkpoint  # noqa: E402
+from src.simulation.results import (  # noqa: E402
+    BINS,
+    FIELDS,
+    TELEMETRY_FIELDS,
+    TELEMETRY_PID,
+    TELEMETRY_ROUNDS,
+    TELEMETRY_SHOES,
+    TELEMETRY_STARTED,
+    TELEMETRY_UPDATED,
+)
+from src.simulation.runner import SimulationConfig, run_simulation  # noqa: E402
+from src.simulation.telemetry import Dashboard, collect_status, render_dashboard  # noqa: E402
+
+
+class TestCollectStatus:
+    """Test status derivation from counters and progress."""
+
+    def test_queue_depth_rates_and_eta(self):
+        """Test queue depth, per-lane rate and ETA from a partial snapshot."""
+        config = SimulationConfig(chunk_shoes=10, lanes=2)
+        # 100 shoes = 10 chunks; lane 0 finished chunks 0, 2 and lane 1 chunk 1
+        progress = np.array([[4, 300], [3, 150]], dtype=np.int64)
+        snapshot = Checkpoint("x", 100, np.zeros((2, FIELDS, BINS)), progress)
+        telemetry = np.zeros((2, TELEMETRY_FIELDS))
+        telemetry[0, [TELEMETRY_PID, TELEMETRY_SHOES, TELEMETRY_ROUNDS]] = [11, 20, 300]
+        telemetry[0, [TELEMETRY_STARTED, TELEMETRY_UPDATED]] = [100.0, 110.0]
+        telemetry[1, [TELEMETRY_SHOES, TELEMETRY_ROUNDS]] = [10, 150]
+
+        status = collect_status(snapshot, telemetry, config, elapsed=10.0)
+        assert status.shoes_done == 30
+        assert status.queue_depth == 7
+        assert status.lanes[0].hands_per_second == 30.0
+        assert [lane.state for lane in status.lanes] == ["running", "waiting"]
+        assert status.eta == pytest.approx(70 * 10.0 / 30)
+        assert "30/100" in render_dashboard(status)
+
+
+class TestRunTelemetry:
+    """Test status output of a complete run."""
+
+    def test_status_file_and_dashboard(self, tmp_path):
+        """Test the final status reports every shoe and the merged EV."""
+        config = SimulationConfig(rules_chart=False, chunk_shoes=3, lanes=2, run_seed=4)
+        path = tmp_path / "status.json"
+        stream = io.StringIO()
+        results = run_simulation(config, 7, status_file=path, dashboard=stream)
+
+        status = json.loads(path.read_text(encoding="utf-8"))
+        assert status["shoes_done"] == 7 and status["eta"] == 0.0
+        assert status["rounds"] == results.rounds
+        assert status["ev"] == pytest.approx(results.overall().mean)
+        assert status["ev_low"] <= status["ev"] <= status["ev_high"]
+        assert {lane["state"] for lane in status["lanes"]} == {"done"}
+        assert sum(lane["shoes"] for lane in status["lanes"]) == 7
+        assert "7/7" in stream.getvalue()
+
+    def test_dashboard_redraws_in_place_on_terminals(self):
+        """Test the dashboard moves the cursor back only on a terminal."""
+
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        config = SimulationConfig(chunk_shoes=1, lanes=1)
+        snapshot = Checkpoint("x", 1, np.zeros((1, FIELDS, BINS)), np.ones((1, 2), np.int64))
+        status = collect_status(snapshot, np.zeros((1, TELEMETRY_FIELDS)), config, 1.0)
+        terminal = Terminal()
+        dashboard = Dashboard(terminal)
+        dashboard.update(status)
+        dashboard.update(status)
+        assert terminal.getvalue().count("\x1b[") == 2